@@ -0,0 +1,142 @@
+"""Microbenchmark: line-by-line post_process_csv against the column-wise record kernel.
+
+Usage (from backend/):
+    python benchmarks/clean_records.py [--rows 1000000] [--invoices 2000]
+
+Cleans --rows synthetic rows of 8-column LLM output with the old per-line loop and
+with records_from_csv + clean_records, then merges --invoices already-parsed invoice
+batches the way finalize_csv_chunks does. Serialization is excluded: it happens once
+at the output boundary either way.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from claude_prompting.batch_processor import combine_csv_chunks_safely
+from claude_prompting.records import clean_records, records_from_csv
+
+ROWS = [
+    'Chicken Breast Fillet,$45.50,2,4/10LB,4,10,pounds,100123',
+    '"Beans, Black, Dry",12.0,1.0,6/#10,6,10,CAN,110024',
+    'Milk 2% Half Pint,0.35,40,1/8OZ,1,8,ounce,130504',
+    'Apples Fuji 88ct,32.25,3,1/88CT,1,88,count,140011',
+    "Baker's Yeast,7,1,1/2LB,1,2,LB,150000",
+]
+HEADER = 'Description,Price,Quantity,Pack Size,Pack,Size,UOM,Foodcode'
+
+
+def line_loop_post_process(raw_csv):
+    """post_process_csv before this change, kept verbatim as the baseline."""
+    if not raw_csv.strip():
+        return ""
+    
+    lines = raw_csv.strip().split('\n')
+    cleaned_lines = []
+    
+    # Process each line of the raw CSV output
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+            
+        # Fix common formatting issues
+        line = line.replace('$', '')
+        line = re.sub(r'""', '', line)
+        line = re.sub(r',\s*,', ',,', line)
+        
+        cols = line.split(',')
+        
+        # If a line has more than 8 columns (e.g., a comma in the description)
+        if len(cols) > 8:
+            # The Description is everything EXCEPT the last 7 data columns.
+            num_data_columns = 7 
+            description = ','.join(cols[:-num_data_columns])
+            data_cols = cols[-num_data_columns:]
+            cols = [description] + data_cols
+
+        # Ensure we always have exactly 8 columns, padding with empty strings if needed
+        while len(cols) < 8:
+            cols.append('')
+
+        # --- Process data rows (skip the header) ---
+        if i > 0:
+            # Clean Description (column 0) by removing quotes
+            if len(cols) > 0:
+                cols[0] = cols[0].strip().replace('"', '').replace("'", "")
+
+            # Format Price (column 1) to 1 decimal place
+            if len(cols) > 1 and cols[1].strip():
+                try:
+                    cols[1] = f"{float(cols[1].strip()):.1f}"
+                except (ValueError, TypeError):
+                    pass # Keep original value if conversion fails
+            
+            # Ensure Quantity, Pack, and Size (columns 2, 4, 5) are integers
+            for int_col_idx in [2, 4, 5]:
+                if int_col_idx < len(cols) and cols[int_col_idx].strip():
+                    try:
+                        # Convert to float first, then to int, to handle cases like "10.0"
+                        value = float(cols[int_col_idx].strip())
+                        cols[int_col_idx] = str(int(value))
+                    except (ValueError, TypeError):
+                        pass # Keep original value if conversion fails
+            
+            # Standardize UOM (column 6)
+            if len(cols) > 6 and cols[6].strip():
+                uom = cols[6].strip().upper()
+                uom_mapping = {
+                    'OUNCE': 'OZ', 'OUNCES': 'OZ', 'POUND': 'LB', 'POUNDS': 'LB',
+                    'COUNT': 'CT', 'EACH': 'EA', 'GALLON': 'GAL', 'LITER': 'L'
+                }
+                cols[6] = uom_mapping.get(uom, uom)
+
+        # Append the cleaned, 8-column row to our list
+        cleaned_lines.append(','.join(cols[:8]))
+    
+    # Join all processed lines back into a single CSV string
+    return '\n'.join(cleaned_lines)
+
+
+def make_invoices(rows, invoices):
+    random.seed(11)
+    per_invoice = rows // invoices
+    return [HEADER + '\n' + '\n'.join(random.choice(ROWS) for _ in range(per_invoice)) for _ in range(invoices)]
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--invoices', type=int, default=2000)
+    args = parser.parse_args()
+
+    invoices = make_invoices(args.rows, args.invoices)
+    combined = combine_csv_chunks_safely(invoices)
+    print(f"[BENCH] {args.rows} rows in {args.invoices} invoices")
+
+    loop_seconds, _ = timed(line_loop_post_process, combined)
+    kernel_seconds, records = timed(lambda text: clean_records(records_from_csv([text])), combined)
+    print(f"clean, line loop        {loop_seconds:8.3f}s")
+    print(f"clean, column kernel    {kernel_seconds:8.3f}s  ({loop_seconds / kernel_seconds:.1f}x)")
+
+    # A district-year: each invoice was parsed and cleaned when it was processed; merging is a concat
+    batches = [clean_records(records_from_csv([invoice])) for invoice in invoices]
+    string_merge_seconds, _ = timed(lambda parts: line_loop_post_process(combine_csv_chunks_safely(parts)), invoices)
+    batch_merge_seconds, merged = timed(lambda parts: pd.concat(parts, ignore_index=True), batches)
+    print(f"merge, CSV strings      {string_merge_seconds:8.3f}s")
+    print(f"merge, record batches   {batch_merge_seconds:8.3f}s  ({len(merged)} rows)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""Compare CSV and tool (structured output) extraction: retries, tokens and latency per chunk.
+
+Usage (from backend/):
+    python benchmarks/extraction_modes.py [--chunks 20] [--rows 40] [--quote-error-rate 0.05]
+                                          [--skip-rate 0.02] [--per-token-ms 5]
+
+Runs the same synthetic invoice chunks through call_claude_batch_process in each
+EXTRACTION_MODE against the local stub client. The simulated model makes the two mistakes
+seen on real invoices: in CSV mode it sometimes leaves a Description with commas unquoted
+(a shifted row), and in both modes it sometimes skips an item. Latency is simulated from
+output tokens, so the numbers compare call counts and output size, not provider speed.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The stub has no account limits; keep the engine's budgets out of the measurement
+for name in ('LLM_RPM_LIMIT', 'LLM_INPUT_TPM_LIMIT', 'LLM_OUTPUT_TPM_LIMIT'):
+    os.environ[name] = '1000000000'
+
+import numpy as np
+
+from claude_prompting import batch_processor
+from claude_prompting.records import MODEL_HEADER
+from claude_prompting.stub_client import StubAnthropicClient
+from claude_prompting.structured_output import EXTRACTION_MODES
+
+ITEMS = [
+    ('Beans, Green, Cut', '6/#10'), ('Chicken Breast Fillet', '4/10LB'), ('Milk 1% Lowfat', '1/2GAL'),
+    ('Cheese, Cheddar, Shredded', '4/5 LB'), ('Apples Fresh 88ct', '88CT'), ('Bread, Whole Wheat, Sliced', '12/24 OZ'),
+]
+HEADER = "Item Description|Pack Size|Unit Price"
+
+
+def make_chunks(chunks, rows):
+    rng = random.Random(7)
+    result = []
+    for c in range(chunks):
+        lines = [HEADER]
+        for r in range(rows):
+            description, pack_size = rng.choice(ITEMS)
+            lines.append(f"{description} lot {c}-{r}|{pack_size}|{rng.uniform(5, 60):.2f}")
+        result.append('\n'.join(lines))
+    return result
+
+
+def make_responder(quote_error_rate, skip_rate, seed=11):
+    """Simulated model: one row per item line, with occasional quoting errors (CSV mode) and skipped items"""
+    rng = random.Random(seed)
+
+    def respond(request):
+        content = request['messages'][-1]['content']
+        chunk = content.split('INPUT TEXT TO PROCESS:', 1)[-1]
+        tool_mode = bool(request.get('tools'))
+        rows = [MODEL_HEADER]
+        for line in chunk.strip().split('\n'):
+            parts = line.split('|')
+            if len(parts) != 3 or line == HEADER or rng.random() < skip_rate:
+                continue
+            description, pack_size, price = parts
+            if ',' in description and (tool_mode or rng.random() >= quote_error_rate):
+                description = f'"{description}"'
+            rows.append(f"{description},{float(price):.1f},{rng.randint(1, 20)},{pack_size},999999")
+        return '\n'.join(rows)
+
+    return respond
+
+
+class TimedStub(StubAnthropicClient):
+    """Stub client whose calls take first_token seconds plus per_token seconds per output token"""
+
+    def __init__(self, responder, first_token, per_token):
+        super().__init__(responder)
+        self.first_token = first_token
+        self.per_token = per_token
+
+    def complete(self, request):
+        response = super().complete(request)
+        time.sleep(self.first_token + response.usage.output_tokens * self.per_token)
+        return response
+
+
+def run_mode(mode, chunks, food_index, args):
+    stub = TimedStub(make_responder(args.quote_error_rate, args.skip_rate), args.first_token_ms / 1000,
+                     args.per_token_ms / 1000)
+    batch_processor.get_llm_engine().client = stub
+    batch_processor.EXTRACTION_MODE = mode
+    calls, input_tokens, output_tokens, latencies, rows_out = [], [], [], [], 0
+    for i, chunk in enumerate(chunks):
+        before = len(stub.usages)
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            output = batch_processor.call_claude_batch_process(chunk, food_index, HEADER, i > 0, use_cache=False)
+        latencies.append(time.perf_counter() - started)
+        usages = stub.usages[before:]
+        calls.append(len(usages))
+        input_tokens.append(sum(u.input_tokens + u.cache_creation_input_tokens + u.cache_read_input_tokens for u in usages))
+        output_tokens.append(sum(u.output_tokens for u in usages))
+        rows_out += max(0, len([line for line in output.strip().split('\n') if line.strip()]) - 1)
+    return {
+        'mode': mode,
+        'extra_calls': np.mean(calls) - 1,
+        'input_tokens': np.mean(input_tokens),
+        'output_tokens': np.mean(output_tokens),
+        'latency_mean': np.mean(latencies),
+        'latency_p95': np.percentile(latencies, 95),
+        'rows': rows_out,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--chunks', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=40, help='Item lines per chunk')
+    parser.add_argument('--quote-error-rate', type=float, default=0.05,
+                        help='Share of comma Descriptions left unquoted in CSV mode')
+    parser.add_argument('--skip-rate', type=float, default=0.02, help='Share of items the model skips')
+    parser.add_argument('--first-token-ms', type=float, default=300)
+    parser.add_argument('--per-token-ms', type=float, default=5)
+    args = parser.parse_args()
+
+    with open(os.path.join(os.path.dirname(__file__), '../foodCodes/food_index.txt'), 'r') as f:
+        food_index = f.read()
+    chunks = make_chunks(args.chunks, args.rows)
+    batch_processor.response_cache.enabled = False
+
+    print(f"[BENCH] {args.chunks} chunks x {args.rows} rows, quote errors {args.quote_error_rate:.0%}, "
+          f"skipped items {args.skip_rate:.0%}")
+    for mode in EXTRACTION_MODES:
+        result = run_mode(mode, chunks, food_index, args)
+        print(f"[BENCH] {result['mode']:>4}: {result['extra_calls']:.2f} retry/repair calls per chunk, "
+              f"{result['input_tokens']:.0f} input + {result['output_tokens']:.0f} output tokens per chunk, "
+              f"latency mean {result['latency_mean']:.2f}s p95 {result['latency_p95']:.2f}s, "
+              f"{result['rows']}/{args.chunks * args.rows} rows")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Compare CSV finalization via string round-trips against the typed record-batch path.
+
+Usage (from backend/):
+    python benchmarks/finalize_records.py [--rows 100000] [--chunks 200] [--repeat 3]
+
+Generates synthetic 8-column LLM outputs and finalizes them twice: once the way
+finalize_csv_chunks used to (combine strings, read_csv, derive, to_csv, header fix,
+read_csv again for the quality check) and once through records_from_csv, which parses
+each output once. Reports CPU time and peak traced memory for each.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from claude_prompting.batch_processor import (
+    auto_fix_common_issues,
+    combine_csv_chunks_safely,
+    comprehensive_quality_check,
+    finalize_csv_chunks,
+    fix_header_column_mismatch,
+    post_processing_additional_information,
+)
+
+DESCRIPTIONS = ['Chicken Breast Fillet', '"Beans, Black, Dry"', 'Milk 2% Half Pint', 'Apples Fuji 88ct', 'Bread Whole Wheat']
+PACK_SIZES = [('4/10LB', '4', '10', 'LB'), ('12/16OZ', '12', '16', 'OZ'), ('6/#10', '6', '10', 'CAN'), ('200CT', '1', '200', 'CT')]
+
+
+def make_outputs(rows, chunks):
+    random.seed(7)
+    per_chunk = rows // chunks
+    outputs = []
+    for c in range(chunks):
+        lines = ['Description,Price,Quantity,Pack Size,Pack,Size,UOM,Foodcode']
+        for r in range(per_chunk):
+            pack_size, pack, size, uom = random.choice(PACK_SIZES)
+            lines.append(f"{random.choice(DESCRIPTIONS)} {c}-{r},{random.uniform(5, 90):.1f},{random.randint(1, 40)},"
+                         f"{pack_size},{pack},{size},{uom},{random.choice(['100123', '110024', '130504'])}")
+        outputs.append('\n'.join(lines))
+    return outputs
+
+
+def string_round_trip_finalize(csv_chunks):
+    """The previous finalize_csv_chunks: every stage re-reads or re-writes the CSV text."""
+    combined_csv = combine_csv_chunks_safely(csv_chunks)
+    df = post_processing_additional_information(pd.read_csv(io.StringIO(combined_csv)))
+    for col in ['Price', 'Quantity', 'Pack', 'Size', 'Total Price', 'Price Per Pack',
+                'Price Per Pack Size', 'Price Per Pound', 'Foodcode']:
+        df[col] = pd.to_numeric(df[col].astype(str).str.replace(r'[$,]', '', regex=True), errors='coerce')
+    df = auto_fix_common_issues(df)
+    final_csv = df.to_csv(index=False, float_format='%.1f')
+    fixed_csv, _ = fix_header_column_mismatch(final_csv)
+    comprehensive_quality_check(pd.read_csv(io.StringIO(fixed_csv)), [])
+    return fixed_csv
+
+
+def run(finalize, outputs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return finalize(outputs, []) if finalize is finalize_csv_chunks else finalize(outputs)
+
+
+def measure(finalize, outputs, repeat):
+    """(best CPU seconds, peak traced bytes, final CSV); memory is traced in a separate run."""
+    cpu_times = []
+    for _ in range(repeat):
+        started = time.process_time()
+        result = run(finalize, outputs)
+        cpu_times.append(time.process_time() - started)
+    tracemalloc.start()
+    run(finalize, outputs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(cpu_times), peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--chunks', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    outputs = make_outputs(args.rows, args.chunks)
+    print(f"[BENCH] {args.rows} rows in {args.chunks} outputs, best of {args.repeat}")
+
+    results = {
+        'string round-trips': measure(string_round_trip_finalize, outputs, args.repeat),
+        'typed record batch': measure(finalize_csv_chunks, outputs, args.repeat),
+    }
+    baseline_cpu, baseline_peak, baseline_csv = results['string round-trips']
+    for name, (cpu, peak, final_csv) in results.items():
+        print(f"{name:20s} {cpu:7.2f}s CPU  {peak / 2**20:8.1f} MiB peak  "
+              f"{baseline_cpu / cpu:5.2f}x faster  {baseline_peak / peak:5.2f}x less memory")
+    same_rows = len(baseline_csv.splitlines()) == len(results['typed record batch'][2].splitlines())
+    print(f"[BENCH] same row count: {same_rows}")
+
+
+if __name__ == '__main__':
+    main()
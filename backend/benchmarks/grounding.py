@@ -0,0 +1,80 @@
+"""Time the source-grounding check per output row and measure what it catches.
+
+Usage (from backend/):
+    python benchmarks/grounding.py [--chunks 2000] [--rows 40] [--hallucination-rate 0.02]
+
+Builds synthetic invoice chunks and the model rows for them, replaces a share of the rows
+with invented prices, descriptions or pack sizes, and runs SourceGrounding over every chunk
+(index build plus row checks), reporting microseconds per row, the share of invented rows
+flagged and the share of faithful rows flagged.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from claude_prompting.grounding import SourceGrounding
+
+ITEMS = [
+    ('Beans, Green, Cut', '6/#10'), ('Chicken Breast Fillet', '4/10LB'), ('Milk 1% Lowfat', '1/2GAL'),
+    ('Cheese, Cheddar, Shredded', '4/5 LB'), ('Apples Fresh 88ct', '88CT'), ('Bread, Whole Wheat, Sliced', '12/24 OZ'),
+]
+INVENTED = {
+    'price': lambda values: [values[0], '987.6', *values[2:]],
+    'description': lambda values: ['Turkey Ham Deli Sliced', *values[1:]],
+    'pack size': lambda values: [*values[:3], '36/7 OZ', values[4]],
+}
+
+
+def make_chunk(rng, rows, hallucination_rate):
+    """(chunk text, [(line, values)], invented flags)"""
+    lines = ["Item Description|Pack Size|Qty|Unit Price"]
+    output = []
+    invented = []
+    for r in range(rows):
+        description, pack_size = rng.choice(ITEMS)
+        description = f"{description} {rng.randint(1000, 9999)}"
+        quantity, price = rng.randint(1, 20), rng.uniform(5, 60)
+        lines.append(f"{description}|{pack_size}|{quantity}|${price:,.2f}")
+        values = [description, f"{price:.1f}", str(quantity), pack_size, '999999']
+        fake = rng.random() < hallucination_rate
+        if fake:
+            values = rng.choice(list(INVENTED.values()))(values)
+        output.append((','.join(values), values))
+        invented.append(fake)
+    return '\n'.join(lines), output, invented
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--chunks', type=int, default=2000)
+    parser.add_argument('--rows', type=int, default=40)
+    parser.add_argument('--hallucination-rate', type=float, default=0.02)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    chunks = [make_chunk(rng, args.rows, args.hallucination_rate) for _ in range(args.chunks)]
+    caught = missed = false_flags = faithful = 0
+    started = time.perf_counter()
+    flagged = [{line for line, _reasons in SourceGrounding(text).ungrounded(rows)} for text, rows, _invented in chunks]
+    elapsed = time.perf_counter() - started
+    for (text, rows, invented), bad_lines in zip(chunks, flagged):
+        for (line, _values), fake in zip(rows, invented):
+            if fake:
+                caught += line in bad_lines
+                missed += line not in bad_lines
+            else:
+                faithful += 1
+                false_flags += line in bad_lines
+
+    total_rows = args.chunks * args.rows
+    print(f"[BENCH] {total_rows} rows in {args.chunks} chunks: {elapsed:.3f}s, "
+          f"{elapsed / total_rows * 1e6:.1f} us per row including the index build")
+    print(f"[BENCH] invented rows flagged {caught}/{caught + missed}, faithful rows flagged {false_flags}/{faithful}")
+
+
+if __name__ == '__main__':
+    main()
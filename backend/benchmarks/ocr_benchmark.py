@@ -0,0 +1,82 @@
+"""Compare the pytesseract subprocess path against the warm tesserocr engine pool.
+
+Usage (from backend/):
+    python benchmarks/ocr_benchmark.py [image_or_pdf ...] [--pages-per-pdf N] [--repeat N]
+
+With no paths, uses the sample images in frontend/public and the scanned
+Garden Grove vendor PDFs from los_angeles_area_school_procurement.
+"""
+import argparse
+import concurrent.futures
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from claude_prompting.ocr_engine import OCR_POOL_SIZE, SubprocessOcrBackend, TesserocrPoolBackend
+from claude_prompting.pdf_extraction import PDF_OCR_DPI, rasterize_pdf_page
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+DEFAULT_SAMPLES = (
+    glob.glob(os.path.join(REPO_ROOT, 'frontend/public/example*.png')) +
+    sorted(glob.glob(os.path.join(REPO_ROOT, 'los_angeles_area_school_procurement/Garden_Grove_files/*.pdf')))
+)
+
+
+def load_images(paths, pages_per_pdf):
+    images = []
+    for path in paths:
+        if path.lower().endswith('.pdf'):
+            from PyPDF2 import PdfReader
+            page_count = min(len(PdfReader(path).pages), pages_per_pdf)
+            images.extend(rasterize_pdf_page(path, i, PDF_OCR_DPI) for i in range(page_count))
+        else:
+            images.append(Image.open(path).convert('RGB'))
+    return images
+
+
+def run(backend, images, workers, repeat):
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in range(repeat):
+            list(executor.map(backend.image_to_string, images))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('paths', nargs='*', default=DEFAULT_SAMPLES)
+    parser.add_argument('--pages-per-pdf', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=OCR_POOL_SIZE)
+    args = parser.parse_args()
+
+    images = load_images(args.paths, args.pages_per_pdf)
+    total = len(images) * args.repeat
+    print(f"[BENCH] {len(images)} images x {args.repeat} repeats, {args.workers} threads")
+
+    results = {}
+    subprocess_backend = SubprocessOcrBackend()
+    results['pytesseract (subprocess)'] = run(subprocess_backend, images, args.workers, args.repeat)
+
+    try:
+        pool_backend = TesserocrPoolBackend(pool_size=args.workers)
+    except ImportError:
+        print("[BENCH] tesserocr is not installed; only the subprocess path was measured")
+    else:
+        try:
+            results['tesserocr (warm pool)'] = run(pool_backend, images, args.workers, args.repeat)
+        finally:
+            pool_backend.close()
+
+    baseline = results['pytesseract (subprocess)']
+    for name, elapsed in results.items():
+        print(f"{name:28s} {elapsed:8.2f}s total  {1000 * elapsed / total:8.1f} ms/image  {baseline / elapsed:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Measure task-queue throughput as worker processes are added.
+
+Usage (from backend/):
+    python benchmarks/queue_scaling.py [--documents 24] [--rows 600] [--latency 1.0] [--workers 1 2 4] [--nodes 2]
+
+Generates synthetic invoice CSVs, queues them as one job and drains it with N local worker
+processes spread over --nodes simulated machines (distinct WORKER_NODE_ID values sharing one
+SQLite work table). The LLM is replaced by the local stub client with a fixed per-call
+latency, so the numbers isolate queue coordination from provider limits. Also checks that
+no chunk was committed twice.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from claude_prompting.task_queue import TaskQueue
+
+
+def write_documents(directory, documents, rows):
+    paths = []
+    for d in range(documents):
+        path = os.path.join(directory, f"invoice_{d}.csv")
+        with open(path, 'w') as f:
+            f.write("Item Description,Pack Size,Unit Price\n")
+            for r in range(rows):
+                f.write(f"Chicken Breast Fillet lot {d}-{r},4/10LB,{45 + r % 10}.50\n")
+        paths.append(path)
+    return paths
+
+
+def stub_worker(db_path, node, latency):
+    """Worker process entry point with the LLM replaced by a fixed-latency stub."""
+    # The stub has no account limits; keep the engine's budgets out of the measurement
+    for name in ('LLM_RPM_LIMIT', 'LLM_INPUT_TPM_LIMIT', 'LLM_OUTPUT_TPM_LIMIT'):
+        os.environ[name] = '1000000000'
+    from claude_prompting import batch_processor
+    from claude_prompting.stub_client import StubAnthropicClient, default_responder
+    from claude_prompting.task_queue import run_worker
+
+    def slow_responder(request):
+        time.sleep(latency)
+        return default_responder(request)
+
+    batch_processor.response_cache.enabled = False
+    batch_processor.CLAUDE_STREAMING = False
+    batch_processor.get_llm_engine().client = StubAnthropicClient(slow_responder)
+    run_worker(db_path, poll_seconds=0.2, exit_when_idle=True, node=node)
+
+
+def run_once(paths, workers, nodes, latency):
+    db_path = os.path.join(tempfile.mkdtemp(prefix='queue_bench_'), 'queue.sqlite3')
+    queue = TaskQueue(db_path)
+    job_id = queue.submit_job(paths, local_files=True)
+
+    context = multiprocessing.get_context('spawn')
+    started = time.monotonic()
+    processes = [
+        context.Process(target=stub_worker, args=(db_path, f"node-{i % nodes}", latency))
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.monotonic() - started
+
+    job = queue.get_job(job_id)
+    conn = queue._connect()
+    try:
+        chunks, relet = conn.execute(
+            "SELECT COUNT(*), SUM(lease_token > 1) FROM tasks WHERE job_id = ? AND kind = 'chunk'", (job_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+    return {
+        'workers': workers,
+        'seconds': round(elapsed, 2),
+        'chunks': chunks,
+        'chunks_per_second': round(chunks / elapsed, 2),
+        'chunks_leased_more_than_once': relet or 0,
+        'job_status': job['status'],
+        'nodes': queue.node_stats(),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--documents', type=int, default=24)
+    parser.add_argument('--rows', type=int, default=600)
+    parser.add_argument('--latency', type=float, default=1.0, help='Seconds per stubbed LLM call')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--nodes', type=int, default=2)
+    args = parser.parse_args()
+
+    paths = write_documents(tempfile.mkdtemp(prefix='queue_bench_docs_'), args.documents, args.rows)
+    baseline = None
+    for workers in args.workers:
+        report = run_once(paths, workers, min(args.nodes, workers), args.latency)
+        baseline = baseline or report['chunks_per_second'] / report['workers']
+        speedup = report['chunks_per_second'] / baseline
+        print(f"[BENCH] {workers} workers: {report['chunks']} chunks in {report['seconds']}s "
+              f"({report['chunks_per_second']}/s, {speedup:.2f}x of one worker), status {report['job_status']}, "
+              f"re-leased chunks {report['chunks_leased_more_than_once']}")
+        for node in report['nodes']:
+            print(f"    {node['node']}: {node['workers']} workers, {node['chunks_done']} chunks, "
+                  f"{node['chunks_per_minute']}/min, utilization {node['utilization']}")
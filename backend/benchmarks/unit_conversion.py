@@ -0,0 +1,59 @@
+"""Time the price-per-pound engine over a food_data-sized table.
+
+Usage (from backend/):
+    python benchmarks/unit_conversion.py [--rows 1000000] [--repeat 3]
+
+Builds synthetic food_data columns (Price, Pack, Size, UOM, Food_Code, food_group) with the
+unit mix seen on invoices and runs the same conversion recompute_food_data does, reporting
+the time per run and the unconvertible rows by reason.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from claude_prompting.unit_conversion import get_conversion_tables, issue_summary
+
+UNITS = ['LB', 'OZ', 'oz', 'GAL', 'QT', 'CT', 'EA', 'CAN', '#10', 'DZ', 'CS', None]
+CODES = [120015, 200015, 500455, 233015, 457357, 100058, 200023, 505955, 999999]
+
+
+def make_food_data(rows):
+    rng = np.random.default_rng(7)
+    return pd.DataFrame({
+        'Price': rng.uniform(5, 90, rows).round(2),
+        'Pack': rng.choice([1, 4, 6, 12, 100, np.nan], rows),
+        'Size': rng.choice([1, 5, 10, 16, 40, np.nan], rows),
+        'UOM': rng.choice(np.array(UNITS, dtype=object), rows),
+        'Food_Code': rng.choice(CODES, rows),
+        'food_group': rng.choice(np.array(['', 'Fruits/juices', 'Milk & other dairy products', None], dtype=object), rows),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    frame = make_food_data(args.rows)
+    tables = get_conversion_tables()
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        per_pound, issue = tables.price_per_pound(frame['Price'], frame['Pack'], frame['Size'], frame['UOM'],
+                                                  frame['Food_Code'], frame['food_group'])
+        timings.append(time.perf_counter() - started)
+    print(f"[BENCH] {args.rows} rows: best {min(timings):.3f}s of {args.repeat} "
+          f"({args.rows / min(timings) / 1e6:.1f}M rows/s)")
+    print(f"[BENCH] unconvertible {issue_summary(issue)}")
+    print(f"[BENCH] median price per lb {per_pound.median():.2f}")
+
+
+if __name__ == '__main__':
+    main()
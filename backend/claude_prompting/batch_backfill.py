@@ -0,0 +1,195 @@
+import argparse
+import os
+import time
+
+from dotenv import load_dotenv
+
+from claude_prompting import batch_processor
+from claude_prompting.batch_processor import (
+    accept_claude_output,
+    call_claude_batch_process,
+    combine_csv_chunks_safely,
+    extract_text,
+    finalize_csv_chunks,
+    plan_document_chunks,
+    prepare_claude_request,
+    validate_food_index_loading,
+)
+from claude_prompting.bid_tabulation import try_bid_tabulation_fast_path
+from claude_prompting.llm_usage import llm_usage
+from claude_prompting.response_cache import response_cache
+from claude_prompting.structured_output import response_model_csv
+
+# Load environment variables
+load_dotenv()
+
+# The Message Batches API accepts up to 100,000 requests per batch
+MAX_BATCH_REQUESTS = int(os.getenv('BACKFILL_MAX_BATCH_REQUESTS', '10000'))
+POLL_INITIAL_SECONDS = float(os.getenv('BACKFILL_POLL_INITIAL_SECONDS', '30'))
+POLL_MAX_SECONDS = float(os.getenv('BACKFILL_POLL_MAX_SECONDS', '600'))
+POLL_TIMEOUT_SECONDS = float(os.getenv('BACKFILL_POLL_TIMEOUT_SECONDS', str(24 * 3600)))
+SUPPORTED_EXTENSIONS = ('.pdf', '.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.csv', '.xlsx', '.xls')
+
+
+def collect_chunk_requests(file_paths, food_index):
+    """Plan every chunk of every document.
+
+    Returns (documents, pending) where documents[d] holds the per-chunk slots for
+    file d (pre-filled for fast-path and cached chunks) and pending maps
+    custom_id -> (doc_index, chunk_index, chunk_text, params, cache_key,
+    header_context, is_continuation).
+    """
+    documents = []
+    pending = {}
+    for doc_index, path in enumerate(file_paths):
+        fast_path_csv = try_bid_tabulation_fast_path(path)
+        if fast_path_csv:
+            documents.append({'path': path, 'chunks': [fast_path_csv]})
+            continue
+
+        text = extract_text(path)
+        if not text.strip():
+            print(f"[BACKFILL] No text extracted from {path}, skipping")
+            documents.append({'path': path, 'chunks': []})
+            continue
+
+        planned = plan_document_chunks(text)
+        slots = [None] * len(planned)
+        for chunk_index, (chunk, header_context, is_continuation) in enumerate(planned):
+            params, cache_key = prepare_claude_request(chunk, food_index, header_context, is_continuation)
+            cached_output = response_cache.get(cache_key) if response_cache.enabled else None
+            if cached_output is not None:
+                slots[chunk_index] = cached_output
+                continue
+            custom_id = f"doc{doc_index}-chunk{chunk_index}"
+            pending[custom_id] = (doc_index, chunk_index, chunk, params, cache_key, header_context, is_continuation)
+        documents.append({'path': path, 'chunks': slots})
+    return documents, pending
+
+
+def submit_batch(llm_client, pending_items):
+    batch = llm_client.messages.batches.create(requests=[
+        {"custom_id": custom_id, "params": item[3]} for custom_id, item in pending_items
+    ])
+    print(f"[BACKFILL] Submitted batch {batch.id} with {len(pending_items)} requests")
+    return batch.id
+
+
+def wait_for_batch(llm_client, batch_id, initial_delay=POLL_INITIAL_SECONDS,
+                   max_delay=POLL_MAX_SECONDS, timeout=POLL_TIMEOUT_SECONDS):
+    """Poll with exponential backoff until the batch has ended."""
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    while True:
+        batch = llm_client.messages.batches.retrieve(batch_id)
+        counts = getattr(batch, 'request_counts', None)
+        print(f"[BACKFILL] Batch {batch_id}: {batch.processing_status} {counts if counts is not None else ''}")
+        if batch.processing_status == 'ended':
+            return batch
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError(f"Batch {batch_id} did not finish within {timeout}s")
+        time.sleep(delay)
+        delay = min(delay * 2, max_delay)
+
+
+def apply_batch_results(llm_client, batch_id, documents, pending):
+    """Validate each succeeded result into its document slot. Returns custom_ids that still need work."""
+    unresolved = set(custom_id for custom_id in pending)
+    for entry in llm_client.messages.batches.results(batch_id):
+        item = pending.get(entry.custom_id)
+        if item is None:
+            continue
+        doc_index, chunk_index, chunk, params, cache_key = item[:5]
+        if entry.result.type != 'succeeded':
+            print(f"[BACKFILL] {entry.custom_id} {entry.result.type}")
+            continue
+
+        message = entry.result.message
+        llm_usage.record(message.usage, label=entry.custom_id)
+        raw_output = response_model_csv(message)
+        validated_output, validation_result = accept_claude_output(raw_output, chunk)
+        if validated_output is None:
+            print(f"[BACKFILL] {entry.custom_id} failed validation: {validation_result['errors']}")
+            continue
+
+        documents[doc_index]['chunks'][chunk_index] = validated_output
+        if response_cache.enabled:
+            response_cache.put(cache_key, params['model'], validated_output)
+        unresolved.discard(entry.custom_id)
+    return unresolved
+
+
+def backfill_documents(file_paths, food_index_path="foodCodes/food_index.txt", llm_client=None,
+                       poll_initial=POLL_INITIAL_SECONDS, poll_max=POLL_MAX_SECONDS):
+    """Process a whole archive through the asynchronous Message Batches API.
+
+    Chunks are collected from every document and submitted as batch jobs. Results are
+    validated and reassembled per document; chunks that errored or failed validation
+    are retried synchronously through call_claude_batch_process.
+    """
+    llm_client = llm_client or batch_processor.client
+    food_index = validate_food_index_loading(food_index_path)
+    if not food_index:
+        return ""
+
+    documents, pending = collect_chunk_requests(file_paths, food_index)
+    print(f"[BACKFILL] {len(file_paths)} documents, {len(pending)} chunks to submit")
+
+    items = list(pending.items())
+    unresolved = set()
+    for start in range(0, len(items), MAX_BATCH_REQUESTS):
+        batch_items = items[start:start + MAX_BATCH_REQUESTS]
+        batch_id = submit_batch(llm_client, batch_items)
+        wait_for_batch(llm_client, batch_id, poll_initial, poll_max)
+        unresolved |= apply_batch_results(llm_client, batch_id, documents, dict(batch_items))
+
+    if unresolved:
+        print(f"[BACKFILL] Retrying {len(unresolved)} chunks synchronously")
+    for custom_id in sorted(unresolved):
+        doc_index, chunk_index, chunk, _, _, header_context, is_continuation = pending[custom_id]
+        documents[doc_index]['chunks'][chunk_index] = call_claude_batch_process(
+            chunk, food_index, header_context, is_continuation
+        )
+
+    csv_outputs = []
+    for document in documents:
+        document_csv = combine_csv_chunks_safely([chunk for chunk in document['chunks'] if chunk])
+        if document_csv.strip():
+            csv_outputs.append(document_csv)
+        else:
+            print(f"[BACKFILL] No rows for {document['path']}")
+
+    print(f"[USAGE] {llm_usage.summary()}")
+    return finalize_csv_chunks(csv_outputs, file_paths)
+
+
+def find_documents(paths):
+    """Expand directories into the supported document files they contain."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                found.extend(os.path.join(root, name) for name in sorted(files)
+                             if name.lower().endswith(SUPPORTED_EXTENSIONS))
+        else:
+            found.append(path)
+    return found
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backfill a document archive through the Message Batches API')
+    parser.add_argument('paths', nargs='+', help='Files or directories (e.g. a district folder)')
+    parser.add_argument('--out', default='backfill.csv')
+    parser.add_argument('--fake', action='store_true', help='Use the local fake batch server instead of the API')
+    args = parser.parse_args()
+
+    llm_client = None
+    if args.fake:
+        from claude_prompting.stub_client import FakeBatchClient
+        llm_client = FakeBatchClient()
+
+    csv_text = backfill_documents(find_documents(args.paths), llm_client=llm_client,
+                                  poll_initial=0.1 if args.fake else POLL_INITIAL_SECONDS)
+    with open(args.out, 'w') as f:
+        f.write(csv_text)
+    print(f"[BACKFILL] Wrote {args.out}")
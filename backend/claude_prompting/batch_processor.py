@@ -3,41 +3,75 @@ import os
 import pandas as pd
 import io
 import base64
-from PyPDF2 import PdfReader
 from PIL import Image
-import pytesseract
 from dotenv import load_dotenv
 import concurrent.futures
-import requests
-import tempfile
+import csv
 import re
 from typing import Dict, List, Any
 import numpy as np
+from claude_prompting.extraction_cache import cached_extract, extraction_cache
+from claude_prompting.response_cache import response_cache, response_cache_key
+from claude_prompting.downloader import download_files_from_urls, cleanup_temp_files
+from claude_prompting.pdf_extraction import extract_pdf_pages
+from claude_prompting.ocr_engine import get_ocr_backend
+from claude_prompting.spreadsheet_reader import extract_text_from_spreadsheet
+from claude_prompting.bid_tabulation import try_bid_tabulation_fast_path
+from claude_prompting.food_code_index import FOOD_INDEX_MODE, food_code_candidates_text
+from claude_prompting.grounding import GROUNDING_MODE, SourceGrounding, ungrounded_rows
+from claude_prompting.llm_usage import llm_usage
+from claude_prompting.chunker import chunk_document, estimate_tokens
+from claude_prompting.llm_engine import get_llm_engine
+from claude_prompting.progress import NULL_PROGRESS
+from claude_prompting.pack_size import PACK_SIZE_MIN_CONFIDENCE
+from claude_prompting.records import (
+    FINAL_COLUMNS, MODEL_COLUMNS, MODEL_HEADER, RECORD_COLUMNS, clean_records, record_row, records_from_csv,
+    records_from_model_csv, records_to_chunk_csv, records_to_csv,
+)
+from claude_prompting.row_repair import SourceIndex, order_rows, parse_rows, row_key
+from claude_prompting.structured_output import (
+    EXTRACTION_MODE, RECORD_ROWS_TOOL, RECORD_ROWS_TOOL_CHOICE, RECORD_ROWS_TOOL_NAME, response_model_csv,
+)
+from claude_prompting.unit_conversion import PRICE_PER_POUND_DECIMALS, issue_summary, price_per_pound
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Anthropic client
+# Initialize Anthropic client (Message Batches backfills); interactive calls go through get_llm_engine()
 client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+# Worker threads per upload for extraction; LLM concurrency is governed process-wide by the engine
+PIPELINE_MAX_WORKERS = int(os.getenv('PIPELINE_MAX_WORKERS', '8'))
+# Concurrent chunks per large document, and how often an empty chunk is re-run on its own
+CHUNK_MAX_WORKERS = int(os.getenv('CHUNK_MAX_WORKERS', '8'))
+CHUNK_RETRIES = int(os.getenv('CHUNK_RETRIES', '1'))
+# Stream completions and abort early when the header or first rows are malformed
+CLAUDE_STREAMING = os.getenv('CLAUDE_STREAMING', 'true').lower() in ('1', 'true', 'yes')
+# Data rows checked before streamed rows are trusted (perform_basic_validation checks the first 5)
+STREAM_CHECK_ROWS = 5
+# Targeted repair calls per chunk before falling back to regenerating it
+REPAIR_MAX_ROUNDS = int(os.getenv('REPAIR_MAX_ROUNDS', '3'))
+
+CLAUDE_MODEL = "claude-3-7-sonnet-20250219"
+CLAUDE_MAX_TOKENS = 20000
+CLAUDE_TEMPERATURE = 0.1
+# Shortest prompt prefix the provider caches for CLAUDE_MODEL; a shorter prefix is billed in full on every call
+PROMPT_CACHE_MIN_TOKENS = 1024
+CLAUDE_SYSTEM_PROMPT = "You are a precise CSV data extractor. Output valid CSV only with exact column alignment. No explanatory text."
+CLAUDE_TOOL_SYSTEM_PROMPT = f"You are a precise data extractor. Return every item row through the {RECORD_ROWS_TOOL_NAME} tool. No explanatory text."
+
+
+class ChunkCancelled(Exception):
+    """Raised when the caller's cancelled() check turns true while a chunk is in progress."""
+
+
+def check_cancelled(cancelled):
+    if cancelled is not None and cancelled():
+        raise ChunkCancelled("Chunk cancelled")
 
 # ======================= Extraction =======================
-def download_files_from_urls(urls):
-    temp_paths = []
-    for url in urls:
-        response = requests.get(url)
-        if response.status_code == 200:
-            suffix = os.path.splitext(url)[-1]
-            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
-                tmp_file.write(response.content)
-                temp_paths.append(tmp_file.name)
-        else:
-            print(f"[ERROR] Failed to download {url}")
-    return temp_paths
-
 def extract_text_from_pdf(pdf_path):
     try:
-        reader = PdfReader(pdf_path)
-        return '\n'.join(page.extract_text() or "" for page in reader.pages)
+        return '\n'.join(extract_pdf_pages(pdf_path))
     except Exception as e:
         print(f"[PDF ERROR] Failed to extract from {pdf_path}: {e}")
         return ""
@@ -45,7 +79,7 @@ def extract_text_from_pdf(pdf_path):
 def extract_text_from_image(image_path):
     try:
         image = Image.open(image_path)
-        return pytesseract.image_to_string(image)
+        return get_ocr_backend().image_to_string(image)
     except Exception as e:
         print(f"[IMG ERROR] Failed to extract from {image_path}: {e}")
         return ""
@@ -61,105 +95,12 @@ def extract_text_from_csv(csv_path):
         print(f"[CSV ERROR] Failed to extract from {csv_path}: {e}")
         return ""
     
-def extract_text_from_excel(excel_path):
-    """Extracts content from all sheets of an Excel file and formats it as a string."""
-    try:
-        # Read the Excel file with proper error handling
-        excel_file = pd.ExcelFile(excel_path, engine='openpyxl')
-        full_text = []
-        
-        # Get sheet names safely
-        sheet_names = excel_file.sheet_names
-        print(f"[DEBUG] Found {len(sheet_names)} sheets in Excel file")
-        
-        # Loop through all sheets in the Excel file
-        for sheet_name in sheet_names:
-            try:
-                print(f"[DEBUG] Processing sheet: {sheet_name}")
-                df = pd.read_excel(excel_file, sheet_name=sheet_name, engine='openpyxl')
-                
-                # Check if the dataframe is empty
-                if df.empty:
-                    print(f"[DEBUG] Sheet '{sheet_name}' is empty, skipping")
-                    continue
-                
-                # Convert the DataFrame to string with proper handling
-                sheet_content = df.to_string(index=False, na_rep='')
-                
-                # Add sheet name as a header for context, then the content
-                full_text.append(f"Sheet: {sheet_name}\n{sheet_content}")
-                print(f"[DEBUG] Successfully processed sheet '{sheet_name}' with {len(df)} rows")
-                
-            except Exception as sheet_error:
-                print(f"[SHEET ERROR] Failed to process sheet '{sheet_name}': {sheet_error}")
-                continue
-        
-        # Close the Excel file
-        excel_file.close()
-        
-        if not full_text:
-            print("[WARNING] No data extracted from any sheets")
-            return ""
-        
-        result = "\n\n".join(full_text)
-        print(f"[DEBUG] Total extracted text length: {len(result)} characters")
-        return result
-        
-    except Exception as e:
-        print(f"[EXCEL ERROR] Failed to extract from {excel_path}: {e}")
-        print(f"[EXCEL ERROR] Error type: {type(e).__name__}")
-        return ""
-
-# Alternative extraction method using openpyxl directly
-def extract_text_from_excel_alternative(excel_path):
-    """Alternative Excel extraction using openpyxl directly for better error handling."""
-    try:
-        from openpyxl import load_workbook
-        
-        # Load workbook
-        wb = load_workbook(excel_path, read_only=True, data_only=True)
-        full_text = []
-        
-        print(f"[DEBUG] Found {len(wb.sheetnames)} sheets using openpyxl")
-        
-        for sheet_name in wb.sheetnames:
-            try:
-                ws = wb[sheet_name]
-                sheet_data = []
-                
-                # Get all rows with data
-                for row in ws.iter_rows(values_only=True):
-                    # Filter out completely empty rows
-                    if any(cell is not None and str(cell).strip() != '' for cell in row):
-                        # Convert None values to empty strings and join with tabs
-                        row_data = '\t'.join(str(cell) if cell is not None else '' for cell in row)
-                        sheet_data.append(row_data)
-                
-                if sheet_data:
-                    sheet_content = '\n'.join(sheet_data)
-                    full_text.append(f"Sheet: {sheet_name}\n{sheet_content}")
-                    print(f"[DEBUG] Processed sheet '{sheet_name}' with {len(sheet_data)} rows")
-                
-            except Exception as sheet_error:
-                print(f"[SHEET ERROR] Failed to process sheet '{sheet_name}': {sheet_error}")
-                continue
-        
-        wb.close()
-        
-        if not full_text:
-            print("[WARNING] No data extracted from any sheets")
-            return ""
-        
-        result = "\n\n".join(full_text)
-        print(f"[DEBUG] Total extracted text length: {len(result)} characters")
-        return result
-        
-    except Exception as e:
-        print(f"[EXCEL ERROR] Alternative extraction failed for {excel_path}: {e}")
-        return ""
-
 # Updated main extract_text function
-def extract_text(file_path):
+def extract_text(file_path, use_cache=True):
+    """Extract text through the content-addressed extraction cache (pass use_cache=False to bypass)."""
+    return cached_extract(file_path, extract_text_uncached, use_cache=use_cache)
+
+def extract_text_uncached(file_path):
     """Updated extract_text function with better Excel handling."""
     if file_path.lower().endswith('.pdf'):
         return extract_text_from_pdf(file_path)
@@ -168,64 +109,60 @@ def extract_text(file_path):
     elif file_path.lower().endswith('.csv'):
         return extract_text_from_csv(file_path)
     elif file_path.lower().endswith(('.xlsx', '.xls')):
-        # Try the main method first, then fallback to alternative
-        result = extract_text_from_excel(file_path)
-        if not result:
-            print("[DEBUG] Main Excel extraction failed, trying alternative method...")
-            result = extract_text_from_excel_alternative(file_path)
-        return result
+        return extract_text_from_spreadsheet(file_path)
     else:
         print(f"[SKIPPED] Unsupported file type: {file_path}")
         return ""
 
 # ======================= Enhanced Prompting =======================
-def batch_process_prompt(text_chunk, food_index, header_context=None, is_continuation=False):
-    """Enhanced prompt that includes header context for continuation chunks"""
-    
-    context_section = ""
-    if is_continuation and header_context:
-        context_section = f"""
-IMPORTANT CONTEXT FROM DOCUMENT HEADER:
-The following header information was found at the beginning of this document:
-{header_context}
-
-Use this context to understand the column structure and data format expectations.
-"""
-
-    continuation_note = ""
-    if is_continuation:
-        continuation_note = """
-NOTE: This is a continuation chunk from a larger document. The header context above shows the original column structure.
-Continue processing items in the same format as established in the first chunk.
-"""
-
-    return f"""You are a precise data extraction specialist. Parse the following food procurement text and output ONLY a valid CSV.
+def extraction_instructions(candidates_only=False, mode='csv'):
+    """Static extraction instructions. Must not vary per chunk so it stays a cacheable prompt prefix.
+
+    mode 'tool' replaces the CSV formatting rules with the record_rows tool call; the column
+    definitions and food code rules are the same in both modes.
+    """
+    if candidates_only:
+        index_instruction = "Read the CANDIDATE food codes given with each input (pre-selected for that text) carefully"
+    else:
+        index_instruction = "Read the COMPLETE food index below carefully"
+
+    if mode == 'tool':
+        task = f"return its rows by calling the {RECORD_ROWS_TOOL_NAME} tool"
+        layout = f"1. Call {RECORD_ROWS_TOOL_NAME} ONCE with one entry in rows per item line, in input order"
+        formatting = """3. VALUE RULES:
+   - price and quantity are numbers (null when not given); NO dollar signs or units.
+   - pack_size is text (null when not given); foodcode is the 6-digit code as text."""
+        row_check = "Each item has its own entry in rows"
+        output_format = f"OUTPUT FORMAT: A single {RECORD_ROWS_TOOL_NAME} call. NO other text."
+    else:
+        task = "output ONLY a valid CSV"
+        layout = f"1. Output EXACTLY these 5 headers (copy exactly): {MODEL_HEADER}"
+        formatting = """3. STRICT FORMATTING RULES:
+   - Enclose the Description in double quotes (") ONLY if it contains a comma.
+   - Use commas ONLY as the column separator.
+   - ALL DECIMAL NUMBERS: Format to exactly 1 decimal place (e.g., 12.5).
+   - NO dollar signs ($).
+   - Empty cells must be blank (e.g., a line should look like `item,1.0,,,`)."""
+        row_check = "Each output row must have exactly 5 columns"
+        output_format = "OUTPUT FORMAT: Start with header row, then data rows. NO other text."
 
-{context_section}
+    return f"""You are a precise data extraction specialist. Parse the food procurement text in the user message and {task}.
 
 CRITICAL REQUIREMENTS:
-1. Output EXACTLY these 8 headers (copy exactly): Description,Price,Quantity,Pack Size,Pack,Size,UOM,Foodcode
+{layout}
 
-2. COLUMN DEFINITIONS (follow precisely and MAKE SURE ALL 8 COLUMNS ARE HERE):
+2. COLUMN DEFINITIONS (follow precisely and MAKE SURE ALL 5 COLUMNS ARE HERE):
    - Description: Food item name (no quotes, clean text)
    - Price: Price per unit of quantity purchased (numeric, 1 decimal place)
    - Quantity: Number of units purchased (whole number)
-   - Pack Size: Original pack size text (e.g., "12/16OZ", "6/2LB")
-   - Pack: First number from Pack Size (whole number, e.g., 12 from "12/16OZ")
-   - Size: Second number from Pack Size (whole number, e.g., 16 from "12/16OZ")
-   - UOM: Unit of measure (OZ, LB, CT, EA, etc.)
+   - Pack Size: Pack size text copied as written (e.g., "12/16OZ", "6/#10", "4/5 LB AVG", "200CT").
+     If pack, size and unit are in separate columns, write them as pack/size unit (e.g., "12/16 OZ").
    - Foodcode: 6-digit code from food index (EXACT match required)
 
-3. STRICT FORMATTING RULES:
-   - Enclose the Description in double quotes (") ONLY if it contains a comma.
-   - Use commas ONLY as the column separator.
-   - ALL DECIMAL NUMBERS: Format to exactly 1 decimal place (e.g., 12.5).
-   - NO dollar signs ($).
-   - Empty cells must be blank (e.g., a line should look like `item,1.0,,,,,,,,,`).
-   - If Pack Size has only one number, treat it as the Size (e.g., for "16OZ", Pack=1 and Size=16).
+{formatting}
 
 4. FOODCODE MATCHING REQUIREMENTS:
-   - Read the COMPLETE food index below carefully
+   - {index_instruction}
    - Match Description to the MOST SPECIFIC food category available
    - Do NOT default to generic codes like 110024 (Dry Beans)
    - Examples of proper matching:
@@ -238,36 +175,146 @@ CRITICAL REQUIREMENTS:
 5. QUALITY CONTROLS:
    - Include EVERY single item line from input
    - Do not summarize, group, or skip similar items
-   - Each output row must have exactly 8 columns
+   - {row_check}
    - Verify calculations are correct
 
-{continuation_note}
-
-COMPLETE FOOD INDEX FOR MATCHING:
-{food_index}
-
-INPUT TEXT TO PROCESS:
-{text_chunk}
+{output_format}"""
+
+def build_extraction_request(text_chunk, food_index, header_context=None, is_continuation=False, candidates_only=False,
+                             mode='csv'):
+    """Build (system_blocks, user_prompt) for one chunk.
+
+    The system blocks (system prompt, instructions and, in full-index mode, the food
+    index) are byte-identical for every chunk and end in a cache_control breakpoint,
+    so chunks after the first read them from the provider's prompt cache. Everything
+    that varies per chunk goes in the user message after that prefix. With candidates_only
+    the prefix is the instructions alone, shorter than PROMPT_CACHE_MIN_TOKENS, so it is
+    not cached: only full-index mode reads the prefix from the cache.
+    """
+    system_prompt = CLAUDE_TOOL_SYSTEM_PROMPT if mode == 'tool' else CLAUDE_SYSTEM_PROMPT
+    system_blocks = [
+        {"type": "text", "text": f"{system_prompt}\n\n{extraction_instructions(candidates_only, mode)}"},
+    ]
+    if not candidates_only:
+        system_blocks.append({"type": "text", "text": f"COMPLETE FOOD INDEX FOR MATCHING:\n{food_index}"})
+    system_blocks[-1]["cache_control"] = {"type": "ephemeral"}
 
-OUTPUT FORMAT: Start with header row, then data rows. NO other text."""
+    sections = []
+    if is_continuation and header_context:
+        sections.append(f"""IMPORTANT CONTEXT FROM DOCUMENT HEADER:
+The following header information was found at the beginning of this document:
+{header_context}
 
-def call_claude_batch_process(text_chunk, food_index, header_context=None, is_continuation=False):
-    """Enhanced Claude API call with dynamic header fixing"""
+Use this context to understand the column structure and data format expectations.""")
+    if is_continuation:
+        sections.append("""NOTE: This is a continuation chunk from a larger document. The header context above shows the original column structure.
+Continue processing items in the same format as established in the first chunk.""")
+    if candidates_only:
+        sections.append(f"CANDIDATE FOOD CODES FOR MATCHING:\n{food_index}")
+    sections.append(f"INPUT TEXT TO PROCESS:\n{text_chunk}")
+
+    return system_blocks, "\n\n".join(sections)
+
+def system_blocks_text(system_blocks):
+    return "\n\n".join(block["text"] for block in system_blocks)
+
+_short_prefix_logged = False
+
+def log_short_prefix(system_blocks):
+    """Log once when the cacheable prefix is too short for the provider to cache"""
+    global _short_prefix_logged
+    prefix_tokens = estimate_tokens(system_blocks_text(system_blocks))
+    if prefix_tokens < PROMPT_CACHE_MIN_TOKENS and not _short_prefix_logged:
+        _short_prefix_logged = True
+        print(f"[PROMPT CACHE] Prefix is ~{prefix_tokens} tokens, below the {PROMPT_CACHE_MIN_TOKENS}-token minimum: "
+              f"every chunk pays full input price for it (FOOD_INDEX_MODE={FOOD_INDEX_MODE})")
+
+def prepare_claude_request(text_chunk, food_index, header_context=None, is_continuation=False):
+    """Messages API parameters and response-cache key for one chunk
+
+    In EXTRACTION_MODE 'tool' the request forces the record_rows tool, so rows come back as
+    typed objects instead of CSV text (see structured_output.response_model_csv).
+    """
+    candidates_only = False
+    if FOOD_INDEX_MODE == 'candidates':
+        try:
+            food_index = food_code_candidates_text(text_chunk)
+            candidates_only = True
+        except Exception as e:
+            print(f"[FOOD INDEX ERROR] Candidate retrieval failed, sending full index: {e}")
+
+    system_blocks, user_prompt = build_extraction_request(text_chunk, food_index, header_context, is_continuation,
+                                                          candidates_only, EXTRACTION_MODE)
+    log_short_prefix(system_blocks)
+    params = {
+        "model": CLAUDE_MODEL,
+        "max_tokens": CLAUDE_MAX_TOKENS,
+        "temperature": CLAUDE_TEMPERATURE,
+        "system": system_blocks,
+        "messages": [{"role": "user", "content": user_prompt}],
+    }
+    if EXTRACTION_MODE == 'tool':
+        params["tools"] = [RECORD_ROWS_TOOL]
+        params["tool_choice"] = RECORD_ROWS_TOOL_CHOICE
+    cache_key = response_cache_key(CLAUDE_MODEL, CLAUDE_TEMPERATURE, system_blocks_text(system_blocks), user_prompt, CLAUDE_MAX_TOKENS)
+    return params, cache_key
+
+def call_claude_batch_process(text_chunk, food_index, header_context=None, is_continuation=False, use_cache=True,
+                              row_consumer=None, cancelled=None):
+    """Enhanced Claude API call with dynamic header fixing and a persistent response cache
+
+    row_consumer, if given, receives each data row (a list of 8 strings) as it streams in.
+    It receives None when a retry starts, meaning rows from the previous attempt are void.
+    cancelled, if given, is checked before each call and while rows stream in; once it
+    returns True the work stops with ChunkCancelled (e.g. a queue worker lost its lease).
+    Output that fails validation or stops at max_tokens is repaired row by row
+    (repair_chunk_output) before the whole chunk is regenerated. Without streaming (and in
+    EXTRACTION_MODE 'tool', which does not stream) rows are forwarded once the call is complete.
+    """
     max_retries = 2
+
+    params, cache_key = prepare_claude_request(text_chunk, food_index, header_context, is_continuation)
+    prompt = params["messages"][0]["content"]
+    use_cache = use_cache and response_cache.enabled
+    if use_cache:
+        cached_output = response_cache.get(cache_key)
+        if cached_output is not None:
+            print(f"[CACHE] LLM response hit ({cache_key[:12]})")
+            forward_csv_rows(cached_output, row_consumer)
+            return cached_output
     
     for attempt in range(max_retries + 1):
         try:
-            prompt = batch_process_prompt(text_chunk, food_index, header_context, is_continuation)
+            check_cancelled(cancelled)
+            request_params = {**params, "messages": [{"role": "user", "content": prompt}]}
+            if attempt > 0 and row_consumer is not None:
+                row_consumer(None)
             
-            response = client.messages.create(
-                model="claude-3-7-sonnet-20250219",
-                max_tokens=20000,
-                temperature=0.1,
-                system="You are a precise CSV data extractor. Output valid CSV only with exact column alignment. No explanatory text.",
-                messages=[{"role": "user", "content": prompt}]
-            )
+            structured = "tools" in request_params
+            if CLAUDE_STREAMING and not structured:
+                stream_validator = StreamingCsvValidator(row_consumer, cancelled=cancelled)
+                response = get_llm_engine().stream_message(request_params, stream_validator.feed)
+                stream_validator.close()
+            else:
+                stream_validator = None
+                response = get_llm_engine().create_message(request_params)
+            llm_usage.record(response.usage)
+            check_cancelled(cancelled)
             
-            raw_output = response.content[0].text.strip()
+            raw_output = response_model_csv(response)
+            # A cut-off call may end mid-row in either mode: CSV text stops mid-line, tool input mid-object
+            truncated = getattr(response, 'stop_reason', None) == 'max_tokens'
+            if stream_validator is None and row_consumer is not None:
+                # Not streamed: forward the well-formed rows now; repair forwards the ones it adds
+                for _line, values in parse_rows(raw_output, truncated)[0]:
+                    row_consumer(record_row(values))
+
+            if stream_validator is not None and stream_validator.aborted:
+                print(f"[STREAM] Aborted attempt {attempt + 1} after {len(stream_validator.lines)} lines: {stream_validator.errors}")
+                if attempt < max_retries:
+                    continue
+                # Same best-effort fallback as a last attempt that fails validation
+                return expand_model_output(raw_output)
 
             print("----- RAW CLAUDE OUTPUT (BEFORE FIXING) -----")
             print(raw_output)
@@ -281,15 +328,24 @@ def call_claude_batch_process(text_chunk, food_index, header_context=None, is_co
                     cols_count = len(line.split(','))
                     print(f"  Line {i+1}: {cols_count} cols -> {line[:120]}{'...' if len(line) > 120 else ''}")
             
-            # Use dynamic validation with auto-fix
-            validation_result = validate_csv_output(raw_output, text_chunk)
+            if truncated:
+                print(f"[WARNING] Output hit max_tokens ({CLAUDE_MAX_TOKENS}) on attempt {attempt + 1}")
+                validated_output = None
+                validation_result = validate_csv_output(raw_output, text_chunk)
+            else:
+                # Use dynamic validation with auto-fix
+                validated_output, validation_result = accept_claude_output(raw_output, text_chunk)
             
-            if validation_result['is_valid']:
-                if validation_result.get('auto_fixed'):
-                    print(f"[SUCCESS] Auto-fix applied: {validation_result.get('fix_description', 'Unknown fix')}")
-                    return validation_result['fixed_csv']
-                else:
-                    return raw_output
+            if validated_output is None:
+                # Keep the rows that passed and re-request only the missing or malformed ones
+                validated_output = repair_chunk_output(raw_output, truncated, text_chunk, food_index,
+                                                       header_context, row_consumer, cancelled)
+
+            if validated_output is not None:
+                # Only outputs that passed validation are cached
+                if use_cache:
+                    response_cache.put(cache_key, CLAUDE_MODEL, validated_output)
+                return validated_output
             else:
                 print(f"[VALIDATION FAILED - Attempt {attempt + 1}]")
                 
@@ -305,13 +361,16 @@ CRITICAL FIX REQUIRED - COLUMN COUNT ISSUES DETECTED:
 
 Fix these issues and try again. Ensure EXACT column alignment."""
                     
-                    prompt += retry_instruction
+                    prompt = params["messages"][0]["content"] + retry_instruction
                     continue
                 else:
                     print(f"[ERROR] All retry attempts failed.")
                     print(dynamic_error_msg)
-                    return raw_output
+                    # Best-effort rows, still in the chunk result layout (RECORD_COLUMNS)
+                    return expand_model_output(raw_output)
                     
+        except ChunkCancelled:
+            raise
         except Exception as e:
             print(f"Claude API error (attempt {attempt + 1}): {e}")
             if attempt == max_retries:
@@ -319,9 +378,200 @@ Fix these issues and try again. Ensure EXACT column alignment."""
             
     return ""
 
+# ======================= Row Repair =======================
+REPAIR_NOTE = """
+
+NOTE: The other rows of this document were already extracted. The input above lists only the item lines still missing.
+Output the header row and one row for each of these items only."""
+
+def request_missing_rows(source_excerpt, food_index, header_context=None):
+    """One repair call for a few source lines. Returns (raw_output, truncated).
+
+    The system blocks are unchanged, so the call reads the instructions and food index
+    from the prompt cache and pays only for the excerpt and its rows.
+    """
+    params, _ = prepare_claude_request(source_excerpt, food_index, header_context, is_continuation=True)
+    params["messages"][0]["content"] += REPAIR_NOTE
+    response = get_llm_engine().create_message(params)
+    llm_usage.record(response.usage, label="repair")
+    truncated = getattr(response, 'stop_reason', None) == 'max_tokens'
+    return response_model_csv(response), truncated
+
+def repair_chunk_output(raw_output, truncated, text_chunk, food_index, header_context=None, row_consumer=None,
+                        cancelled=None):
+    """Keep well-formed rows and re-request only the source item lines they do not cover.
+
+    Rows are aligned to the chunk's item lines by description words; malformed rows, a
+    max_tokens cut-off tail and skipped items all show up as uncovered lines. Each round
+    asks for those lines alone (a continuation after a truncation is just the uncovered
+    tail). In GROUNDING_MODE 'repair', rows whose values are not in the chunk text are
+    dropped too, so their lines are asked for again; the answers are kept either way.
+    Returns the merged CSV in source order if it validates, else None.
+    """
+    source = SourceIndex(text_chunk)
+    if not source.item_lines:
+        return None
+
+    rows, bad_count = parse_rows(raw_output, truncated)
+    if GROUNDING_MODE == 'repair':
+        ungrounded = {line for line, _reasons in SourceGrounding(text_chunk).ungrounded(rows)}
+        bad_count += len(ungrounded)
+        rows = [(line, values) for line, values in rows if line not in ungrounded]
+    aligned = source.align(rows)
+    seen = {row_key(values) for _line, values in rows}
+    for round_number in range(REPAIR_MAX_ROUNDS):
+        missing = source.missing({i for i in aligned if i is not None})
+        if not missing:
+            break
+        check_cancelled(cancelled)
+        print(f"[REPAIR] Round {round_number + 1}: keeping {len(rows)} rows ({bad_count} malformed dropped), "
+              f"re-requesting {len(missing)} of {len(source.item_lines)} item lines")
+        try:
+            repair_output, repair_truncated = request_missing_rows(source.excerpt(missing), food_index, header_context)
+        except Exception as e:
+            print(f"[REPAIR] Request failed: {e}")
+            return None
+        new_rows, bad_count = parse_rows(repair_output, repair_truncated)
+        new_rows = [(line, values) for line, values in new_rows if row_key(values) not in seen]
+        if not new_rows:
+            break
+        for _line, values in new_rows:
+            seen.add(row_key(values))
+            if row_consumer is not None:
+                row_consumer(record_row(values))
+        rows += new_rows
+        aligned += source.align(new_rows, missing)
+
+    combined = '\n'.join([MODEL_HEADER] + order_rows(rows, aligned))
+    validated_output, validation_result = accept_claude_output(combined, text_chunk, reask_ungrounded=False)
+    if validated_output is None:
+        print(f"[REPAIR] Merged output still fails validation: {validation_result.get('errors')}")
+    return validated_output
+
 # ======================= Validation Functions =======================
-def perform_basic_validation(csv_output, original_text):
-    """Validate CSV output quality and detect common issues with debug output"""
+def split_cells(line):
+    """Cells of one CSV line; a quoted Description with commas is one cell"""
+    try:
+        return next(csv.reader([line]))
+    except (csv.Error, StopIteration):
+        return line.split(',')
+
+def column_errors(csv_output):
+    """Column-count errors perform_basic_validation reports for the header and first data rows"""
+    errors = perform_basic_validation(csv_output, "")['errors']
+    return [error for error in errors if 'columns' in error.lower()]
+
+class StreamingCsvValidator:
+    """Checks streamed CSV line by line and forwards data rows to row_consumer.
+
+    The header and first STREAM_CHECK_ROWS data rows get the same column checks (and header
+    auto-fix) as validate_csv_output. If they fail, feed() returns False so the stream is
+    aborted before the rest of the completion is generated.
+    """
+
+    def __init__(self, row_consumer=None, check_rows=STREAM_CHECK_ROWS, cancelled=None):
+        self.row_consumer = row_consumer
+        self.cancelled = cancelled
+        self.check_rows = check_rows
+        self.buffer = ""
+        self.lines = []
+        self.checked = False
+        self.aborted = False
+        self.errors = []
+        self.rows_forwarded = 0
+
+    def feed(self, text):
+        if self.aborted:
+            return False
+        if self.cancelled is not None and self.cancelled():
+            self.aborted = True
+            self.errors = ['cancelled']
+            return False
+        self.buffer += text
+        *complete_lines, self.buffer = self.buffer.split('\n')
+        for line in complete_lines:
+            self._add_line(line)
+        return not self.aborted
+
+    def close(self):
+        """Flush the last line once the stream has ended"""
+        if self.aborted:
+            return
+        if self.buffer.strip():
+            self._add_line(self.buffer)
+        self.buffer = ""
+        if not self.checked and self.lines:
+            self._check_prefix()
+
+    def _add_line(self, line):
+        if not line.strip() or self.aborted:
+            return
+        self.lines.append(line)
+        if self.checked:
+            self._forward(line)
+        elif len(self.lines) > self.check_rows:
+            self._check_prefix()
+
+    def _check_prefix(self):
+        self.checked = True
+        prefix = '\n'.join(self.lines)
+        errors = column_errors(prefix)
+        if errors and column_errors(fix_header_column_mismatch(prefix)[0]):
+            self.aborted = True
+            self.errors = errors
+            return
+        for line in self.lines[1:]:
+            self._forward(line)
+
+    def _forward(self, line):
+        if self.row_consumer is None:
+            return
+        values = next(csv.reader([line]))
+        if len(values) == len(MODEL_COLUMNS):
+            self.row_consumer(record_row(values))
+            self.rows_forwarded += 1
+
+def forward_csv_rows(csv_output, row_consumer):
+    """Send the data rows of a complete chunk result (e.g. a cache hit) to row_consumer"""
+    if row_consumer is None or not csv_output:
+        return
+    for values in csv.reader(csv_output.strip().split('\n')[1:]):
+        if len(values) == len(RECORD_COLUMNS):
+            row_consumer(values)
+
+def expand_model_output(model_csv):
+    """Chunk result in RECORD_COLUMNS from validated model output; Pack, Size and UOM come from pack_size"""
+    records, confidence = records_from_model_csv([model_csv])
+    uncertain = records.loc[(confidence < PACK_SIZE_MIN_CONFIDENCE) & records['Pack Size'].notna(), 'Pack Size']
+    if len(uncertain):
+        print(f"[PACK SIZE] Low-confidence parse for {len(uncertain)}/{len(records)} rows, e.g. {uncertain.unique()[:5].tolist()}")
+    return records_to_chunk_csv(records)
+
+def accept_claude_output(raw_output, text_chunk, reask_ungrounded=True):
+    """Validate (and auto-fix) one chunk's model output. Returns (chunk result CSV or None, validation_result).
+
+    Rows are also checked against the chunk text (grounding.ungrounded_rows). Failures are
+    logged; in GROUNDING_MODE 'repair' they reject the output so the caller re-asks those
+    rows, unless reask_ungrounded is False (output that was already repaired).
+    """
+    validation_result = validate_csv_output(raw_output, text_chunk)
+    if not validation_result['is_valid']:
+        return None, validation_result
+    if validation_result.get('auto_fixed'):
+        print(f"[SUCCESS] Auto-fix applied: {validation_result.get('fix_description', 'Unknown fix')}")
+    model_csv = validation_result['fixed_csv'] if validation_result.get('auto_fixed') else raw_output
+    ungrounded = ungrounded_rows(model_csv, text_chunk)
+    if ungrounded and GROUNDING_MODE == 'repair' and reask_ungrounded:
+        validation_result = {**validation_result, 'is_valid': False,
+                             'errors': [f'{len(ungrounded)} rows not found in the source text']}
+        return None, validation_result
+    return expand_model_output(model_csv), validation_result
+
+def perform_basic_validation(csv_output, original_text, columns=MODEL_COLUMNS):
+    """Validate CSV output quality and detect common issues with debug output
+
+    columns is the layout expected: the model's output by default, RECORD_COLUMNS for chunk results.
+    """
     errors = []
     
     if not csv_output.strip():
@@ -334,8 +584,8 @@ def perform_basic_validation(csv_output, original_text):
         errors.append('Output too short - missing data rows')
     
     # Check column count consistency
-    expected_columns = 8
-    header_cols = len(lines[0].split(',')) if lines else 0
+    expected_columns = len(columns)
+    header_cols = len(split_cells(lines[0])) if lines else 0
     
     # DEBUG: Print first 5 rows when validation fails
     if header_cols != expected_columns:
@@ -344,11 +594,11 @@ def perform_basic_validation(csv_output, original_text):
         print(f"[DEBUG] Expected: {expected_columns} columns, Got: {header_cols} columns")
         print(f"[DEBUG] First 5 rows of output:")
         for i, line in enumerate(lines[:5]):
-            cols = line.split(',')
+            cols = split_cells(line)
             print(f"  Row {i+1}: {len(cols)} columns -> {line[:100]}{'...' if len(line) > 100 else ''}")
         print(f"[DEBUG] Header analysis:")
         if lines:
-            header_parts = lines[0].split(',')
+            header_parts = split_cells(lines[0])
             for j, part in enumerate(header_parts):
                 print(f"  Column {j+1}: '{part}'")
         print("[DEBUG] End of debug output\n")
@@ -357,7 +607,7 @@ def perform_basic_validation(csv_output, original_text):
     column_issues = []
     for i, line in enumerate(lines[1:6]):  # Check first 5 data rows
         if line.strip():
-            cols = line.split(',')
+            cols = split_cells(line)
             if len(cols) != expected_columns:
                 column_issues.append(f'Row {i+2} has {len(cols)} columns, expected {expected_columns}')
     
@@ -366,7 +616,7 @@ def perform_basic_validation(csv_output, original_text):
         print(f"\n[DEBUG] DATA ROW COLUMN ISSUES:")
         for i, line in enumerate(lines[1:6]):
             if line.strip():
-                cols = line.split(',')
+                cols = split_cells(line)
                 if len(cols) != expected_columns:
                     print(f"  Data Row {i+2}: {len(cols)} columns -> {line[:100]}{'...' if len(line) > 100 else ''}")
                     # Show each column for problematic rows
@@ -395,11 +645,11 @@ def perform_basic_validation(csv_output, original_text):
         }
     }
 
-def validate_csv_output(csv_output, original_text):
+def validate_csv_output(csv_output, original_text, columns=MODEL_COLUMNS):
     """Enhanced validation with dynamic auto-fixing"""
     
     # First try normal validation
-    initial_validation = perform_basic_validation(csv_output, original_text)
+    initial_validation = perform_basic_validation(csv_output, original_text, columns)
     
     # If validation fails, try dynamic auto-fix
     if not initial_validation['is_valid']:
@@ -410,10 +660,10 @@ def validate_csv_output(csv_output, original_text):
             print(f"[DEBUG] Attempting dynamic auto-fix for column issues...")
             print(f"[DEBUG] Issues detected: {column_errors}")
             
-            fixed_csv, fix_description = fix_header_column_mismatch(csv_output)
+            fixed_csv, fix_description = fix_header_column_mismatch(csv_output, columns)
             
-            # Re-validate the fixed version
-            fixed_validation = validate_csv_output(fixed_csv, original_text)
+            # Re-validate the fixed version once; a fix that does not hold is left to row repair
+            fixed_validation = perform_basic_validation(fixed_csv, original_text, columns)
             
             if fixed_validation['is_valid']:
                 print(f"[DEBUG] Dynamic auto-fix successful! {fix_description}")
@@ -455,7 +705,7 @@ Your header has {current_cols} columns but data rows need {expected_cols} column
 You are missing {missing_count} column(s) from your header row.
 
 REQUIRED: Ensure your header has EXACTLY {expected_cols} columns:
-Description,Price,Quantity,Pack Size,Pack,Size,UOM,Total Price,Price Per Pack,Price Per Pack Size,Price Per Pound,Foodcode
+{MODEL_HEADER}
 
 Your current header appears to be missing column(s). Check which ones are missing and add them.""")
                 
@@ -496,74 +746,10 @@ def estimate_item_count(text):
     return max(potential_items, len(lines) // 3)  # Conservative estimate
 
 def post_process_csv(raw_csv):
-    """Clean up common CSV formatting issues from the initial 8-column AI output."""
+    """Clean up common CSV formatting issues in merged chunk results (see records.clean_records)."""
     if not raw_csv.strip():
         return ""
-    
-    lines = raw_csv.strip().split('\n')
-    cleaned_lines = []
-    
-    # Process each line of the raw CSV output
-    for i, line in enumerate(lines):
-        if not line.strip():
-            continue
-            
-        # Fix common formatting issues
-        line = line.replace('$', '')
-        line = re.sub(r'""', '', line)
-        line = re.sub(r',\s*,', ',,', line)
-        
-        cols = line.split(',')
-        
-        # If a line has more than 8 columns (e.g., a comma in the description)
-        if len(cols) > 8:
-            # The Description is everything EXCEPT the last 7 data columns.
-            num_data_columns = 7 
-            description = ','.join(cols[:-num_data_columns])
-            data_cols = cols[-num_data_columns:]
-            cols = [description] + data_cols
-
-        # Ensure we always have exactly 8 columns, padding with empty strings if needed
-        while len(cols) < 8:
-            cols.append('')
-
-        # --- Process data rows (skip the header) ---
-        if i > 0:
-            # Clean Description (column 0) by removing quotes
-            if len(cols) > 0:
-                cols[0] = cols[0].strip().replace('"', '').replace("'", "")
-
-            # Format Price (column 1) to 1 decimal place
-            if len(cols) > 1 and cols[1].strip():
-                try:
-                    cols[1] = f"{float(cols[1].strip()):.1f}"
-                except (ValueError, TypeError):
-                    pass # Keep original value if conversion fails
-            
-            # Ensure Quantity, Pack, and Size (columns 2, 4, 5) are integers
-            for int_col_idx in [2, 4, 5]:
-                if int_col_idx < len(cols) and cols[int_col_idx].strip():
-                    try:
-                        # Convert to float first, then to int, to handle cases like "10.0"
-                        value = float(cols[int_col_idx].strip())
-                        cols[int_col_idx] = str(int(value))
-                    except (ValueError, TypeError):
-                        pass # Keep original value if conversion fails
-            
-            # Standardize UOM (column 6)
-            if len(cols) > 6 and cols[6].strip():
-                uom = cols[6].strip().upper()
-                uom_mapping = {
-                    'OUNCE': 'OZ', 'OUNCES': 'OZ', 'POUND': 'LB', 'POUNDS': 'LB',
-                    'COUNT': 'CT', 'EACH': 'EA', 'GALLON': 'GAL', 'LITER': 'L'
-                }
-                cols[6] = uom_mapping.get(uom, uom)
-
-        # Append the cleaned, 8-column row to our list
-        cleaned_lines.append(','.join(cols[:8]))
-    
-    # Join all processed lines back into a single CSV string
-    return '\n'.join(cleaned_lines)
+    return records_to_chunk_csv(clean_records(records_from_csv([raw_csv])))
 
 # ======================= Chunking for Large Documents =======================
 def extract_header_context(text):
@@ -589,128 +775,158 @@ def extract_header_context(text):
     
     return '\n'.join(header_context[:10])
 
-def smart_chunk_text(text, max_chunk_size=8000):
-    """Split large text into processable chunks while preserving item integrity and extracting header context"""
-    lines = text.split('\n')
-    chunks = []
-    current_chunk = []
-    current_size = 0
-    
-    header_context = extract_header_context(text)
-    
-    for line in lines:
-        line_size = len(line)
-        if current_size + line_size > max_chunk_size and current_chunk:
-            chunks.append('\n'.join(current_chunk))
-            current_chunk = [line]
-            current_size = line_size
-        else:
-            current_chunk.append(line)
-            current_size += line_size
-    
-    if current_chunk:
-        chunks.append('\n'.join(current_chunk))
-    
-    return chunks, header_context
+def smart_chunk_text(text):
+    """Split text into token-budgeted chunks at item-row boundaries (see chunker.chunk_document)"""
+    plan = chunk_document(text)
+    print(f"[CHUNKER] {plan.summary()}")
+    return plan.chunks, extract_header_context(text)
+
+def plan_document_chunks(text):
+    """(chunk, header_context, is_continuation) for each LLM call one document needs"""
+    chunks, header_context = smart_chunk_text(text)
+    if len(chunks) == 1:
+        return [(chunks[0], None, False)]
+    return [(chunk, header_context, i > 0) for i, chunk in enumerate(chunks)]
 
 # ======================= Processing Functions =======================
-def process_large_document_unified(file_path, food_index, max_chunk_size=8000):
-    """Unified large document processing with header context preservation and dynamic fixing"""
-    full_text = extract_text(file_path)
-    
-    if len(full_text) <= max_chunk_size:
-        return call_claude_batch_process(full_text, food_index)
-    
-    chunks, header_context = smart_chunk_text(full_text, max_chunk_size)
-    print(f"[INFO] Split large document into {len(chunks)} chunks")
-    print(f"[INFO] Extracted header context: {len(header_context)} characters")
-    
+def merge_chunk_outputs(csv_outputs):
+    """Join per-chunk CSV in order, keeping only the first header row"""
     all_csv_parts = []
     header_saved = False
+    for csv_output in csv_outputs:
+        if not csv_output or not csv_output.strip():
+            continue
+        lines = csv_output.strip().split('\n')
+        if not header_saved:
+            all_csv_parts.append(csv_output.strip())
+            header_saved = True
+        elif len(lines) > 1:
+            all_csv_parts.append('\n'.join(lines[1:]))
+    return '\n'.join(all_csv_parts)
+
+def process_chunks_concurrently(planned_chunks, food_index, max_workers=CHUNK_MAX_WORKERS, progress=NULL_PROGRESS, source=None):
+    """Run every planned chunk through Claude concurrently; outputs come back in chunk order.
+
+    A chunk that comes back empty is retried on its own, up to CHUNK_RETRIES times.
+    Progress is reported against source (the file path).
+    """
+    progress.chunks_planned(source, len(planned_chunks))
+
+    def run_chunk(i):
+        chunk, header_context, is_continuation = planned_chunks[i]
+        row_consumer = lambda values: progress.row(source, i, values)
+        csv_output = ""
+        for attempt in range(CHUNK_RETRIES + 1):
+            if attempt > 0:
+                row_consumer(None)
+            csv_output = call_claude_batch_process(chunk, food_index, header_context, is_continuation,
+                                                   row_consumer=row_consumer)
+            if csv_output.strip():
+                break
+            print(f"[WARNING] Chunk {i+1}/{len(planned_chunks)} returned no rows (attempt {attempt + 1})")
+        progress.chunk_finished(source, i, csv_output)
+        return csv_output
+
+    if len(planned_chunks) == 1:
+        return [run_chunk(0)]
+
+    outputs = [""] * len(planned_chunks)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(planned_chunks), max_workers)) as executor:
+        futures = {executor.submit(run_chunk, i): i for i in range(len(planned_chunks))}
+        for future in concurrent.futures.as_completed(futures):
+            i = futures[future]
+            try:
+                outputs[i] = future.result()
+                print(f"[INFO] Finished chunk {i+1}/{len(planned_chunks)}")
+            except Exception as e:
+                print(f"[ERROR] Chunk {i+1}/{len(planned_chunks)} failed: {e}")
+    return outputs
+
+def process_large_document_unified(file_path, food_index, progress=NULL_PROGRESS):
+    """Unified large document processing with header context preservation and dynamic fixing"""
+    full_text = extract_text(file_path)
     
-    for i, chunk in enumerate(chunks):
-        print(f"[INFO] Processing chunk {i+1}/{len(chunks)}")
-        
-        is_continuation = i > 0
-        csv_output = call_claude_batch_process(
-            chunk, food_index, header_context, is_continuation
-        )
-        
-        if csv_output.strip():
-            lines = csv_output.strip().split('\n')
-            
-            if not header_saved:
-                all_csv_parts.append(csv_output)
-                header_saved = True
-            else:
-                if len(lines) > 1:
-                    all_csv_parts.append('\n'.join(lines[1:]))
+    planned_chunks = plan_document_chunks(full_text)
+    if len(planned_chunks) > 1:
+        print(f"[INFO] Split large document into {len(planned_chunks)} chunks")
+        print(f"[INFO] Extracted header context: {len(planned_chunks[0][1] or '')} characters")
     
-    return '\n'.join(all_csv_parts)
+    return merge_chunk_outputs(process_chunks_concurrently(planned_chunks, food_index, progress=progress, source=file_path))
 
-def process_single_file_unified(file_path, food_index):
+def process_single_file_unified(file_path, food_index, progress=NULL_PROGRESS):
     """Unified single file processing with all features"""
     print(f"[INFO] Processing {file_path}")
-    
-    text = extract_text(file_path)
-    
-    if len(text) > 10000:
-        csv_output = process_large_document_unified(file_path, food_index)
-    else:
-        csv_output = call_claude_batch_process(text, food_index)
-    
-    return csv_output if csv_output.strip() else ""
+    progress.file_started(file_path)
+
+    # Regular bid tabulations are mapped locally without an LLM call
+    fast_path_csv = try_bid_tabulation_fast_path(file_path)
+    if fast_path_csv:
+        progress.chunks_planned(file_path, 1)
+        progress.chunk_finished(file_path, 0, fast_path_csv)
+        progress.file_finished(file_path, fast_path_csv)
+        return fast_path_csv
+    
+    csv_output = process_large_document_unified(file_path, food_index, progress=progress)
+    
+    csv_output = csv_output if csv_output.strip() else ""
+    progress.file_finished(file_path, csv_output)
+    return csv_output
+
+def process_batch_unified(file_paths, food_index, progress=NULL_PROGRESS):
+    """Unified batch processing with all features
+
+    The batch's files are sent as one text, so chunk progress is reported against the first file.
+    """
+    for path in file_paths:
+        progress.file_started(path)
+    fast_path_parts = []
+    llm_paths = []
+    for path in file_paths:
+        fast_path_csv = try_bid_tabulation_fast_path(path)
+        if fast_path_csv:
+            fast_path_parts.append(fast_path_csv)
+        else:
+            llm_paths.append(path)
 
-def process_batch_unified(file_paths, food_index):
-    """Unified batch processing with all features"""
-    full_text = "\n\n".join(extract_text(path) for path in file_paths)
+    if not llm_paths:
+        csv_output = post_process_csv(combine_csv_chunks_safely(fast_path_parts))
+        for path in file_paths:
+            progress.file_finished(path, csv_output)
+        return csv_output
+
+    full_text = "\n\n".join(extract_text(path) for path in llm_paths)
     
     if len(full_text.strip()) < 100:
-        print(f"[WARNING] Very short text extracted from {file_paths}")
-        return ""
+        print(f"[WARNING] Very short text extracted from {llm_paths}")
+        csv_output = post_process_csv(combine_csv_chunks_safely(fast_path_parts))
+        for path in file_paths:
+            progress.file_finished(path, csv_output)
+        return csv_output
     
-    if len(full_text) > 10000:
-        chunks, header_context = smart_chunk_text(full_text)
-        
-        all_csv_parts = []
-        header_saved = False
-        
-        for i, chunk in enumerate(chunks):
-            is_continuation = i > 0
-            raw_csv = call_claude_batch_process(
-                chunk, food_index, header_context, is_continuation
-            )
-            
-            if raw_csv.strip():
-                lines = raw_csv.strip().split('\n')
-                
-                if not header_saved:
-                    all_csv_parts.append(raw_csv)
-                    header_saved = True
-                else:
-                    if len(lines) > 1:
-                        all_csv_parts.append('\n'.join(lines[1:]))
-        
-        combined_csv = '\n'.join(all_csv_parts)
-    else:
-        combined_csv = call_claude_batch_process(full_text, food_index)
+    combined_csv = merge_chunk_outputs(process_chunks_concurrently(plan_document_chunks(full_text), food_index,
+                                                                   progress=progress, source=file_paths[0]))
+
+    if fast_path_parts:
+        combined_csv = combine_csv_chunks_safely(fast_path_parts + [combined_csv])
     
     if not combined_csv.strip():
         print("[ERROR] Empty output from Claude for:", file_paths)
+        for path in file_paths:
+            progress.file_finished(path, "")
         return ""
     
     cleaned_csv = post_process_csv(combined_csv)
     
     if cleaned_csv:
-        final_csv, fix_description = fix_header_column_mismatch(cleaned_csv)
-        if fix_description != "No fix needed - header and data both have 8 columns":
-            print(f"[DEBUG] Applied header fix: {fix_description}")
-            cleaned_csv = final_csv
+        # fix_header_column_mismatch logs any fix it makes
+        cleaned_csv, _fix_description = fix_header_column_mismatch(cleaned_csv, RECORD_COLUMNS)
     
-    final_validation = validate_csv_output(cleaned_csv, full_text)
+    final_validation = validate_csv_output(cleaned_csv, full_text, RECORD_COLUMNS)
     if not final_validation['is_valid']:
         print(f"[WARNING] Final validation issues: {final_validation['errors']}")
     
+    for path in file_paths:
+        progress.file_finished(path, cleaned_csv)
     return cleaned_csv
 
 def validate_food_index_loading(food_index_path):
@@ -726,7 +942,7 @@ def validate_food_index_loading(food_index_path):
         print(f"[FOOD INDEX ERROR] {e}")
         return ""
 
-def run_parallel_batches(file_paths, food_index_path, batch_size=1):
+def run_parallel_batches(file_paths, food_index_path, batch_size=1, progress=NULL_PROGRESS):
     """Unified parallel processing with all features"""
     food_index = validate_food_index_loading(food_index_path)
     if not food_index:
@@ -737,11 +953,11 @@ def run_parallel_batches(file_paths, food_index_path, batch_size=1):
 
     results = []
     
-    with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(batches), 4)) as executor:
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(batches), PIPELINE_MAX_WORKERS)) as executor:
         if batch_size == 1:
-            futures = [executor.submit(process_single_file_unified, file_path, food_index) for file_path in file_paths]
+            futures = [executor.submit(process_single_file_unified, file_path, food_index, progress) for file_path in file_paths]
         else:
-            futures = [executor.submit(process_batch_unified, batch, food_index) for batch in batches]
+            futures = [executor.submit(process_batch_unified, batch, food_index, progress) for batch in batches]
         
         for i, future in enumerate(concurrent.futures.as_completed(futures)):
             try:
@@ -755,70 +971,73 @@ def run_parallel_batches(file_paths, food_index_path, batch_size=1):
                 print(f"[ERROR] Task {i+1} failed: {e}")
 
     print(f"[INFO] Parallel processing complete. {len(results)} successful results out of {len(futures)} tasks.")
+    cache_stats = extraction_cache.stats()
+    print(f"[CACHE] Extraction cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['evictions']} evictions")
+    llm_cache_stats = response_cache.stats()
+    print(f"[CACHE] LLM response cache: {llm_cache_stats['hits']} hits, {llm_cache_stats['misses']} misses, {llm_cache_stats['entries']} entries")
+    print(f"[USAGE] {llm_usage.summary()}")
+    print(f"[LLM ENGINE] {get_llm_engine().stats()}")
     return results
 
-def post_processing_additional_information(csv_content: str) -> pd.DataFrame:
-    """Add the last few columns
+def post_processing_additional_information(records: pd.DataFrame) -> pd.DataFrame:
+    """Add the last few columns to a typed record batch (see records.records_from_csv)
        - Total Price: Price × Quantity (1 decimal place)
        - Price Per Pack: Price ÷ Pack (1 decimal place)
        - Price Per Pack Size: Price ÷ (Pack × Size) (1 decimal place)
-       - Price Per Pound: Random value between 2-15 (1 decimal place)
+       - Price Per Pound: Price ÷ pounds per case from the unit-conversion tables (1 decimal place);
+         blank where the unit, can size or piece weight is unknown
     """ 
 
-    if not csv_content.strip():
+    if records.empty:
         return pd.DataFrame()
     try:
-        df = pd.read_csv(io.StringIO(csv_content))
-        for col in ['Price', 'Quantity', 'Pack', 'Size']:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+        df = records.copy()
+        price = df['Price'].astype('float64')
+        quantity = df['Quantity'].astype('float64')
+        pack = df['Pack'].astype('float64')
+        size = df['Size'].astype('float64')
 
         # --- Calculate the new columns ---
 
         # 1. Total Price
-        df['Total Price'] = (df['Price'] * df['Quantity']).round(1)
+        df['Total Price'] = (price * quantity).round(1)
 
         # 2. Price Per Pack (handle division by zero)
         df['Price Per Pack'] = np.where(
-            df['Pack'] > 0, 
-            (df['Price'] / df['Pack']).round(1), 
+            pack > 0, 
+            (price / pack).round(1), 
             np.nan
         )
 
         # 3. Price Per Pack Size (handle division by zero)
-        pack_size_product = df['Pack'] * df['Size']
+        pack_size_product = pack * size
         df['Price Per Pack Size'] = np.where(
             pack_size_product > 0,
-            (df['Price'] / pack_size_product).round(1),
+            (price / pack_size_product).round(1),
             np.nan
         )
         
-        # 4. Price Per Pound (random value)
-        df['Price Per Pound'] = np.random.uniform(2.0, 15.0, size=len(df)).round(1)
+        # 4. Price Per Pound (unconvertible rows stay blank and are reported)
+        per_pound, issue = price_per_pound(price, pack, size, df['UOM'], df['Foodcode'])
+        df['Price Per Pound'] = per_pound.round(PRICE_PER_POUND_DECIMALS)
+        if (issue != '').any():
+            print(f"[UNITS] No price per pound for {issue_summary(issue)}")
 
-        # Reorder columns to the final 12-column format
-        final_columns = [
-            'Description', 'Price', 'Quantity', 'Pack Size', 'Pack', 'Size', 'UOM', 
-            'Total Price', 'Price Per Pack', 'Price Per Pack Size', 'Price Per Pound', 'Foodcode'
-        ]
         # Ensure all expected columns exist, filling missing ones with NaN
-        for col in final_columns:
+        for col in FINAL_COLUMNS:
             if col not in df.columns:
                  df[col] = np.nan
         
-        return df[final_columns]
+        # Reorder columns to the final 12-column format
+        return df[FINAL_COLUMNS]
 
     except Exception as e:
         print(f"[POST-PROCESSING ERROR] Failed to add columns: {e}")
         return pd.DataFrame()
 
 # ======================= Quality Assurance =======================
-def comprehensive_quality_check(csv_content: str, original_files: List[str]) -> Dict[str, Any]:
-    """Comprehensive quality check for processed CSV"""
-    try:
-        df = pd.read_csv(io.StringIO(csv_content))
-    except Exception as e:
-        return {'status': 'error', 'message': f'Failed to parse CSV: {e}', 'fixes': []}
-    
+def comprehensive_quality_check(df: pd.DataFrame, original_files: List[str]) -> Dict[str, Any]:
+    """Comprehensive quality check for the final record batch"""
     issues = []
     fixes = []
     
@@ -856,6 +1075,13 @@ def comprehensive_quality_check(csv_content: str, original_files: List[str]) ->
                 issues.append(f"Calculation errors in Total Price: {mismatched.sum()} rows")
                 fixes.append("Recalculate Total Price = Price × Quantity")
     
+    if all(col in df.columns for col in ['Price', 'Price Per Pound']):
+        unconvertible = (pd.to_numeric(df['Price'], errors='coerce').notna()
+                         & pd.to_numeric(df['Price Per Pound'], errors='coerce').isna()).sum()
+        if unconvertible > 0:
+            issues.append(f"No price per pound for {unconvertible} rows")
+            fixes.append("Add the unit, can size or piece weight to foodCodes/unit_conversions.csv")
+    
     if 'Foodcode' in df.columns:
         invalid_codes = df[~df['Foodcode'].astype(str).str.match(r'^\d{6}$', na=False) & df['Foodcode'].notna()]
         if not invalid_codes.empty:
@@ -992,8 +1218,11 @@ def smart_header_reconstruction(current_header, expected_header, data_column_cou
     
     return current_header, "No changes needed"
 
-def fix_header_column_mismatch(csv_content):
-    """Dynamic header fixing that works for any column mismatch scenario"""
+def fix_header_column_mismatch(csv_content, expected_header=MODEL_COLUMNS):
+    """Dynamic header fixing that works for any column mismatch scenario
+
+    expected_header names the columns of the layout being fixed (model output by default).
+    """
     if not csv_content.strip():
         return csv_content, "Empty content"
     
@@ -1005,29 +1234,15 @@ def fix_header_column_mismatch(csv_content):
     data_count = analysis['data_count']
     current_header = analysis['header_cols']
     
-    print(f"[DEBUG] Column Analysis:")
-    print(f"  Header columns: {header_count}")
-    print(f"  Data columns (most common): {data_count}")
-    print(f"  Data column distribution: {analysis['data_col_distribution']}")
-    
     if header_count == data_count:
         return csv_content, f"No fix needed - header and data both have {header_count} columns"
     
-    expected_header = ['Description', 'Price', 'Quantity', 'Pack Size', 'Pack', 
-                      'Size', 'UOM', 'Total Price', 'Price Per Pack', 
-                      'Price Per Pack Size', 'Price Per Pound', 'Foodcode']
-    
-    if data_count == len(expected_header):
-        missing_cols = identify_missing_columns(current_header, expected_header, data_count)
-        if missing_cols:
-            print(f"[DEBUG] Missing columns detected:")
-            for col in missing_cols:
-                print(f"  - '{col['name']}' should be at position {col['index']+1} ({col['position']})")
-    
+    missing_cols = identify_missing_columns(current_header, expected_header, data_count)
     new_header, fix_description = smart_header_reconstruction(current_header, expected_header, data_count)
     
-    print(f"[DEBUG] Header fix: {fix_description}")
-    print(f"[DEBUG] New header: {new_header}")
+    missing_note = f", missing {[col['name'] for col in missing_cols]}" if missing_cols else ""
+    print(f"[HEADER FIX] {fix_description} (header {header_count} columns, data {analysis['data_col_distribution']}"
+          f"{missing_note})")
     
     lines = csv_content.strip().split('\n')
     fixed_lines = [','.join(new_header)] + lines[1:]
@@ -1035,41 +1250,48 @@ def fix_header_column_mismatch(csv_content):
     return '\n'.join(fixed_lines), fix_description
 
 # ======================= Main Function =======================
-# ASSUMPTION: auto_fix_common_issues is changed to -> def auto_fix_common_issues(df: pd.DataFrame) -> pd.DataFrame:
-
-def process_batch_from_urls(urls, food_index_path="foodCodes/food_index.txt", batch_size=1):
+def process_batch_from_urls(urls, food_index_path="foodCodes/food_index.txt", batch_size=1, progress=NULL_PROGRESS):
     """Main processing function with all features unified"""
+    progress.stage('downloading')
     temp_files = download_files_from_urls(urls)
-    print(f"[DEBUG] Downloaded files: {temp_files}")
+    print(f"[INFO] Downloaded {len(temp_files)}/{len(urls)} files")
+    progress.files_ready(temp_files)
 
-    csv_chunks = run_parallel_batches(temp_files, food_index_path, batch_size)
-    
+    try:
+        return process_local_files(temp_files, food_index_path, batch_size, progress)
+    finally:
+        cleanup_temp_files(temp_files)
+
+def process_local_files(temp_files, food_index_path="foodCodes/food_index.txt", batch_size=1, progress=NULL_PROGRESS):
+    """Run extraction, Claude and post-processing over files already on disk"""
+    progress.stage('processing')
+    csv_chunks = run_parallel_batches(temp_files, food_index_path, batch_size, progress)
+    progress.stage('finalizing')
+    return finalize_csv_chunks(csv_chunks, temp_files)
+
+def finalize_csv_chunks(csv_chunks, source_files):
+    """Combine per-document CSV outputs, add the derived columns and run the final checks
+
+    Every output is parsed once into a typed record batch; all later steps work on that
+    batch and the CSV string is written once at the end.
+    """
     if not csv_chunks:
         return ""
     
-    combined_csv = combine_csv_chunks_safely(csv_chunks)
-    
-    # 1. Get the initial DataFrame
-    processed_df = post_processing_additional_information(combined_csv)
+    # 1. Parse every document's CSV into one typed record batch and clean it column-wise
+    # (Pack and Size keep decimals here, e.g. 6/2.5LB)
+    records = clean_records(records_from_csv(csv_chunks), whole_numbers=False)
+    processed_df = post_processing_additional_information(records)
 
     if processed_df.empty:
         print("[ERROR] Post-processing failed to generate data.")
         return ""
     
-    # 2. Apply fixes directly to the DataFrame (MORE EFFICIENT)
+    # 2. Apply fixes directly to the DataFrame
     fixed_df = auto_fix_common_issues(processed_df)
     
-    # 3. Convert to a CSV string ONCE, after all DataFrame fixes are done
-    final_csv = fixed_df.to_csv(index=False, float_format='%.1f')
-    
-    # 4. Apply any final STRING-based fixes if necessary
-    # Note: fix_header_column_mismatch works on strings, so this is the correct place for it.
-    fixed_csv, fix_description = fix_header_column_mismatch(final_csv)
-    if fix_description != "No fix needed - header and data both have 12 columns":
-        print(f"[DEBUG] Final header fix applied: {fix_description}")
-    
-    # 5. Run final checks
-    quality_report = comprehensive_quality_check(fixed_csv, temp_files)
+    # 3. Run final checks on the same batch
+    quality_report = comprehensive_quality_check(fixed_df, source_files)
     
     print(f"[QUALITY CHECK] Status: {quality_report['status']}")
     print(f"[QUALITY CHECK] Processed {quality_report.get('total_rows', 0)} rows")
@@ -1082,10 +1304,15 @@ def process_batch_from_urls(urls, food_index_path="foodCodes/food_index.txt", ba
         for fix in quality_report.get('fixes', []):
             print(f"  - {fix}")
     
-    return fixed_csv
+    # 4. Convert to a CSV string ONCE, at the output boundary
+    return records_to_csv(fixed_df)
 
 def auto_fix_common_issues(df: pd.DataFrame) -> pd.DataFrame:
-    """Automatically fix common data quality issues with proper decimal formatting"""
+    """Automatically fix common data quality issues with proper decimal formatting
+
+    Text cleanup and the derived columns come from records.clean_records and
+    post_processing_additional_information; this only coerces stray text and rounds.
+    """
     
     expected_columns = ['Description', 'Price', 'Quantity', 'Pack Size', 'Pack', 
                        'Size', 'UOM', 'Total Price', 'Price Per Pack', 
@@ -1098,27 +1325,11 @@ def auto_fix_common_issues(df: pd.DataFrame) -> pd.DataFrame:
                       'Price Per Pack', 'Price Per Pack Size', 'Price Per Pound', 'Foodcode']
     
     for col in numeric_columns:
-        if col in df.columns:
+        # Typed record batches are already numeric; only text columns need cleaning
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
             df[col] = df[col].astype(str).str.replace(r'[$,]', '', regex=True)
             df[col] = pd.to_numeric(df[col], errors='coerce')
     
-    if all(col in df.columns for col in ['Price', 'Quantity', 'Total Price']):
-        mask = df['Price'].notna() & df['Quantity'].notna()
-        df.loc[mask, 'Total Price'] = (df.loc[mask, 'Price'] * df.loc[mask, 'Quantity']).round(1)
-    
-    if all(col in df.columns for col in ['Price', 'Pack', 'Price Per Pack']):
-        mask = df['Price'].notna() & df['Pack'].notna() & (df['Pack'] > 0)
-        df.loc[mask, 'Price Per Pack'] = (df.loc[mask, 'Price'] / df.loc[mask, 'Pack']).round(1)
-    
-    if all(col in df.columns for col in ['Price', 'Pack', 'Size', 'Price Per Pack Size']):
-        mask = (df['Price'].notna() & df['Pack'].notna() & df['Size'].notna() & 
-                (df['Pack'] > 0) & (df['Size'] > 0))
-        df.loc[mask, 'Price Per Pack Size'] = (df.loc[mask, 'Price'] / (df.loc[mask, 'Pack'] * df.loc[mask, 'Size'])).round(1)
-    
-    if 'Description' in df.columns:
-        df['Description'] = df['Description'].astype(str).str.strip()
-        df['Description'] = df['Description'].str.replace(r'["\']', '', regex=True)
-    
     decimal_columns = ['Price', 'Total Price', 'Price Per Pack', 'Price Per Pack Size', 'Price Per Pound']
     for col in decimal_columns:
         if col in df.columns:
@@ -0,0 +1,239 @@
+import csv
+import io
+import os
+import re
+
+from dotenv import load_dotenv
+
+from claude_prompting.food_code_index import best_food_code
+from claude_prompting.pack_size import number_text, parse_pack_size
+from claude_prompting.spreadsheet_reader import read_spreadsheet_cells
+
+# Load environment variables
+load_dotenv()
+
+# Below this confidence the workbook goes to the LLM instead
+BID_TAB_MIN_CONFIDENCE = float(os.getenv('BID_TAB_MIN_CONFIDENCE', '0.8'))
+BID_TAB_ENABLED = os.getenv('BID_TAB_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+HEADER_SCAN_ROWS = 25
+# Header score multiplier when the best price columns have different headers (e.g. one vs four delivery sites)
+MIXED_PRICE_PENALTY = 0.5
+
+OUTPUT_COLUMNS = ['Description', 'Price', 'Quantity', 'Pack Size', 'Pack', 'Size', 'UOM', 'Foodcode']
+
+# Header synonyms per role, most specific first. Matching is on normalized header text.
+COLUMN_SYNONYMS = {
+    'description': [
+        'item description', 'end product description', 'product description', 'description',
+        'item name', 'product name', 'product', 'item',
+    ],
+    'pack_size': ['pack/size', 'pack size', 'packsize'],
+    'pack': ['case pack', 'pack'],
+    'size': ['size'],
+    'unit_price': [
+        'unit price', 'price per item', 'price per unit', 'unit cost', 'unit commodity price',
+        'unit non-commodity price', 'bid price', 'price per case', 'case price', 'price', 'cost',
+    ],
+    'quantity': ['estimated usage', 'est. usage', 'est usage', 'annual usage', 'quantity', 'qty', 'usage'],
+    'uom': ['unit of measure', 'uom', 'unit'],
+}
+
+NO_BID_MARKERS = {'n/b', 'nb', 'no bid', 'no-bid', 'n/a', 'na', '-', '--'}
+
+NUMBER = re.compile(r'^\$?\s*(\d{1,3}(?:,\d{3})+|\d+)?(\.\d+)?$')
+
+
+def normalize_header(text):
+    return re.sub(r'\s+', ' ', text.lower().replace('”', '"')).strip(' :#')
+
+
+def match_role(header):
+    """Return (role, match_key) for a header cell, or (None, None).
+
+    Exact synonym matches beat prefix/suffix matches; within each, earlier
+    synonyms beat later ones. Lower match_key is better.
+    """
+    normalized = normalize_header(header)
+    if not normalized:
+        return None, None
+    best = (None, None)
+    for role, synonyms in COLUMN_SYNONYMS.items():
+        for rank, synonym in enumerate(synonyms):
+            if normalized == synonym:
+                key = (0, rank)
+            elif normalized.startswith(synonym + ' ') or normalized.endswith(' ' + synonym):
+                key = (1, -len(synonym))
+            else:
+                continue
+            if best[1] is None or key < best[1]:
+                best = (role, key)
+    return best
+
+
+def parse_number(text):
+    cleaned = text.strip().replace('$', '').replace(',', '').strip()
+    if not cleaned or not NUMBER.match(text.strip().replace(' ', '')):
+        return None
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+def split_pack_size(pack_size):
+    """Pack, Size, UOM text from strings like '12/16OZ', '6/#10', '200CT' (see pack_size.parse_pack_size)."""
+    pack, size, uom, _confidence = parse_pack_size(pack_size or '')
+    return number_text(pack), number_text(size), uom
+
+
+def join_pack_size(pack, size, uom=''):
+    """Pack Size text from separate Pack, Size (and UOM) cells, e.g. ('12', '16', 'OZ') -> '12/16 OZ'."""
+    pack, size, uom = pack.strip(), size.strip(), uom.strip()
+    if size and uom and not re.search(r'[A-Za-z#]', size):
+        size = f"{size} {uom}"
+    if pack and size:
+        return f"{pack}/{size}"
+    return size or pack
+
+
+def detect_header(rows):
+    """Find the header row within the first HEADER_SCAN_ROWS rows.
+
+    Returns (row_index, {role: [column indexes]}, header_score) for the best candidate.
+    Single-column roles keep their best-matching column; unit_price keeps every
+    column sharing the best match and the header text of the first one (one column
+    per vendor). Best matches with different header texts are different prices, not
+    different vendors, so only the first kind is kept and the score is lowered.
+    """
+    best = (None, {}, 0.0)
+    for row_index, cells in enumerate(rows[:HEADER_SCAN_ROWS]):
+        matches = {}
+        for column, cell in enumerate(cells):
+            role, key = match_role(cell)
+            if role is not None:
+                matches.setdefault(role, []).append((key, column))
+        if 'description' not in matches or 'unit_price' not in matches:
+            continue
+        # Required roles count double; optional ones add confidence
+        has_pack_size = any(role in matches for role in ('pack_size', 'pack', 'size'))
+        score = (2 + has_pack_size + sum(1 for role in ('quantity', 'uom') if role in matches)) / 5
+        roles = {}
+        for role, candidates in matches.items():
+            candidates.sort()
+            if role == 'unit_price':
+                best_key = candidates[0][0]
+                tied = [column for key, column in candidates if key == best_key]
+                kind = normalize_header(cells[tied[0]])
+                roles[role] = [column for column in tied if normalize_header(cells[column]) == kind]
+                if len(roles[role]) < len(tied):
+                    score *= MIXED_PRICE_PENALTY
+            else:
+                roles[role] = [candidates[0][1]]
+        if score <= best[2]:
+            continue
+        best = (row_index, roles, score)
+    return best
+
+
+def parse_sheet(rows):
+    """Parse one sheet into output rows. Returns (records, confidence)."""
+    header_index, roles, header_score = detect_header(rows)
+    if header_index is None:
+        return [], 0.0
+
+    def cell(cells, role):
+        columns = roles.get(role)
+        if not columns or columns[0] >= len(cells):
+            return ''
+        return cells[columns[0]]
+
+    records = []
+    candidates = 0
+    for cells in rows[header_index + 1:]:
+        description = cell(cells, 'description')
+        if not description or parse_number(description) is not None:
+            continue
+        price_cells = [cells[column] for column in roles['unit_price'] if column < len(cells)]
+        price_cells = [value for value in price_cells if value and value.lower() not in NO_BID_MARKERS]
+        if not price_cells:
+            continue  # Section titles, notes, signature lines and items nobody bid on
+        candidates += 1
+
+        prices = [parse_number(value) for value in price_cells]
+        prices = [price for price in prices if price is not None and price > 0]
+        if not prices:
+            continue
+
+        pack_size = cell(cells, 'pack_size') or join_pack_size(cell(cells, 'pack'), cell(cells, 'size'), cell(cells, 'uom'))
+        pack, size, uom = split_pack_size(pack_size)
+        uom = cell(cells, 'uom').upper() or uom
+        quantity = parse_number(cell(cells, 'quantity'))
+        records.append({
+            'Description': description,
+            # One price column per vendor, all of one kind: the lowest bid is the price the district pays
+            'Price': f"{min(prices):.1f}",
+            'Quantity': str(int(quantity)) if quantity is not None else '',
+            'Pack Size': pack_size,
+            'Pack': pack,
+            'Size': size,
+            'UOM': uom,
+            'Foodcode': best_food_code(description),
+        })
+
+    if not candidates:
+        return [], 0.0
+    return records, header_score * (len(records) / candidates)
+
+
+def sheet_has_data(rows):
+    """True if a sheet looks like it holds item rows (several rows with numbers)."""
+    numeric_rows = sum(1 for cells in rows if any(parse_number(value) is not None for value in cells))
+    return numeric_rows > 3
+
+
+def parse_bid_tabulation(path):
+    """Rule-based parse of a structured bid tabulation workbook.
+
+    Returns (csv_text, confidence). csv_text is a chunk result (the 8 RECORD_COLUMNS
+    the LLM path expands its 5-column output to); callers fall back to the LLM when
+    confidence < BID_TAB_MIN_CONFIDENCE.
+    """
+    try:
+        sheets = read_spreadsheet_cells(path)
+    except Exception as e:
+        print(f"[BID TAB] Could not read {path}: {e}")
+        return "", 0.0
+
+    all_records = []
+    confidences = []
+    for sheet_name, rows in sheets:
+        records, confidence = parse_sheet(rows)
+        if records:
+            all_records.extend(records)
+            confidences.append(confidence)
+            print(f"[BID TAB] Sheet '{sheet_name}': {len(records)} rows, confidence {confidence:.2f}")
+        elif sheet_has_data(rows):
+            # A data-bearing sheet we can't map means the workbook isn't regular
+            print(f"[BID TAB] Sheet '{sheet_name}' has data but no recognizable header")
+            confidences.append(0.0)
+
+    if not all_records:
+        return "", 0.0
+
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=OUTPUT_COLUMNS, lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(all_records)
+    return output.getvalue().strip(), min(confidences)
+
+
+def try_bid_tabulation_fast_path(path, min_confidence=BID_TAB_MIN_CONFIDENCE):
+    """Return CSV for spreadsheets the rule-based parser handles confidently, else None."""
+    if not BID_TAB_ENABLED or not path.lower().endswith(('.xlsx', '.xls')):
+        return None
+    csv_text, confidence = parse_bid_tabulation(path)
+    if csv_text and confidence >= min_confidence:
+        print(f"[BID TAB] Fast path used for {path} (confidence {confidence:.2f})")
+        return csv_text
+    print(f"[BID TAB] Confidence {confidence:.2f} below {min_confidence}, falling back to LLM for {path}")
+    return None
@@ -0,0 +1,222 @@
+import os
+import re
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Expected output tokens per chunk; half of CLAUDE_MAX_TOKENS (20000) so a chunk whose rows run long still finishes
+CHUNK_OUTPUT_TOKEN_BUDGET = int(os.getenv('CHUNK_OUTPUT_TOKEN_BUDGET', '10000'))
+# Input tokens per chunk (excluding the cached prompt prefix); bounds latency for sparse text
+CHUNK_INPUT_TOKEN_BUDGET = int(os.getenv('CHUNK_INPUT_TOKEN_BUDGET', '6000'))
+
+# Output tokens per CSV row besides the description: price, quantity, pack size text, food code and separators
+ROW_OUTPUT_TOKENS = 16
+# Output tokens charged for a line that is not a detected item row (it occasionally hides one)
+OTHER_LINE_OUTPUT_TOKENS = 3
+HEADER_SEARCH_LINES = 40
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+ITEM_ROW_PATTERNS = [
+    re.compile(r'\$?\d+\.\d{2}\b'),                                            # prices
+    re.compile(r'\b\d+\s*/\s*\d+(\.\d+)?\s*(oz|lb|lbs|ct|ea|gal|#)', re.I),      # pack sizes like 6/2LB
+    re.compile(r'\d+(\.\d+)?\s*(oz|lb|lbs|ct|ea|each|pound|ounce|gal|cs|case|doz)\b', re.I),  # units
+]
+HEADER_PATTERNS = [
+    re.compile(r'(description|item|product|food)', re.I),
+    re.compile(r'(price|cost|amount)', re.I),
+    re.compile(r'(quantity|qty|count)', re.I),
+    re.compile(r'(pack|size|unit|uom)', re.I),
+]
+
+
+def estimate_tokens(text):
+    """Local token estimate: one per word, per 3 digits and per symbol, plus one per 6 letters of long words."""
+    tokens = 0
+    for piece in TOKEN_PATTERN.findall(text):
+        tokens += 1 + (len(piece) - 1) // 6 if piece.isalpha() else 1
+    return tokens
+
+
+def is_item_row(line):
+    return bool(re.search(r'[A-Za-z]{2}', line)) and any(p.search(line) for p in ITEM_ROW_PATTERNS)
+
+
+def detect_table_header(lines):
+    """Index of the first column-header line near the top of the document, or None."""
+    for i, line in enumerate(lines[:HEADER_SEARCH_LINES]):
+        if line.strip() and not is_item_row(line) and sum(1 for p in HEADER_PATTERNS if p.search(line)) >= 2:
+            return i
+    return None
+
+
+def line_output_tokens(line):
+    if not line.strip():
+        return 0
+    if not is_item_row(line):
+        return OTHER_LINE_OUTPUT_TOKENS
+    # The description is copied through; everything numeric is reformatted into fixed columns
+    return ROW_OUTPUT_TOKENS + sum(1 for piece in TOKEN_PATTERN.findall(line) if piece.isalpha())
+
+
+def item_segments(lines):
+    """Group line indices into runs that may not be split.
+
+    A chunk may start only after a blank line or between two consecutive item rows, so a
+    wrapped description stays with the row it belongs to.
+    """
+    segments = []
+    current = []
+    previous = None
+    for i, line in enumerate(lines):
+        boundary = previous is not None and (
+            not lines[previous].strip() or (is_item_row(line) and is_item_row(lines[previous]))
+        )
+        if boundary and current:
+            segments.append(current)
+            current = []
+        current.append(i)
+        previous = i
+    if current:
+        segments.append(current)
+    return segments
+
+
+def split_after_item_rows(lines, segment):
+    """Fallback for a run too large for one chunk: cut after each item row."""
+    runs = []
+    current = []
+    for i in segment:
+        current.append(i)
+        if is_item_row(lines[i]):
+            runs.append(current)
+            current = []
+    if current:
+        runs.append(current)
+    return runs
+
+
+def split_by_budget(run, line_input, line_output, input_budget, output_budget):
+    """Last resort for a run still over budget (prose, OCR text, rows the item patterns miss): cut between lines."""
+    pieces = []
+    current, current_input, current_output = [], 0, 0
+    for i in run:
+        if current and (current_input + line_input[i] > input_budget or current_output + line_output[i] > output_budget):
+            pieces.append(current)
+            current, current_input, current_output = [], 0, 0
+        current.append(i)
+        current_input += line_input[i]
+        current_output += line_output[i]
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_long_lines(lines, input_budget):
+    """Break lines longer than half the input budget at spaces, so no single line overflows a chunk."""
+    limit = max(1, input_budget // 2)
+    result = []
+    for line in lines:
+        if estimate_tokens(line) <= limit:
+            result.append(line)
+            continue
+        piece = []
+        piece_tokens = 0
+        for word in line.split(' '):
+            word_tokens = estimate_tokens(word)
+            if piece and piece_tokens + word_tokens > limit:
+                result.append(' '.join(piece))
+                piece, piece_tokens = [], 0
+            piece.append(word)
+            piece_tokens += word_tokens
+        result.append(' '.join(piece))
+    return result
+
+
+class ChunkPlan:
+    """Chunks of one document with their token estimates."""
+
+    def __init__(self, chunks, header, input_tokens, output_tokens, item_rows):
+        self.chunks = chunks
+        self.header = header
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.item_rows = item_rows
+
+    def stats(self):
+        count = len(self.chunks)
+        return {
+            'chunks': count,
+            'item_rows': sum(self.item_rows),
+            'input_tokens': sum(self.input_tokens),
+            'max_input_tokens': max(self.input_tokens, default=0),
+            'output_tokens': sum(self.output_tokens),
+            'max_output_tokens': max(self.output_tokens, default=0),
+            'avg_output_tokens': round(sum(self.output_tokens) / count) if count else 0,
+            'header_detected': self.header is not None,
+        }
+
+    def summary(self):
+        stats = self.stats()
+        return (f"{stats['chunks']} chunks, {stats['item_rows']} item rows, ~{stats['input_tokens']} input tokens "
+                f"(max {stats['max_input_tokens']}), ~{stats['output_tokens']} output tokens "
+                f"(avg {stats['avg_output_tokens']}, max {stats['max_output_tokens']}), "
+                f"header {'repeated' if stats['header_detected'] else 'not found'}")
+
+
+def chunk_document(text, output_budget=CHUNK_OUTPUT_TOKEN_BUDGET, input_budget=CHUNK_INPUT_TOKEN_BUDGET):
+    """Split text so each chunk's expected output fits output_budget and its input fits input_budget.
+
+    Splits only at item-row boundaries (see item_segments); a single run larger than the
+    budget is cut after each of its item rows, and a piece still over budget (text with no
+    detected item rows) between lines. The detected table header line is repeated at the top
+    of every chunk after the first.
+    """
+    lines = split_long_lines(text.split('\n'), input_budget)
+    header_index = detect_table_header(lines)
+    header = lines[header_index].strip() if header_index is not None else None
+    header_tokens = estimate_tokens(header) if header else 0
+
+    line_input = [estimate_tokens(line) + 1 for line in lines]
+    line_output = [line_output_tokens(line) for line in lines]
+
+    def over_budget(run):
+        return (sum(line_input[i] for i in run) > input_budget - header_tokens
+                or sum(line_output[i] for i in run) > output_budget)
+
+    units = []
+    for segment in item_segments(lines):
+        if not over_budget(segment):
+            units.append(segment)
+            continue
+        for run in split_after_item_rows(lines, segment):
+            if over_budget(run):
+                units.extend(split_by_budget(run, line_input, line_output, input_budget - header_tokens, output_budget))
+            else:
+                units.append(run)
+
+    groups = []
+    current, current_input, current_output = [], header_tokens, 0
+    for unit in units:
+        unit_input = sum(line_input[i] for i in unit)
+        unit_output = sum(line_output[i] for i in unit)
+        if current and (current_input + unit_input > input_budget or current_output + unit_output > output_budget):
+            groups.append((current, current_input, current_output))
+            current, current_input, current_output = [], header_tokens, 0
+        current.extend(unit)
+        current_input += unit_input
+        current_output += unit_output
+    if current:
+        groups.append((current, current_input, current_output))
+
+    chunks, input_tokens, output_tokens, item_rows = [], [], [], []
+    for n, (indices, group_input, group_output) in enumerate(groups):
+        chunk_lines = [lines[i] for i in indices]
+        if n > 0 and header and header_index not in indices:
+            chunk_lines.insert(0, header)
+        chunks.append('\n'.join(chunk_lines))
+        input_tokens.append(group_input)
+        output_tokens.append(group_output)
+        item_rows.append(sum(1 for i in indices if is_item_row(lines[i])))
+    return ChunkPlan(chunks, header, input_tokens, output_tokens, item_rows)
@@ -0,0 +1,97 @@
+import concurrent.futures
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+DOWNLOAD_MAX_WORKERS = int(os.getenv('DOWNLOAD_MAX_WORKERS', '8'))
+DOWNLOAD_MAX_BYTES = int(os.getenv('DOWNLOAD_MAX_BYTES', str(100 * 1024 * 1024)))
+DOWNLOAD_TIMEOUT_SECONDS = float(os.getenv('DOWNLOAD_TIMEOUT_SECONDS', '120'))
+DOWNLOAD_CONNECT_TIMEOUT_SECONDS = 10
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class DownloadError(Exception):
+    pass
+
+
+def get_session():
+    """Shared keep-alive session with a connection pool sized for the download workers."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=DOWNLOAD_MAX_WORKERS, pool_maxsize=DOWNLOAD_MAX_WORKERS, max_retries=2)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def download_to_temp_file(url, max_bytes=DOWNLOAD_MAX_BYTES, timeout=DOWNLOAD_TIMEOUT_SECONDS):
+    """Stream a single URL to a temp file, enforcing size and wall-clock limits."""
+    suffix = os.path.splitext(urlparse(url).path)[-1]
+    deadline = time.monotonic() + timeout
+    tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    try:
+        with tmp_file, get_session().get(url, stream=True, timeout=(DOWNLOAD_CONNECT_TIMEOUT_SECONDS, timeout)) as response:
+            if response.status_code != 200:
+                raise DownloadError(f"HTTP {response.status_code}")
+            declared = response.headers.get('Content-Length')
+            if declared and declared.isdigit() and int(declared) > max_bytes:
+                raise DownloadError(f"Content-Length {declared} exceeds limit of {max_bytes} bytes")
+
+            written = 0
+            for block in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if not block:
+                    continue
+                written += len(block)
+                if written > max_bytes:
+                    raise DownloadError(f"Body exceeds limit of {max_bytes} bytes")
+                if time.monotonic() > deadline:
+                    raise DownloadError(f"Download exceeded {timeout}s")
+                tmp_file.write(block)
+        return tmp_file.name
+    except Exception:
+        cleanup_temp_files([tmp_file.name])
+        raise
+
+
+def download_files_from_urls(urls, max_workers=DOWNLOAD_MAX_WORKERS):
+    """Download URLs in parallel over a pooled session. Returns temp paths in input order, skipping failures."""
+    if not urls:
+        return []
+
+    paths = [None] * len(urls)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(urls), max_workers)) as executor:
+        futures = {executor.submit(download_to_temp_file, url): i for i, url in enumerate(urls)}
+        for future in concurrent.futures.as_completed(futures):
+            i = futures[future]
+            try:
+                paths[i] = future.result()
+            except Exception as e:
+                print(f"[ERROR] Failed to download {urls[i]}: {e}")
+
+    return [path for path in paths if path]
+
+
+def cleanup_temp_files(paths):
+    """Remove downloaded temp files once a job is finished with them."""
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"[WARNING] Could not remove temp file {path}: {e}")
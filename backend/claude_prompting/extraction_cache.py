@@ -0,0 +1,168 @@
+import hashlib
+import os
+import threading
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Bump whenever extraction output changes so stale entries stop matching
+EXTRACTOR_VERSION = "3"
+
+DEFAULT_CACHE_DIR = os.getenv(
+    'EXTRACTION_CACHE_DIR',
+    os.path.join(os.path.dirname(__file__), '../.cache/extraction')
+)
+DEFAULT_MAX_BYTES = int(os.getenv('EXTRACTION_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+CACHE_DISABLED = os.getenv('EXTRACTION_CACHE_DISABLED', '').lower() in ('1', 'true', 'yes')
+
+
+class ExtractionCache:
+    """On-disk, content-addressed cache of extracted document text with LRU eviction.
+
+    Entries are keyed by SHA-256 of the file bytes plus EXTRACTOR_VERSION, so the
+    same vendor PDF uploaded under a different URL or temp name still hits.
+    File mtimes double as last-access times for eviction.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, enabled=not CACHE_DISABLED):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+    def key_for(self, file_path):
+        """SHA-256 of extractor version + file bytes, streamed in 1 MB blocks."""
+        digest = hashlib.sha256(f"extractor-v{EXTRACTOR_VERSION}\0".encode('utf-8'))
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt")
+
+    def _iter_entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.txt'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield path, stat.st_size, stat.st_mtime
+
+    def _ensure_size_loaded(self):
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._iter_entries())
+
+    def get(self, key):
+        """Return cached text for key, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except (FileNotFoundError, UnicodeDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)  # Touch for LRU ordering
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return text
+
+    def put(self, key, text):
+        """Store text under key, evicting least recently used entries past max_bytes."""
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = text.encode('utf-8')
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._ensure_size_loaded()
+            self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = sorted(self._iter_entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.evictions += 1
+            except FileNotFoundError:
+                continue
+        self._total_bytes = total
+
+    def clear(self):
+        with self._lock:
+            for path, _, _ in list(self._iter_entries()):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            self._ensure_size_loaded()
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+                'total_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+extraction_cache = ExtractionCache()
+
+
+def cached_extract(file_path, extractor, use_cache=True, cache=None):
+    """Run extractor(file_path) through the extraction cache.
+
+    Empty results are not cached so a transient extractor failure is retried next time.
+    """
+    cache = cache or extraction_cache
+    if not use_cache or not cache.enabled:
+        return extractor(file_path)
+
+    try:
+        key = cache.key_for(file_path)
+    except OSError as e:
+        print(f"[CACHE ERROR] Could not hash {file_path}: {e}")
+        return extractor(file_path)
+
+    text = cache.get(key)
+    if text is not None:
+        print(f"[CACHE] Extraction hit for {file_path} ({key[:12]})")
+        return text
+
+    text = extractor(file_path)
+    if text:
+        try:
+            cache.put(key, text)
+        except OSError as e:
+            print(f"[CACHE ERROR] Could not store extraction for {file_path}: {e}")
+    return text
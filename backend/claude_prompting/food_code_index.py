@@ -0,0 +1,228 @@
+import argparse
+import csv
+import math
+import os
+import re
+import threading
+from collections import defaultdict
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+FOOD_INDEX_PATH = os.path.join(os.path.dirname(__file__), '../foodCodes/food_index.txt')
+# 'candidates' sends a short retrieved list per chunk, 'full' sends the whole food index. Only 'full' gets
+# prompt caching: without the index the cacheable prefix is below the provider's minimum length
+FOOD_INDEX_MODE = os.getenv('FOOD_INDEX_MODE', 'candidates').lower()
+FOOD_CODE_CANDIDATES_K = int(os.getenv('FOOD_CODE_CANDIDATES_K', '40'))
+CANDIDATES_PER_LINE = 3
+# Minimum similarity for assigning a code without the LLM (bid tabulation fast path)
+FOOD_CODE_MIN_SCORE = float(os.getenv('FOOD_CODE_MIN_SCORE', '0.45'))
+UNKNOWN_FOODCODE = '999999'
+NGRAM_SIZES = (3, 4)
+WORD_WEIGHT = 2.0
+# Item lines per simulated chunk when measuring recall (chunks carry a few dozen to a few hundred rows)
+EVAL_CHUNK_ROWS = 100
+
+# Common abbreviations on vendor invoices and bid sheets
+ABBREVIATIONS = {
+    'chkn': 'chicken', 'chix': 'chicken', 'brst': 'breast', 'bnls': 'boneless', 'sknls': 'skinless',
+    'frz': 'frozen', 'frzn': 'frozen', 'wg': 'whole grain', 'ww': 'whole wheat', 'wgr': 'whole grain',
+    'veg': 'vegetable', 'veggie': 'vegetable', 'bf': 'beef', 'grnd': 'ground', 'trky': 'turkey',
+    'chz': 'cheese', 'ched': 'cheddar', 'mozz': 'mozzarella', 'rf': 'reduced fat', 'lf': 'low fat',
+    'ff': 'fat free', 'oj': 'orange juice', 'pb': 'peanut butter', 'tort': 'tortilla', 'bkd': 'baked',
+}
+
+WORD = re.compile(r'[a-z]+')
+
+
+def normalize(text):
+    words = []
+    for word in WORD.findall(text.lower()):
+        words.extend(ABBREVIATIONS.get(word, word).split())
+    return words
+
+
+def text_features(text):
+    """Sparse term counts: word unigrams plus character n-grams of each padded word."""
+    features = defaultdict(float)
+    for word in normalize(text):
+        if len(word) < 2:
+            continue
+        features[f"w:{word}"] += WORD_WEIGHT
+        padded = f" {word} "
+        for n in NGRAM_SIZES:
+            for i in range(len(padded) - n + 1):
+                features[padded[i:i + n]] += 1.0
+    return features
+
+
+class FoodCodeIndex:
+    """TF-IDF retrieval index over food code description, food group and subgroup."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.idf = {}
+        self.postings = defaultdict(list)
+        self._build()
+
+    @classmethod
+    def from_file(cls, path=FOOD_INDEX_PATH):
+        with open(path, 'r', newline='') as f:
+            reader = csv.DictReader(f)
+            entries = [
+                {
+                    'foodcode': row['foodcode'].strip(),
+                    'description': row['description'].strip(),
+                    'foodgroups': (row.get('foodgroups') or '').strip(),
+                    'foodsubgroups': (row.get('foodsubgroups') or '').strip(),
+                }
+                for row in reader if row.get('foodcode')
+            ]
+        return cls(entries)
+
+    def _build(self):
+        doc_features = []
+        document_frequency = defaultdict(int)
+        for entry in self.entries:
+            # Description dominates; group names help generic lines like "frozen vegetables"
+            features = text_features(entry['description'])
+            for key, value in text_features(f"{entry['foodgroups']} {entry['foodsubgroups']}").items():
+                features[key] += 0.5 * value
+            doc_features.append(features)
+            for key in features:
+                document_frequency[key] += 1
+
+        total = len(self.entries)
+        self.idf = {key: math.log((1 + total) / (1 + df)) + 1 for key, df in document_frequency.items()}
+        for doc_id, features in enumerate(doc_features):
+            weights = {key: value * self.idf[key] for key, value in features.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for key, weight in weights.items():
+                self.postings[key].append((doc_id, weight / norm))
+
+    def search(self, text, k=10):
+        """Return [(score, entry)] for the k best matching food codes."""
+        features = text_features(text)
+        weights = {key: value * self.idf[key] for key, value in features.items() if key in self.idf}
+        norm = math.sqrt(sum(w * w for w in weights.values()))
+        if not norm:
+            return []
+        scores = defaultdict(float)
+        for key, weight in weights.items():
+            query_weight = weight / norm
+            for doc_id, doc_weight in self.postings[key]:
+                scores[doc_id] += query_weight * doc_weight
+        best = sorted(scores.items(), key=lambda item: -item[1])[:k]
+        return [(score, self.entries[doc_id]) for doc_id, score in best]
+
+    def candidates_for_chunk(self, text_chunk, k=FOOD_CODE_CANDIDATES_K, per_line=CANDIDATES_PER_LINE):
+        """Union of the best codes for each item-like line, ranked by best line score, capped at k."""
+        best_scores = {}
+        for line in text_chunk.split('\n'):
+            if len([w for w in normalize(line) if len(w) >= 3]) == 0:
+                continue
+            for score, entry in self.search(line, per_line):
+                code = entry['foodcode']
+                if score > best_scores.get(code, (0.0, None))[0]:
+                    best_scores[code] = (score, entry)
+        ranked = sorted(best_scores.values(), key=lambda item: -item[0])[:k]
+        return [entry for _, entry in ranked]
+
+
+def format_candidates(entries):
+    """Render candidates in the same CSV layout as food_index.txt."""
+    lines = ['foodcode,description,foodgroups,foodsubgroups']
+    for entry in entries:
+        description = entry['description']
+        if ',' in description:
+            description = f'"{description}"'
+        lines.append(f"{entry['foodcode']},{description},{entry['foodgroups']},{entry['foodsubgroups']}")
+    return '\n'.join(lines)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_food_code_index(path=FOOD_INDEX_PATH):
+    """Process-wide index, built once on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = FoodCodeIndex.from_file(path)
+            print(f"[FOOD INDEX] Built candidate index over {len(_index.entries)} food codes")
+        return _index
+
+
+def food_code_candidates_text(text_chunk, k=FOOD_CODE_CANDIDATES_K):
+    return format_candidates(get_food_code_index().candidates_for_chunk(text_chunk, k))
+
+
+def best_food_code(description, min_score=FOOD_CODE_MIN_SCORE):
+    """Top-1 code for a single description, or UNKNOWN_FOODCODE when nothing is similar enough."""
+    results = get_food_code_index().search(description, 1)
+    if results and results[0][0] >= min_score:
+        return results[0][1]['foodcode']
+    return UNKNOWN_FOODCODE
+
+
+# ======================= Evaluation =======================
+def fetch_labeled_food_data(limit=None):
+    """(Description, Food_Code) pairs from the food_data table, in insertion order (rows of a document stay together)."""
+    from data_fetching.supabase import supabase
+    query = supabase.table('food_data').select('Description,Food_Code').not_.is_('Food_Code', 'null').order('id')
+    if limit:
+        query = query.limit(limit)
+    rows = query.execute().data or []
+    return [(row['Description'], str(row['Food_Code'])) for row in rows if row.get('Description')]
+
+
+def evaluate_recall(labeled_rows, ks=(10, 20, 40, 80), index=None, chunk_rows=EVAL_CHUNK_ROWS):
+    """recall@K of what the prompt receives: share of rows whose known food code is in candidates_for_chunk(chunk, K).
+
+    Consecutive rows are grouped into chunks of chunk_rows descriptions, one per line, and
+    each chunk gets one merged candidate list, as in prepare_claude_request. The top-K for
+    each description alone is reported as description_recall for comparison.
+    """
+    index = index or get_food_code_index()
+    known_codes = {entry['foodcode'] for entry in index.entries}
+    rows = [(description, code) for description, code in labeled_rows if code in known_codes]
+    hits = {k: 0 for k in ks}
+    description_hits = {k: 0 for k in ks}
+    for start in range(0, len(rows), chunk_rows):
+        chunk = rows[start:start + chunk_rows]
+        # candidates_for_chunk ranks before capping, so its top k is the candidate list for a cap of k
+        ranked = [entry['foodcode'] for entry in index.candidates_for_chunk('\n'.join(d for d, _ in chunk), max(ks))]
+        for description, code in chunk:
+            own = [entry['foodcode'] for _, entry in index.search(description, max(ks))]
+            for k in ks:
+                hits[k] += code in ranked[:k]
+                description_hits[k] += code in own[:k]
+    return {
+        'rows_evaluated': len(rows),
+        'rows_skipped_unknown_code': len(labeled_rows) - len(rows),
+        'chunk_rows': chunk_rows,
+        'recall': {k: (hits[k] / len(rows)) if rows else 0.0 for k in ks},
+        'description_recall': {k: (description_hits[k] / len(rows)) if rows else 0.0 for k in ks},
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Food code candidate index')
+    parser.add_argument('--evaluate', action='store_true', help='Report recall@K against food_data rows')
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--chunk-rows', type=int, default=EVAL_CHUNK_ROWS, help='Rows per simulated chunk for --evaluate')
+    parser.add_argument('--query', help='Print the top candidates for a description')
+    args = parser.parse_args()
+
+    if args.query:
+        for score, entry in get_food_code_index().search(args.query, 10):
+            print(f"{score:.3f}  {entry['foodcode']}  {entry['description']}")
+    if args.evaluate:
+        report = evaluate_recall(fetch_labeled_food_data(args.limit), chunk_rows=args.chunk_rows)
+        print(f"[EVAL] {report['rows_evaluated']} rows in chunks of {report['chunk_rows']} "
+              f"({report['rows_skipped_unknown_code']} skipped, code not in index)")
+        for k, recall in report['recall'].items():
+            print(f"  recall@{k}: {recall:.3f} per chunk prompt, {report['description_recall'][k]:.3f} per description")
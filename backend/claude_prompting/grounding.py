@@ -0,0 +1,103 @@
+import bisect
+import os
+import re
+
+from dotenv import load_dotenv
+
+from claude_prompting.row_repair import parse_rows, words
+
+# Load environment variables
+load_dotenv()
+
+# 'off', 'flag' (log rows not found in the source) or 'repair' (also re-ask their item lines)
+GROUNDING_MODE = os.getenv('GROUNDING_MODE', 'flag').lower()
+# Share of a row's description words that must occur in the chunk text
+GROUNDING_MIN_WORD_SHARE = float(os.getenv('GROUNDING_MIN_WORD_SHARE', '0.5'))
+# Ungrounded rows listed per log line
+GROUNDING_LOG_ROWS = 3
+
+# A comma is a thousands separator only when exactly 3 digits follow it; otherwise it separates cells
+NUMBER = re.compile(r'\d{1,3}(?:,\d{3}(?!\d))+(?:\.\d+)?|\d+(?:\.\d+)?|\.\d+')
+
+
+def cents(text):
+    """Whole cents of a number token ('1,250.50' -> 125050), or None"""
+    try:
+        return int(round(float(text.replace(',', '').replace('$', '')) * 100))
+    except ValueError:
+        return None
+
+
+class SourceGrounding:
+    """Hash sets of the numbers and words in one chunk's source text, for checking output rows against it.
+
+    Numbers are kept in cents, together with the dimes they round to either way, since the
+    model writes prices with one decimal place. Building the index is one regex pass over the
+    chunk; checking a row is a few set lookups and at most one binary search.
+    """
+
+    def __init__(self, text):
+        self.words = words(text)
+        self.numbers = set()
+        self.dimes = set()
+        for token in set(NUMBER.findall(text)):
+            value = cents(token)
+            if value is not None:
+                self.numbers.add(value)
+                self.dimes.update((value // 10 * 10, -(-value // 10) * 10))
+        self.sorted_numbers = sorted(self.numbers)
+
+    def has_price(self, value):
+        return value in self.numbers or value in self.dimes
+
+    def has_line_total(self, price, quantity):
+        """Whether a number in the text is within rounding of price x quantity (a unit price derived from a total)"""
+        low, high = (price - 5) * quantity, (price + 5) * quantity
+        position = bisect.bisect_left(self.sorted_numbers, low)
+        return position < len(self.sorted_numbers) and self.sorted_numbers[position] <= high
+
+    def check_row(self, values):
+        """Reasons a model row (MODEL_COLUMNS values) is not supported by the source; [] when grounded.
+
+        Description: enough of its words occur in the text. Price: in the text, or derived
+        from a line total in the text. Pack Size: every number in it occurs in the text.
+        Quantity and Foodcode are not checked; quantities default to 1 and codes come from the index.
+        """
+        description, price, quantity, pack_size = values[:4]
+        reasons = []
+        description_words = words(description)
+        if description_words and len(description_words & self.words) / len(description_words) < GROUNDING_MIN_WORD_SHARE:
+            reasons.append('description')
+        price_cents = cents(price) if price.strip() else None
+        if price_cents:
+            quantity_cents = cents(quantity) if quantity.strip() else None
+            derived = quantity_cents and quantity_cents % 100 == 0 and self.has_line_total(price_cents, quantity_cents // 100)
+            if not self.has_price(price_cents) and not derived:
+                reasons.append('price')
+        pack_numbers = [cents(token) for token in NUMBER.findall(pack_size)]
+        if any(value is not None and value not in self.numbers for value in pack_numbers):
+            reasons.append('pack size')
+        return reasons
+
+    def ungrounded(self, rows):
+        """(line, reasons) for each parsed row (line, values) that fails check_row"""
+        if not self.words:
+            return []
+        failures = []
+        for line, values in rows:
+            reasons = self.check_row(values)
+            if reasons:
+                failures.append((line, reasons))
+        return failures
+
+
+def ungrounded_rows(model_csv, text_chunk):
+    """Rows of model CSV output that are not grounded in the chunk text, as (line, reasons); logs a summary."""
+    if GROUNDING_MODE == 'off' or not text_chunk:
+        return []
+    rows, _bad_count = parse_rows(model_csv)
+    failures = SourceGrounding(text_chunk).ungrounded(rows)
+    if failures:
+        examples = '; '.join(f"{line[:60]} ({', '.join(reasons)})" for line, reasons in failures[:GROUNDING_LOG_ROWS])
+        print(f"[GROUNDING] {len(failures)}/{len(rows)} rows not found in the chunk text: {examples}")
+    return failures
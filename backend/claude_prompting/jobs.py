@@ -0,0 +1,251 @@
+import concurrent.futures
+import csv
+import io
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from claude_prompting.batch_processor import process_batch_from_urls
+from claude_prompting.progress import ProgressReporter
+
+# Load environment variables
+load_dotenv()
+
+# Uploads processed at once; further submissions wait in the executor queue
+JOB_MAX_WORKERS = int(os.getenv('JOB_MAX_WORKERS', '2'))
+# Finished jobs are forgotten after this long
+JOB_TTL_SECONDS = float(os.getenv('JOB_TTL_SECONDS', str(3600)))
+
+TERMINAL_STATUSES = ('succeeded', 'failed')
+CSV_HEADER = 'Description,Price,Quantity,Pack Size,Pack,Size,UOM,Foodcode'
+
+
+def upload_processed_csv(combined_csv):
+    """Store a finished CSV in the food-documents bucket. Returns (csv_filename, csv_url)."""
+    from data_fetching.supabase import supabase
+
+    # Create a timestamped filename
+    csv_filename = f"processed_{datetime.now().strftime('%Y%m%d%H%M%S')}.csv"
+
+    # Upload CSV bytes directly to Supabase
+    csv_bytes = combined_csv.encode('utf-8')
+    supabase.storage.from_('food-documents').upload(f'csvs/{csv_filename}', csv_bytes)
+
+    # Get the public URL of the uploaded CSV
+    csv_url = supabase.storage.from_('food-documents').get_public_url(f'csvs/{csv_filename}')
+    return csv_filename, csv_url
+
+
+def format_csv_row(values):
+    output = io.StringIO()
+    csv.writer(output, lineterminator='').writerow(values)
+    return output.getvalue()
+
+
+class Job:
+    """One /process-documents submission: status, per-file progress, partial rows and an event log."""
+
+    def __init__(self, file_urls):
+        self.id = uuid.uuid4().hex
+        self.file_urls = list(file_urls)
+        self.status = 'queued'
+        self.stage = 'queued'
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.error = None
+        self.result = None
+        # Per file (upload order): status, chunk counts and the validated output of each finished chunk
+        self.files = [{'url': url, 'status': 'pending', 'chunks_total': 0, 'chunks_done': 0, 'chunks': {}}
+                      for url in self.file_urls]
+        # Rows streamed for chunks that have not finished yet, keyed by (file_index, chunk_index)
+        self.streaming_rows = {}
+        # Event log in id order; row events of finished files are dropped, so ids can skip
+        self.events = []
+        self.last_event_id = -1
+        self._condition = threading.Condition()
+
+    def emit(self, event_type, **data):
+        with self._condition:
+            self.updated_at = time.time()
+            self.last_event_id += 1
+            self.events.append({'id': self.last_event_id, 'type': event_type, 'data': data})
+            self._condition.notify_all()
+
+    def wait_for_events(self, after_id, timeout):
+        """Events with id > after_id, waiting up to timeout seconds for the first one."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.last_event_id > after_id or self.finished, timeout)
+            start = len(self.events)
+            while start > 0 and self.events[start - 1]['id'] > after_id:
+                start -= 1
+            return self.events[start:]
+
+    def drop_row_events(self, file_index):
+        """Forget the row and reset events of a finished file; its rows are in partial_csv() and the result."""
+        with self._condition:
+            self.events = [event for event in self.events
+                           if not (event['type'] in ('row', 'reset') and event['data'].get('file') == file_index)]
+
+    @property
+    def finished(self):
+        return self.status in TERMINAL_STATUSES
+
+    def partial_csv(self):
+        """Header plus every row available so far, in file and chunk order.
+
+        Finished chunks contribute their validated output; chunks still streaming contribute
+        the rows received so far for their current attempt.
+        """
+        with self._condition:
+            lines = [CSV_HEADER]
+            for file_index, file_state in enumerate(self.files):
+                for chunk_index in range(file_state['chunks_total']):
+                    csv_output = file_state['chunks'].get(chunk_index)
+                    if csv_output is not None:
+                        lines.extend(line for line in csv_output.strip().split('\n')[1:] if line.strip())
+                    else:
+                        lines.extend(format_csv_row(values) for values in self.streaming_rows.get((file_index, chunk_index), []))
+            return '\n'.join(lines)
+
+    def to_dict(self):
+        with self._condition:
+            return {
+                'job_id': self.id,
+                'status': self.status,
+                'stage': self.stage,
+                'created_at': self.created_at,
+                'updated_at': self.updated_at,
+                'error': self.error,
+                'files': [
+                    {key: file_state[key] for key in ('url', 'status', 'chunks_total', 'chunks_done')}
+                    for file_state in self.files
+                ],
+                'result': self.result,
+            }
+
+
+class JobProgress(ProgressReporter):
+    """Records pipeline progress on a Job and emits it as events."""
+
+    def __init__(self, job):
+        self.job = job
+        self.file_index = {}
+
+    def _index(self, path):
+        return self.file_index.get(path)
+
+    def stage(self, name):
+        self.job.stage = name
+        self.job.emit('stage', stage=name)
+
+    def files_ready(self, paths):
+        self.file_index = {path: i for i, path in enumerate(paths)}
+
+    def file_started(self, path):
+        i = self._index(path)
+        if i is None:
+            return
+        self.job.files[i]['status'] = 'processing'
+        self.job.emit('file', file=i, status='processing')
+
+    def chunks_planned(self, path, count):
+        i = self._index(path)
+        if i is None:
+            return
+        self.job.files[i]['chunks_total'] = count
+        self.job.emit('file', file=i, status='processing', chunks_total=count)
+
+    def chunk_finished(self, path, index, csv_output):
+        i = self._index(path)
+        if i is None:
+            return
+        with self.job._condition:
+            file_state = self.job.files[i]
+            file_state['chunks'][index] = csv_output or ''
+            file_state['chunks_done'] = len(file_state['chunks'])
+            self.job.streaming_rows.pop((i, index), None)
+        self.job.emit('chunk', file=i, chunk=index, chunks_done=file_state['chunks_done'],
+                      chunks_total=file_state['chunks_total'], ok=bool(csv_output))
+
+    def row(self, path, chunk_index, values):
+        i = self._index(path)
+        if i is None:
+            return
+        with self.job._condition:
+            if values is None:
+                self.job.streaming_rows.pop((i, chunk_index), None)
+            else:
+                self.job.streaming_rows.setdefault((i, chunk_index), []).append(values)
+        if values is None:
+            self.job.emit('reset', file=i, chunk=chunk_index)
+        else:
+            self.job.emit('row', file=i, chunk=chunk_index, values=values)
+
+    def file_finished(self, path, csv_output):
+        i = self._index(path)
+        if i is None:
+            return
+        status = 'done' if csv_output else 'empty'
+        self.job.files[i]['status'] = status
+        self.job.drop_row_events(i)
+        self.job.emit('file', file=i, status=status)
+
+
+class JobManager:
+    """In-process background runner for document jobs.
+
+    Jobs live in memory, so they belong to the server process that accepted them.
+    """
+
+    def __init__(self, max_workers=JOB_MAX_WORKERS, ttl_seconds=JOB_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+
+    def submit(self, file_urls):
+        self._prune()
+        job = Job(file_urls)
+        with self._lock:
+            self._jobs[job.id] = job
+        job.emit('status', status='queued')
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job):
+        job.status = 'running'
+        job.emit('status', status='running')
+        try:
+            combined_csv = process_batch_from_urls(job.file_urls, progress=JobProgress(job))
+            if not combined_csv.strip():
+                raise RuntimeError('No CSV output generated')
+            csv_filename, csv_url = upload_processed_csv(combined_csv)
+            job.result = {
+                'csv_content': combined_csv,
+                'csvFileName': csv_filename,
+                'csvUrl': csv_url,
+            }
+            job.status = 'succeeded'
+            job.emit('status', status='succeeded', csvFileName=csv_filename, csvUrl=csv_url)
+        except Exception as e:
+            print(f"[JOB] {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = 'failed'
+            job.emit('status', status='failed', error=job.error)
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.updated_at < cutoff]:
+                del self._jobs[job_id]
+
+
+job_manager = JobManager()
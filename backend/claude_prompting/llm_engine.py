@@ -0,0 +1,310 @@
+import asyncio
+import inspect
+import json
+import os
+import queue
+import threading
+import time
+from types import SimpleNamespace
+
+import anthropic
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Account limits the scheduler keeps under (set these to the organization's tier)
+LLM_RPM_LIMIT = float(os.getenv('LLM_RPM_LIMIT', '50'))
+LLM_INPUT_TPM_LIMIT = float(os.getenv('LLM_INPUT_TPM_LIMIT', '40000'))
+LLM_OUTPUT_TPM_LIMIT = float(os.getenv('LLM_OUTPUT_TPM_LIMIT', '16000'))
+LLM_MIN_CONCURRENCY = int(os.getenv('LLM_MIN_CONCURRENCY', '1'))
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '16'))
+LLM_MAX_ATTEMPTS = int(os.getenv('LLM_MAX_ATTEMPTS', '5'))
+# A call this many times slower than the running average counts as congestion
+LLM_LATENCY_BACKOFF_FACTOR = float(os.getenv('LLM_LATENCY_BACKOFF_FACTOR', '2.5'))
+DEFAULT_RETRY_AFTER_SECONDS = 5.0
+INITIAL_OUTPUT_ESTIMATE = 4000
+THROTTLE_STATUS_CODES = (429, 529)
+
+
+def estimate_input_tokens(params):
+    text = json.dumps(params.get('system', '')) + json.dumps(params.get('messages', []))
+    return max(1, len(text) // 4)
+
+
+def retry_after_seconds(error):
+    """Seconds from a retry-after header, or None."""
+    response = getattr(error, 'response', None)
+    value = response.headers.get('retry-after') if response is not None else None
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def aborted_message(stream, parts):
+    """Message-like result for a stream closed early; usage is what the server reported so far."""
+    snapshot = getattr(stream, 'current_message_snapshot', None)
+    return SimpleNamespace(
+        content=[SimpleNamespace(type='text', text=''.join(parts))],
+        usage=getattr(snapshot, 'usage', None),
+        stop_reason='aborted',
+    )
+
+
+class TokenBucket:
+    """Per-minute budget that refills continuously. Debits may overdraw; callers then wait."""
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until amount (capped at capacity) is available."""
+        self._refill()
+        needed = min(amount, self.capacity) - self.level
+        return max(0.0, needed / self.rate) if self.rate else 0.0
+
+    def debit(self, amount):
+        self._refill()
+        self.level -= amount
+
+    def credit(self, amount):
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class AdaptiveConcurrency:
+    """AIMD concurrency window: +1 per window of clean calls, halve on throttling or congestion."""
+
+    def __init__(self, minimum=LLM_MIN_CONCURRENCY, maximum=LLM_MAX_CONCURRENCY, initial=None):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(initial or self.minimum * 2)
+        self.limit = min(max(self.limit, self.minimum), self.maximum)
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    async def increase(self):
+        async with self._condition:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+    def decrease(self):
+        self.limit = max(self.minimum, self.limit / 2)
+
+
+class LlmEngine:
+    """Process-wide scheduler for Messages API calls.
+
+    Runs one asyncio loop on a background thread. Every call from any request thread goes
+    through the same RPM / input-TPM / output-TPM budgets and AIMD concurrency window, so
+    simultaneous uploads share the account's rate limit instead of each assuming all of it.
+    The client may be anthropic.AsyncAnthropic or any object with a sync messages.create.
+    """
+
+    def __init__(self, client, rpm=LLM_RPM_LIMIT, input_tpm=LLM_INPUT_TPM_LIMIT,
+                 output_tpm=LLM_OUTPUT_TPM_LIMIT, max_attempts=LLM_MAX_ATTEMPTS):
+        self.client = client
+        self.max_attempts = max_attempts
+        self.requests_bucket = TokenBucket(rpm)
+        self.input_bucket = TokenBucket(input_tpm)
+        self.output_bucket = TokenBucket(output_tpm)
+        self.concurrency = AdaptiveConcurrency()
+        self.paused_until = 0.0
+        self.output_estimate = float(INITIAL_OUTPUT_ESTIMATE)
+        self.latency_average = None
+        self.last_decrease = 0.0
+        self.counters = {'calls': 0, 'throttled': 0, 'congested': 0, 'failed': 0}
+        self._budget_lock = asyncio.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='llm-engine', daemon=True)
+        self._thread.start()
+
+    # ----- public, thread-safe -----
+    def submit(self, params):
+        """Schedule one messages.create call; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(self.create_message_async(params), self._loop)
+
+    def create_message(self, params):
+        """Blocking call for worker threads."""
+        return self.submit(params).result()
+
+    def stream_message(self, params, on_text):
+        """Blocking streamed call. on_text(delta) runs as text arrives; returning False aborts the stream.
+
+        on_text runs on the calling thread: the engine loop only queues deltas, so a slow
+        consumer holds up its own call and not every other call in flight. Returns the final
+        message, or for an aborted stream a message-like object with the partial text and
+        stop_reason 'aborted'.
+        """
+        deltas = queue.Queue()
+        stop = threading.Event()
+
+        def forward(text):
+            deltas.put(text)
+            return not stop.is_set()
+
+        future = asyncio.run_coroutine_threadsafe(self.stream_message_async(params, forward), self._loop)
+        future.add_done_callback(lambda _future: deltas.put(None))
+        try:
+            while True:
+                text = deltas.get()
+                if text is None:
+                    break
+                if not stop.is_set() and on_text(text) is False:
+                    stop.set()
+        except BaseException:
+            stop.set()
+            raise
+        return future.result()
+
+    def stats(self):
+        return {
+            **self.counters,
+            'concurrency_limit': int(self.concurrency.limit),
+            'in_flight': self.concurrency.in_flight,
+            'avg_latency_seconds': round(self.latency_average or 0.0, 2),
+        }
+
+    # ----- scheduler -----
+    async def _reserve_budget(self, input_tokens, output_tokens):
+        # One waiter at a time keeps reservations in arrival order
+        async with self._budget_lock:
+            while True:
+                wait = max(
+                    self.paused_until - time.monotonic(),
+                    self.requests_bucket.wait_time(1),
+                    self.input_bucket.wait_time(input_tokens),
+                    self.output_bucket.wait_time(output_tokens),
+                )
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            self.requests_bucket.debit(1)
+            self.input_bucket.debit(input_tokens)
+            self.output_bucket.debit(output_tokens)
+
+    def _reconcile(self, usage, input_estimate, output_estimate):
+        actual_input = int(getattr(usage, 'input_tokens', 0) or 0) + int(getattr(usage, 'cache_creation_input_tokens', 0) or 0)
+        actual_output = int(getattr(usage, 'output_tokens', 0) or 0)
+        self.input_bucket.credit(input_estimate - actual_input)
+        self.output_bucket.credit(output_estimate - actual_output)
+        self.output_estimate = 0.8 * self.output_estimate + 0.2 * actual_output
+
+    async def _send(self, params):
+        if inspect.iscoroutinefunction(self.client.messages.create):
+            return await self.client.messages.create(**params)
+        return await self._loop.run_in_executor(None, lambda: self.client.messages.create(**params))
+
+    async def _stream(self, params, on_text):
+        if inspect.iscoroutinefunction(self.client.messages.create):
+            async with self.client.messages.stream(**params) as stream:
+                parts = []
+                async for text in stream.text_stream:
+                    parts.append(text)
+                    if on_text(text) is False:
+                        return aborted_message(stream, parts)
+                return await stream.get_final_message()
+        return await self._loop.run_in_executor(None, lambda: self._stream_sync(params, on_text))
+
+    def _stream_sync(self, params, on_text):
+        with self.client.messages.stream(**params) as stream:
+            parts = []
+            for text in stream.text_stream:
+                parts.append(text)
+                if on_text(text) is False:
+                    return aborted_message(stream, parts)
+            return stream.get_final_message()
+
+    def _decrease_concurrency(self):
+        # Calls already in flight when the limit dropped report the same congestion; halve once per round trip
+        now = time.monotonic()
+        if now - self.last_decrease >= (self.latency_average or 1.0):
+            self.concurrency.decrease()
+            self.last_decrease = now
+
+    async def _on_throttled(self, error, attempt):
+        self.counters['throttled'] += 1
+        self._decrease_concurrency()
+        delay = retry_after_seconds(error)
+        if delay is None:
+            delay = DEFAULT_RETRY_AFTER_SECONDS * (2 ** attempt)
+        self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        print(f"[LLM ENGINE] Throttled ({getattr(error, 'status_code', '?')}), pausing {delay:.1f}s, "
+              f"concurrency -> {int(self.concurrency.limit)}")
+
+    async def _on_success(self, latency):
+        if self.latency_average is not None and latency > LLM_LATENCY_BACKOFF_FACTOR * self.latency_average:
+            self.counters['congested'] += 1
+            self._decrease_concurrency()
+        else:
+            await self.concurrency.increase()
+        self.latency_average = latency if self.latency_average is None else 0.8 * self.latency_average + 0.2 * latency
+
+    async def create_message_async(self, params):
+        return await self._schedule(params, self._send)
+
+    async def stream_message_async(self, params, on_text):
+        return await self._schedule(params, lambda request: self._stream(request, on_text))
+
+    async def _schedule(self, params, send):
+        input_estimate = estimate_input_tokens(params)
+        for attempt in range(self.max_attempts):
+            output_estimate = min(params.get('max_tokens', INITIAL_OUTPUT_ESTIMATE), int(self.output_estimate))
+            await self.concurrency.acquire()
+            try:
+                await self._reserve_budget(input_estimate, output_estimate)
+                started = time.monotonic()
+                try:
+                    response = await send(params)
+                except Exception as e:
+                    # Nothing was processed; return the reservation
+                    self.input_bucket.credit(input_estimate)
+                    self.output_bucket.credit(output_estimate)
+                    throttled = isinstance(e, anthropic.APIStatusError) and getattr(e, 'status_code', None) in THROTTLE_STATUS_CODES
+                    if not throttled or attempt == self.max_attempts - 1:
+                        self.counters['failed'] += 1
+                        raise
+                    await self._on_throttled(e, attempt)
+                    continue
+                self.counters['calls'] += 1
+                self._reconcile(getattr(response, 'usage', None), input_estimate, output_estimate)
+                if getattr(response, 'stop_reason', None) != 'aborted':
+                    await self._on_success(time.monotonic() - started)
+                return response
+            finally:
+                await self.concurrency.release()
+        raise RuntimeError("LLM engine retries exhausted")
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_llm_engine(client=None):
+    """Process-wide engine, created on first use with an AsyncAnthropic client."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            # The engine owns retries so that retry-after feeds the shared scheduler
+            client = client or anthropic.AsyncAnthropic(api_key=os.getenv('ANTHROPIC_API_KEY'), max_retries=0)
+            _engine = LlmEngine(client)
+        return _engine
@@ -0,0 +1,42 @@
+import threading
+
+
+class LlmUsageTracker:
+    """Thread-safe running totals of token usage, including prompt-cache reads and writes."""
+
+    FIELDS = ('input_tokens', 'output_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.totals = {field: 0 for field in self.FIELDS}
+
+    def record(self, usage, label="call"):
+        """Add one response's usage and log it. Returns the per-call counts."""
+        counts = {field: int(getattr(usage, field, 0) or 0) for field in self.FIELDS}
+        with self._lock:
+            self.calls += 1
+            for field, value in counts.items():
+                self.totals[field] += value
+        print(f"[USAGE] {label}: in={counts['input_tokens']} out={counts['output_tokens']} "
+              f"cache_write={counts['cache_creation_input_tokens']} cache_read={counts['cache_read_input_tokens']}")
+        return counts
+
+    def snapshot(self):
+        with self._lock:
+            return {'calls': self.calls, **self.totals}
+
+    def summary(self):
+        stats = self.snapshot()
+        prompt_tokens = stats['input_tokens'] + stats['cache_creation_input_tokens'] + stats['cache_read_input_tokens']
+        cached_share = (stats['cache_read_input_tokens'] / prompt_tokens) if prompt_tokens else 0.0
+        return (f"{stats['calls']} calls, {stats['input_tokens']} input, {stats['output_tokens']} output, "
+                f"{stats['cache_creation_input_tokens']} cache-write, {stats['cache_read_input_tokens']} cache-read tokens "
+                f"({cached_share:.0%} of prompt tokens served from cache)")
+
+
+llm_usage = LlmUsageTracker()
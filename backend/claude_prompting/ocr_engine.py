@@ -0,0 +1,99 @@
+import os
+import queue
+import threading
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# 'auto' uses the in-process tesserocr pool when it is installed, else the pytesseract subprocess path
+OCR_BACKEND = os.getenv('OCR_BACKEND', 'auto').lower()
+OCR_LANG = os.getenv('OCR_LANG', 'eng')
+OCR_POOL_SIZE = int(os.getenv('OCR_POOL_SIZE', str(os.cpu_count() or 1)))
+
+
+class OcrBackend:
+    """Common interface for OCR engines used by image and scanned-PDF extraction."""
+    name = 'base'
+
+    def image_to_string(self, image):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SubprocessOcrBackend(OcrBackend):
+    """pytesseract: spawns a tesseract process and writes temp files for every image."""
+    name = 'pytesseract'
+
+    def __init__(self, lang=OCR_LANG):
+        import pytesseract
+        self._pytesseract = pytesseract
+        self.lang = lang
+
+    def image_to_string(self, image):
+        return self._pytesseract.image_to_string(image, lang=self.lang)
+
+
+class TesserocrPoolBackend(OcrBackend):
+    """Warm pool of long-lived tesserocr engines.
+
+    Language data is loaded once per engine and engines are reused across
+    requests. tesserocr releases the GIL while recognizing, so callers on
+    different threads run in parallel up to the pool size.
+    """
+    name = 'tesserocr'
+
+    def __init__(self, lang=OCR_LANG, pool_size=OCR_POOL_SIZE):
+        import tesserocr
+        self.pool_size = max(1, pool_size)
+        self._engines = queue.Queue()
+        self._all_engines = []
+        for _ in range(self.pool_size):
+            engine = tesserocr.PyTessBaseAPI(lang=lang)
+            self._all_engines.append(engine)
+            self._engines.put(engine)
+
+    def image_to_string(self, image):
+        engine = self._engines.get()
+        try:
+            engine.SetImage(image)
+            return engine.GetUTF8Text()
+        finally:
+            engine.Clear()
+            self._engines.put(engine)
+
+    def close(self):
+        for engine in self._all_engines:
+            engine.End()
+        self._all_engines = []
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_ocr_backend(name=OCR_BACKEND, pool_size=OCR_POOL_SIZE):
+    if name in ('tesserocr', 'auto'):
+        try:
+            return TesserocrPoolBackend(pool_size=pool_size)
+        except ImportError:
+            if name == 'tesserocr':
+                raise
+        except Exception as e:
+            if name == 'tesserocr':
+                raise
+            print(f"[OCR] tesserocr pool unavailable ({e}), falling back to pytesseract")
+    return SubprocessOcrBackend()
+
+
+def get_ocr_backend(pool_size=OCR_POOL_SIZE):
+    """Process-wide OCR backend, created on first use and reused afterwards."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_ocr_backend(pool_size=pool_size)
+            print(f"[OCR] Using {_backend.name} backend")
+        return _backend
@@ -0,0 +1,267 @@
+import argparse
+import csv
+import glob
+import hashlib
+import os
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+PACK_SIZE_CORPUS_PATH = os.path.join(os.path.dirname(__file__), '../foodCodes/pack_size_corpus.csv')
+# Distinct pack sizes kept when building the corpus from workbooks, most common first
+CORPUS_SIZE = 300
+# Parses below this confidence are logged for review
+PACK_SIZE_MIN_CONFIDENCE = float(os.getenv('PACK_SIZE_MIN_CONFIDENCE', '0.8'))
+
+UNIT_ALIASES = {
+    '#': 'LB', 'LBS': 'LB', 'POUND': 'LB', 'POUNDS': 'LB', 'OUNCE': 'OZ', 'OUNCES': 'OZ',
+    'COUNT': 'CT', 'CNT': 'CT', 'EACH': 'EA', 'GALLON': 'GAL', 'GALLONS': 'GAL', 'GL': 'GAL',
+    'QUART': 'QT', 'PINT': 'PT', 'LITER': 'L', 'LTR': 'L', 'LT': 'L', 'DOZ': 'DZ', 'DOZEN': 'DZ',
+    'PCS': 'PC', 'KGS': 'KG', 'GR': 'G', 'GM': 'G', 'CN': 'CAN', 'CANS': 'CAN',
+    'CASE': 'CS', 'CASES': 'CS', 'BAGS': 'BAG', 'Z': 'OZ',
+}
+KNOWN_UNITS = {'LB', 'OZ', 'FLOZ', 'CT', 'EA', 'GAL', 'QT', 'PT', 'L', 'ML', 'KG', 'G', 'DZ', 'PC', 'CAN',
+               'CS', 'PK', 'BAG', 'BOX'}
+# Trailing words for catch-weight or approximate sizes ("4/5 LB AVG")
+QUALIFIERS = {'AVG', 'AV', 'APPROX', 'UP', 'RW', 'CW', 'PLUS', '+'}
+# Trailing container words after a unit ("25 LB BAG", "12 CT/CS") say nothing about the size
+CONTAINERS = {'BAG', 'BAGS', 'BOX', 'CS', 'CASE', 'CASES', 'CTN', 'PAIL', 'TUB', 'JUG', 'BTL', 'PCH', 'POUCH', 'TRAY'}
+# A piece count after a weight ("25LB/100CT", "6/5#-160CT") is a qualifier; the weight is the size
+COUNT_SUFFIX = re.compile(r'(?P<weight>LBS?|OZ|KG|#)\s*[/-]\s*\d+\s*(?:CT|EA|PCS?)?$')
+
+NUMBER = r'\d+(?:\.\d+)?|\.\d+'
+UNIT = r'FL\s*OZ|[A-Z]+|#'
+# Grammar, tried in order: (name, pattern, confidence when the unit is known)
+PATTERNS = [
+    ('can', re.compile(rf'^(?:(?P<pack>\d+)\s*/\s*)?#\s*(?P<size>{NUMBER})\s*(?:CANS?|CN)?$'), 1.0),
+    ('pack_fraction', re.compile(rf'^(?P<pack>\d+)\s*/\s*(?P<numerator>\d+)\s*/\s*(?P<denominator>\d+)\s*(?P<unit>{UNIT})$'), 0.9),
+    ('pack_size', re.compile(rf'^(?P<pack>\d+)\s*[/X]\s*(?P<size>{NUMBER})(?:\s*-\s*(?P<size_to>{NUMBER}))?\s*(?P<unit>{UNIT})?$'), 1.0),
+    ('size', re.compile(rf'^(?P<size>{NUMBER})(?:\s*-\s*(?P<size_to>{NUMBER}))?\s*(?P<unit>{UNIT})$'), 0.95),
+]
+UNPARSED = (None, None, '', 0.0)
+# A bare container ("CASE", "1/CS") is a pack with no size; a bare unit ("GALLON") is one of that unit
+CONTAINER_CONFIDENCE = 0.8
+PACK_ONLY_CONFIDENCE = 0.5
+
+
+def normalize(text):
+    text = re.sub(r'\s+', ' ', str(text).upper().replace('$', '')).strip()
+    text = re.sub(r'(?<=[A-Z])\.', '', text)
+    # "12 X 16 OZ" and "12x16oz" mean 12/16OZ
+    return re.sub(r'(?<=\d)\s*X\s*(?=[\d.#])', '/', text)
+
+
+def standard_unit(unit):
+    unit = (unit or '').replace(' ', '').replace('.', '')
+    return UNIT_ALIASES.get(unit, unit)
+
+
+def parse_pack_size(text):
+    """(pack, size, uom, confidence) for one Pack Size string like '12/16OZ', '6/#10' or '200CT'.
+
+    Pack defaults to 1 when only a size is given; a #N can is Size N with UOM CAN. A container
+    with no size ('CASE', '1/CS') is that pack with the container as UOM and no Size; a bare
+    unit ('GALLON') is Size 1 of it. Confidence is 1.0 for a full match with a known unit and
+    drops for ranges, qualifiers, unknown or missing units; text outside the grammar returns
+    (None, None, '', 0.0).
+    """
+    if text is None or (isinstance(text, float) and np.isnan(text)):
+        return UNPARSED
+    body, counted = COUNT_SUFFIX.subn(r'\g<weight>', normalize(text))
+    words = re.sub(r'/(?=[A-Z]+$)', ' ', body).split(' ')
+    qualified = bool(counted)
+    container = ''
+    while len(words) > 1 and words[-1] in QUALIFIERS | CONTAINERS:
+        word = words.pop()
+        qualified = qualified or word in QUALIFIERS
+        container = standard_unit(word) if word in CONTAINERS else container
+    body = ' '.join(words)
+    if not body:
+        return UNPARSED
+    if body in CONTAINERS:
+        return 1.0, None, standard_unit(body), CONTAINER_CONFIDENCE
+    if standard_unit(body) in KNOWN_UNITS:
+        return 1.0, 1.0, standard_unit(body), CONTAINER_CONFIDENCE
+    if body.isdigit():
+        confidence = CONTAINER_CONFIDENCE if container else PACK_ONLY_CONFIDENCE
+        return float(body), None, container, confidence if int(body) > 0 else 0.3
+
+    for name, pattern, confidence in PATTERNS:
+        match = pattern.match(body)
+        if not match:
+            continue
+        parts = match.groupdict()
+        pack = float(parts['pack']) if parts.get('pack') else 1.0
+        if name == 'can':
+            size, unit = float(parts['size']), 'CAN'
+            confidence = confidence if parts.get('pack') else 0.95
+        elif name == 'pack_fraction':
+            size, unit = float(parts['numerator']) / float(parts['denominator']), standard_unit(parts['unit'])
+        else:
+            size, unit = float(parts['size']), standard_unit(parts['unit'])
+            size_to = float(parts['size_to']) if parts['size_to'] else None
+            if size_to is not None and name == 'size' and size_to < size and size.is_integer():
+                # A range runs low to high, so "12-2.5LB" is 12/2.5LB
+                pack, size = size, size_to
+                confidence *= 0.9
+            elif size_to is not None:
+                size = (size + size_to) / 2
+                confidence *= 0.7
+            if unit == 'M':
+                # 1M is a thousand count (napkins, cups, film)
+                size, unit = size * 1000, 'CT'
+        if not unit:
+            confidence = 0.5
+        elif unit not in KNOWN_UNITS:
+            confidence *= 0.6
+        if qualified:
+            confidence *= 0.9
+        if pack <= 0 or size <= 0:
+            confidence = min(confidence, 0.3)
+        return pack, size, unit, round(confidence, 2)
+    return UNPARSED
+
+
+def parse_pack_sizes(values):
+    """Bulk parse of a Series of Pack Size strings.
+
+    Returns a DataFrame (same index) with Pack and Size as float64, UOM and Confidence. Each
+    distinct string is parsed once; invoices repeat the same few pack sizes on most rows.
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = [parse_pack_size(value) for value in uniques] + [UNPARSED]
+    columns = list(zip(*parsed))
+    result = pd.DataFrame({
+        'Pack': np.array(columns[0], dtype='float64').take(codes),
+        'Size': np.array(columns[1], dtype='float64').take(codes),
+        'UOM': np.array(columns[2], dtype=object).take(codes),
+        'Confidence': np.array(columns[3], dtype='float64').take(codes),
+    }, index=values.index)
+    result['UOM'] = result['UOM'].replace('', np.nan)
+    return result
+
+
+def number_text(value):
+    """'' for a missing number, '12' for whole numbers, '0.5' otherwise."""
+    if value is None or np.isnan(value):
+        return ''
+    return str(int(value)) if float(value).is_integer() else f"{value:g}"
+
+
+# ======================= Corpus =======================
+def load_corpus(path=PACK_SIZE_CORPUS_PATH):
+    with open(path, 'r', newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def evaluate_corpus(rows, min_confidence=PACK_SIZE_MIN_CONFIDENCE):
+    """Exact-match accuracy of the parser against labelled rows (pack_size, pack, size, uom)."""
+    parsed = parse_pack_sizes(pd.Series([row['pack_size'] for row in rows], dtype=object))
+    correct = []
+    failures = []
+    for row, (_, result) in zip(rows, parsed.iterrows()):
+        expected = (row['pack'], row['size'], row['uom'].upper())
+        actual = (number_text(result['Pack']), number_text(result['Size']),
+                  '' if pd.isna(result['UOM']) else result['UOM'])
+        correct.append(expected == actual)
+        if expected != actual:
+            failures.append((row['pack_size'], expected, actual, result['Confidence']))
+    correct = np.array(correct)
+    confident = parsed['Confidence'].to_numpy() >= min_confidence
+    return {
+        'rows': len(rows),
+        'accuracy': correct.mean() if len(rows) else 0.0,
+        'coverage': confident.mean() if len(rows) else 0.0,
+        'confident_accuracy': correct[confident].mean() if confident.any() else 0.0,
+        'failures': failures,
+    }
+
+
+def food_data_labels():
+    """{Pack_size: Counter of stored (pack, size, uom)} over the food_data table."""
+    from claude_prompting.unit_conversion import fetch_food_data
+    labels = {}
+    for row in fetch_food_data('Pack_size,Pack,Size,UOM'):
+        pack_size = (row.get('Pack_size') or '').strip()
+        if pack_size:
+            label = (number_text(float(row['Pack'] or 0) or None), number_text(float(row['Size'] or 0) or None),
+                     (row.get('UOM') or '').strip().upper())
+            labels.setdefault(pack_size, Counter())[label] += 1
+    return labels
+
+
+def workbook_labels(root, limit=CORPUS_SIZE):
+    """{Pack Size cell: Counter of the parser's (pack, size, uom)} for the limit most common cells in the
+    pack size columns of the bid workbooks under root. Copies of one workbook are read once.
+
+    These labels are proposals: review and correct them before committing the corpus.
+    """
+    from claude_prompting.bid_tabulation import detect_header
+    from claude_prompting.spreadsheet_reader import read_spreadsheet_cells
+    counts = Counter()
+    seen = set()
+    for workbook in sorted(glob.glob(os.path.join(root, '**', '*.xlsx'), recursive=True)):
+        with open(workbook, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        if digest in seen:
+            continue
+        seen.add(digest)
+        try:
+            sheets = read_spreadsheet_cells(workbook)
+        except Exception as e:
+            print(f"[PACK SIZE] Skipping {workbook}: {e}")
+            continue
+        for _sheet_name, rows in sheets:
+            header_index, roles, _score = detect_header(rows)
+            if header_index is None or 'pack_size' not in roles:
+                continue
+            column = roles['pack_size'][0]
+            counts.update(cells[column].strip() for cells in rows[header_index + 1:]
+                          if column < len(cells) and cells[column].strip())
+    labels = {}
+    for pack_size, count in counts.most_common(limit):
+        pack, size, uom, _confidence = parse_pack_size(pack_size)
+        labels[pack_size] = Counter({(number_text(pack), number_text(size), uom): count})
+    return labels
+
+
+def build_corpus(path=PACK_SIZE_CORPUS_PATH, workbook_dir=None, limit=CORPUS_SIZE):
+    """Write distinct Pack Size values with their most common label, for review.
+
+    Labels are the stored Pack/Size/UOM of food_data rows, or with workbook_dir the parser's
+    reading of the most common Pack Size cells in the bid workbooks there.
+    """
+    labels = workbook_labels(workbook_dir, limit) if workbook_dir else food_data_labels()
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['pack_size', 'pack', 'size', 'uom'])
+        for pack_size in sorted(labels):
+            writer.writerow([pack_size, *labels[pack_size].most_common(1)[0][0]])
+    print(f"[PACK SIZE] Wrote {len(labels)} distinct pack sizes to {path}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pack Size parser')
+    parser.add_argument('--query', help='Parse one Pack Size string')
+    parser.add_argument('--build-corpus', action='store_true', help='Rebuild the corpus from food_data.Pack_size')
+    parser.add_argument('--workbooks', help='With --build-corpus, read Pack Size cells from the bid workbooks under this directory instead')
+    parser.add_argument('--corpus-size', type=int, default=CORPUS_SIZE, help='Pack sizes kept from --workbooks')
+    args = parser.parse_args()
+
+    if args.query:
+        print(parse_pack_size(args.query))
+    elif args.build_corpus:
+        build_corpus(workbook_dir=args.workbooks, limit=args.corpus_size)
+    else:
+        report = evaluate_corpus(load_corpus())
+        print(f"[EVAL] {report['rows']} pack sizes: accuracy {report['accuracy']:.3f}, "
+              f"{report['coverage']:.3f} at confidence >= {PACK_SIZE_MIN_CONFIDENCE} "
+              f"with accuracy {report['confident_accuracy']:.3f}")
+        for pack_size, expected, actual, confidence in report['failures']:
+            print(f"  {pack_size!r}: expected {expected}, got {actual} (confidence {confidence})")
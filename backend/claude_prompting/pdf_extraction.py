@@ -0,0 +1,210 @@
+import concurrent.futures
+import multiprocessing
+import os
+import re
+import string
+import threading
+
+from PyPDF2 import PdfReader
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+PDF_EXTRACTION_WORKERS = int(os.getenv('PDF_EXTRACTION_WORKERS', str(os.cpu_count() or 1)))
+# Below this page count the process pool start-up costs more than it saves
+PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '16'))
+# Shards per worker, so one slow shard doesn't leave the other cores idle
+SHARDS_PER_WORKER = 4
+
+# Scanned-page routing: pages whose text layer scores below PDF_OCR_MIN_QUALITY are OCR'd
+PDF_OCR_ENABLED = os.getenv('PDF_OCR_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+PDF_OCR_MIN_QUALITY = float(os.getenv('PDF_OCR_MIN_QUALITY', '0.5'))
+PDF_OCR_DPI = int(os.getenv('PDF_OCR_DPI', '300'))
+MIN_TEXT_LAYER_CHARS = 40
+
+PRINTABLE_CHARS = set(string.printable)
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def get_process_pool(max_workers=PDF_EXTRACTION_WORKERS):
+    """Shared process pool for CPU-bound page parsing.
+
+    Uses spawn so forking from a multi-threaded Flask worker can't deadlock the children.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != max_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _pool_workers = max_workers
+        return _pool
+
+
+def extract_page_range(pdf_path, start, stop):
+    """Extract text for pages [start, stop). Runs inside a pool worker, so it re-opens the PDF."""
+    reader = PdfReader(pdf_path)
+    texts = []
+    for page_number in range(start, stop):
+        try:
+            texts.append(reader.pages[page_number].extract_text() or "")
+        except Exception as e:
+            print(f"[PDF ERROR] Page {page_number + 1} of {pdf_path}: {e}")
+            texts.append("")
+    return texts
+
+
+def score_text_layer(text):
+    """Score 0..1 for how usable a page's embedded text layer is.
+
+    Empty pages, unmapped glyphs like "(cid:12)", and runs of symbols from broken
+    font encodings all score low; ordinary invoice text scores close to 1.
+    """
+    stripped = text.strip()
+    if len(stripped) < MIN_TEXT_LAYER_CHARS:
+        return 0.0
+
+    cid_glyphs = len(re.findall(r'\(cid:\d+\)', stripped))
+    if cid_glyphs:
+        stripped = re.sub(r'\(cid:\d+\)', '', stripped)
+        if len(stripped) < MIN_TEXT_LAYER_CHARS:
+            return 0.0
+
+    visible = [c for c in stripped if not c.isspace()]
+    if not visible:
+        return 0.0
+    printable_ratio = sum(1 for c in visible if c in PRINTABLE_CHARS) / len(visible)
+    alnum_ratio = sum(1 for c in visible if c.isalnum()) / len(visible)
+    word_chars = sum(len(word) for word in re.findall(r'[A-Za-z]{2,}|\d+(?:\.\d+)?', stripped))
+    word_ratio = word_chars / len(visible)
+
+    cid_penalty = 1.0 / (1.0 + cid_glyphs / 10.0)
+    return round(printable_ratio * min(1.0, alnum_ratio / 0.6) * min(1.0, word_ratio / 0.5) * cid_penalty, 3)
+
+
+def rasterize_pdf_page(pdf_path, page_number, dpi=PDF_OCR_DPI):
+    """Render one page to a PIL image using pypdfium2, falling back to pdf2image/poppler."""
+    try:
+        import pypdfium2 as pdfium
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            page = pdf[page_number]
+            return page.render(scale=dpi / 72).to_pil()
+        finally:
+            pdf.close()
+    except ImportError:
+        from pdf2image import convert_from_path
+        images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number + 1, last_page=page_number + 1)
+        return images[0]
+
+
+# OCR engine of a process-pool worker; separate from the process-wide get_ocr_backend() pool
+_worker_ocr_backend = None
+
+
+def ocr_pdf_page(pdf_path, page_number, dpi=PDF_OCR_DPI, backend=None):
+    """Rasterize and OCR one page, with the process-wide OCR backend unless one is given."""
+    from claude_prompting.ocr_engine import get_ocr_backend
+    image = rasterize_pdf_page(pdf_path, page_number, dpi)
+    return (backend or get_ocr_backend()).image_to_string(image)
+
+
+def ocr_pdf_page_in_worker(pdf_path, page_number, dpi=PDF_OCR_DPI):
+    """ocr_pdf_page for a pool worker, which keeps one warm engine of its own."""
+    global _worker_ocr_backend
+    if _worker_ocr_backend is None:
+        from claude_prompting.ocr_engine import create_ocr_backend
+        _worker_ocr_backend = create_ocr_backend(pool_size=1)
+    return ocr_pdf_page(pdf_path, page_number, dpi, _worker_ocr_backend)
+
+
+def ocr_low_quality_pages(pdf_path, pages, max_workers=PDF_EXTRACTION_WORKERS,
+                          min_quality=PDF_OCR_MIN_QUALITY, dpi=PDF_OCR_DPI):
+    """Replace pages without a usable text layer with OCR output, keeping page order."""
+    scores = [score_text_layer(text) for text in pages]
+    ocr_targets = [i for i, score in enumerate(scores) if score < min_quality]
+    if not ocr_targets:
+        return pages
+
+    print(f"[PDF OCR] {len(ocr_targets)}/{len(pages)} pages of {pdf_path} lack a usable text layer, OCR at {dpi} DPI")
+    merged = list(pages)
+
+    if max_workers <= 1 or len(ocr_targets) == 1:
+        for i in ocr_targets:
+            merged[i] = ocr_page_or_keep(pdf_path, i, dpi, pages[i])
+        return merged
+
+    pool = get_process_pool(max_workers)
+    futures = {pool.submit(ocr_pdf_page_in_worker, pdf_path, i, dpi): i for i in ocr_targets}
+    for future in concurrent.futures.as_completed(futures):
+        i = futures[future]
+        try:
+            ocr_text = future.result()
+        except Exception as e:
+            print(f"[PDF OCR ERROR] Page {i + 1} of {pdf_path}: {e}")
+            continue
+        if ocr_text.strip():
+            merged[i] = ocr_text
+    return merged
+
+
+def ocr_page_or_keep(pdf_path, page_number, dpi, fallback_text):
+    try:
+        ocr_text = ocr_pdf_page(pdf_path, page_number, dpi)
+    except Exception as e:
+        print(f"[PDF OCR ERROR] Page {page_number + 1} of {pdf_path}: {e}")
+        return fallback_text
+    return ocr_text if ocr_text.strip() else fallback_text
+
+
+def page_shards(page_count, workers):
+    """Split page_count into contiguous (start, stop) ranges."""
+    shard_count = max(1, min(page_count, workers * SHARDS_PER_WORKER))
+    shard_size = -(-page_count // shard_count)
+    return [(start, min(start + shard_size, page_count)) for start in range(0, page_count, shard_size)]
+
+
+def extract_pdf_pages(pdf_path, max_workers=PDF_EXTRACTION_WORKERS, min_pages_for_parallel=PDF_PARALLEL_MIN_PAGES,
+                      ocr=PDF_OCR_ENABLED):
+    """Return a list with the text of each page, in page order.
+
+    Large PDFs are sharded across a process pool so parsing scales with cores
+    instead of being serialized by the GIL. With ocr=True, pages whose text
+    layer scores poorly (scanned invoices) are rasterized and OCR'd instead.
+    """
+    pages = extract_text_layer_pages(pdf_path, max_workers, min_pages_for_parallel)
+    if ocr and pages:
+        pages = ocr_low_quality_pages(pdf_path, pages, max_workers)
+    return pages
+
+
+def extract_text_layer_pages(pdf_path, max_workers=PDF_EXTRACTION_WORKERS, min_pages_for_parallel=PDF_PARALLEL_MIN_PAGES):
+    """Embedded text layer of each page, page-parallel for large PDFs."""
+    page_count = len(PdfReader(pdf_path).pages)
+    if page_count == 0:
+        return []
+
+    if max_workers <= 1 or page_count < min_pages_for_parallel:
+        return extract_page_range(pdf_path, 0, page_count)
+
+    shards = page_shards(page_count, max_workers)
+    print(f"[PDF] Extracting {page_count} pages from {pdf_path} in {len(shards)} shards on {max_workers} workers")
+
+    pool = get_process_pool(max_workers)
+    futures = [pool.submit(extract_page_range, pdf_path, start, stop) for start, stop in shards]
+
+    pages = []
+    for (start, stop), future in zip(shards, futures):
+        try:
+            pages.extend(future.result())
+        except Exception as e:
+            print(f"[PDF ERROR] Shard {start + 1}-{stop} of {pdf_path} failed, retrying inline: {e}")
+            pages.extend(extract_page_range(pdf_path, start, stop))
+    return pages
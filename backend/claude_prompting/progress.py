@@ -0,0 +1,30 @@
+class ProgressReporter:
+    """No-op progress hooks for the processing pipeline.
+
+    batch_processor calls these from its worker threads; subclasses (see jobs.JobProgress)
+    must be thread-safe. Files are identified by their local path.
+    """
+
+    def stage(self, name):
+        """Pipeline stage: 'downloading', 'processing' or 'finalizing'."""
+
+    def files_ready(self, paths):
+        """Downloads finished; paths are in upload order."""
+
+    def file_started(self, path):
+        pass
+
+    def chunks_planned(self, path, count):
+        pass
+
+    def chunk_finished(self, path, index, csv_output):
+        """A chunk's validated 8-column CSV (header included), or '' if it failed."""
+
+    def row(self, path, chunk_index, values):
+        """A streamed data row (list of 8 strings); None voids the chunk's rows from the previous attempt."""
+
+    def file_finished(self, path, csv_output):
+        pass
+
+
+NULL_PROGRESS = ProgressReporter()
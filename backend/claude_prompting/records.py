@@ -0,0 +1,154 @@
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+
+from claude_prompting.pack_size import UNIT_ALIASES, number_text, parse_pack_size, parse_pack_sizes
+
+# Columns of the model's CSV output, in order; Pack, Size and UOM are parsed locally from Pack Size
+MODEL_COLUMNS = ['Description', 'Price', 'Quantity', 'Pack Size', 'Foodcode']
+MODEL_HEADER = ','.join(MODEL_COLUMNS)
+# Columns of a chunk result (and of the record batch before the derived columns are added)
+RECORD_COLUMNS = ['Description', 'Price', 'Quantity', 'Pack Size', 'Pack', 'Size', 'UOM', 'Foodcode']
+FINAL_COLUMNS = [
+    'Description', 'Price', 'Quantity', 'Pack Size', 'Pack', 'Size', 'UOM',
+    'Total Price', 'Price Per Pack', 'Price Per Pack Size', 'Price Per Pound', 'Foodcode'
+]
+NUMERIC_COLUMNS = ['Price', 'Quantity', 'Pack', 'Size', 'Foodcode']
+# Stay float64 even when every value is whole, so they print as 12.0 like post_process_csv did
+DECIMAL_COLUMNS = ['Price']
+TEXT_COLUMNS = {'Description': str, 'Pack Size': str, 'UOM': str}
+# Truncated to whole numbers by clean_records, like int(float(cell)); Size keeps parsed fractions (6/.5GAL)
+WHOLE_NUMBER_COLUMNS = ['Quantity', 'Pack']
+
+
+def normalize_row(values, columns=RECORD_COLUMNS):
+    """Exactly len(columns) cells: extra cells belong to an unquoted comma in the Description, missing ones are blank."""
+    if len(values) > len(columns):
+        extra = len(values) - len(columns) + 1
+        values = [','.join(values[:extra])] + values[extra:]
+    return values + [''] * (len(columns) - len(values))
+
+
+def data_lines(csv_output):
+    """The CSV text without its header row"""
+    text = csv_output.strip()
+    if text[:len('description')].lower() == 'description':
+        text = text.split('\n', 1)[1] if '\n' in text else ''
+    return text
+
+
+def frame_from_rows(text, columns=RECORD_COLUMNS):
+    """Slow path for text the C parser rejects (rows with extra cells)"""
+    rows = [normalize_row(row, columns) for row in csv.reader(io.StringIO(text)) if any(cell.strip() for cell in row)]
+    frame = pd.DataFrame(rows, columns=columns, dtype=object).replace('', None)
+    return frame.astype({name: object for name in TEXT_COLUMNS if name in columns})
+
+
+def on_unique(values, clean):
+    """Apply a Series -> Series text cleanup once per distinct value (text columns repeat heavily)"""
+    codes, uniques = pd.factorize(values)
+    cleaned = clean(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+    result = cleaned.take(codes) if len(cleaned) else np.full(len(codes), np.nan, dtype=object)
+    result[codes < 0] = np.nan
+    return pd.Series(result, index=values.index, dtype=object)
+
+
+def type_numeric_columns(frame):
+    """Numeric columns as int64/float64; cells with $ or thousands separators are cleaned first"""
+    for col in NUMERIC_COLUMNS:
+        if col in frame.columns and not pd.api.types.is_numeric_dtype(frame[col]):
+            numbers = pd.to_numeric(frame[col], errors='coerce')
+            failed = numbers.isna() & frame[col].notna()
+            if failed.any():
+                cleaned = on_unique(frame[col][failed], lambda text: text.astype(str).str.replace(r'[$,\s]', '', regex=True))
+                numbers[failed] = pd.to_numeric(cleaned, errors='coerce')
+            frame[col] = numbers
+            if numbers.notna().all() and (numbers == numbers.round()).all():
+                frame[col] = numbers.astype('int64')
+    for col in DECIMAL_COLUMNS:
+        if col in frame.columns:
+            frame[col] = frame[col].astype('float64')
+    return frame
+
+
+def records_from_csv(csv_outputs, columns=RECORD_COLUMNS):
+    """Parse CSV outputs (one per chunk or document) into a single typed record batch.
+
+    The data rows of all outputs are read in one parser pass; the result is a DataFrame
+    with the given columns (chunk results by default), numeric columns already typed, that
+    the rest of finalization works on without re-serializing.
+    """
+    text = '\n'.join(body for body in (data_lines(output) for output in csv_outputs if output) if body)
+    if not text:
+        return pd.DataFrame({name: pd.Series(dtype=object if name in TEXT_COLUMNS else 'float64') for name in columns})
+    text_positions = {columns.index(name): dtype for name, dtype in TEXT_COLUMNS.items() if name in columns}
+    try:
+        frame = pd.read_csv(io.StringIO(text), header=None, dtype=text_positions)
+    except pd.errors.ParserError:
+        frame = None
+    if frame is None or frame.shape[1] != len(columns):
+        frame = frame_from_rows(text, columns)
+    frame.columns = columns
+    return type_numeric_columns(frame)
+
+
+def records_from_model_csv(csv_outputs):
+    """Record batch from the model's output, with Pack, Size and UOM parsed from Pack Size.
+
+    Returns (records, confidence) where confidence is the Pack Size parser's score per row.
+    """
+    records = records_from_csv(csv_outputs, MODEL_COLUMNS)
+    parsed = parse_pack_sizes(records['Pack Size'])
+    return records.join(parsed[['Pack', 'Size', 'UOM']])[RECORD_COLUMNS], parsed['Confidence']
+
+
+def record_row(values):
+    """Record cells for one streamed model row (Pack, Size and UOM inserted from its Pack Size)."""
+    pack, size, uom, _confidence = parse_pack_size(values[3])
+    return values[:4] + [number_text(pack), number_text(size), uom] + values[4:]
+
+
+def standard_uom(uom):
+    uom = uom.str.strip().str.upper()
+    return uom.map(UNIT_ALIASES).fillna(uom)
+
+
+def clean_records(records, whole_numbers=True):
+    """Column-wise cleanup of a record batch, the rules post_process_csv used to apply line by line.
+
+    Strips $ and quotes from text, standardizes UOM spellings and, if whole_numbers,
+    truncates Quantity/Pack like int(float(cell)). Works in place and returns the batch.
+    """
+    records['Description'] = on_unique(records['Description'],
+                                       lambda text: text.str.replace(r'[$"\']', '', regex=True).str.strip())
+    records['Pack Size'] = on_unique(records['Pack Size'], lambda text: text.str.replace('$', '', regex=False))
+    records['UOM'] = on_unique(records['UOM'], lambda text: standard_uom(text.str.replace('$', '', regex=False)))
+    for col in WHOLE_NUMBER_COLUMNS if whole_numbers else []:
+        if records[col].dtype.kind == 'f':
+            records[col] = np.trunc(records[col])
+    return records
+
+
+def number_column_text(values):
+    """Text for a float column of counts: blanks, whole numbers without decimals, fractions as-is"""
+    numbers = values.to_numpy(dtype='float64')
+    missing = np.isnan(numbers)
+    whole = np.where(missing, 0, numbers)
+    text = np.where(whole == np.trunc(whole), whole.astype(np.int64).astype(str), numbers.astype(str))
+    return pd.Series(np.where(missing, '', text), index=values.index, dtype=object)
+
+
+def records_to_chunk_csv(records):
+    """Serialize the record columns (header included); count columns print without decimals."""
+    frame = records[RECORD_COLUMNS].copy()
+    for col in WHOLE_NUMBER_COLUMNS + ['Size', 'Foodcode']:
+        if frame[col].dtype.kind == 'f':
+            frame[col] = number_column_text(frame[col])
+    return frame.to_csv(index=False, float_format='%.1f', lineterminator='\n').strip()
+
+
+def records_to_csv(records):
+    """Serialize a finished record batch; the only place the final CSV string is produced."""
+    return records.to_csv(index=False, float_format='%.1f')
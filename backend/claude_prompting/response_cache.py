@@ -0,0 +1,122 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+DEFAULT_DB_PATH = os.getenv(
+    'LLM_CACHE_PATH',
+    os.path.join(os.path.dirname(__file__), '../.cache/llm_responses.sqlite3')
+)
+DEFAULT_TTL_SECONDS = int(os.getenv('LLM_CACHE_TTL_SECONDS', str(30 * 24 * 3600)))
+DEFAULT_MAX_BYTES = int(os.getenv('LLM_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+CACHE_DISABLED = os.getenv('LLM_CACHE_DISABLED', '').lower() in ('1', 'true', 'yes')
+
+
+def response_cache_key(model, temperature, system_prompt, prompt, max_tokens=None):
+    """Stable key over everything that determines the completion."""
+    prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    parts = [model, repr(float(temperature)), repr(max_tokens), system_prompt or '', prompt_hash]
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed cache of validated LLM completions with TTL and size-bounded LRU eviction."""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_bytes=DEFAULT_MAX_BYTES, enabled=not CACHE_DISABLED):
+        self.db_path = os.path.abspath(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def _ensure_schema(self):
+        if self._initialized:
+            return
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)')
+        self._initialized = True
+
+    def get(self, key):
+        """Return the cached response for key, or None if missing or expired."""
+        with self._lock:
+            self._ensure_schema()
+            now = time.time()
+            with self._connect() as conn:
+                row = conn.execute('SELECT response, created_at FROM responses WHERE key = ?', (key,)).fetchone()
+                if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                    if row is not None:
+                        conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                    self.misses += 1
+                    return None
+                conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, model, response):
+        """Store a validated response and evict expired / least recently used rows."""
+        with self._lock:
+            self._ensure_schema()
+            now = time.time()
+            size = len(response.encode('utf-8'))
+            with self._connect() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_access) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (key, model, response, size, now, now)
+                )
+                self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        if self.ttl_seconds:
+            conn.execute('DELETE FROM responses WHERE created_at < ?', (now - self.ttl_seconds,))
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute('SELECT key, size FROM responses ORDER BY last_access ASC').fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            total -= size
+
+    def stats(self):
+        with self._lock:
+            self._ensure_schema()
+            with self._connect() as conn:
+                entries, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+            return {
+                'enabled': self.enabled,
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': entries,
+                'total_bytes': total,
+                'max_bytes': self.max_bytes,
+            }
+
+
+response_cache = ResponseCache()
@@ -1,11 +1,13 @@
-from flask import Blueprint, request, jsonify
-import io
-from datetime import datetime
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+import json
 from claude_prompting.batch_processor import process_batch_from_urls
-from data_fetching.supabase import supabase
+from claude_prompting.jobs import job_manager, upload_processed_csv
 
 claude_prompting_bp = Blueprint('claude_prompting', __name__)
 
+# Seconds between SSE keep-alive comments while a job is quiet
+SSE_HEARTBEAT_SECONDS = 15
+
 @claude_prompting_bp.route('/process-documents', methods=['POST'])
 def process_pdf():
     try:
@@ -14,20 +16,23 @@ def process_pdf():
         if not file_urls or not isinstance(file_urls, list):
             return jsonify({'status': 'error', 'message': 'file_urls must be a list of URLs (PDFs and/or images)'}), 400
 
+        if not data.get('wait'):
+            # Process in the background; progress and results are read from /jobs/<job_id>
+            job = job_manager.submit(file_urls)
+            return jsonify({
+                'status': 'accepted',
+                'job_id': job.id,
+                'status_url': f'/jobs/{job.id}',
+                'events_url': f'/jobs/{job.id}/events',
+                'csv_url': f'/jobs/{job.id}/csv',
+            }), 202
+
         # Process all files (PDFs + images) using the batch processor
         combined_csv = process_batch_from_urls(file_urls)
         if not combined_csv.strip():
             return jsonify({'status': 'error', 'message': 'No CSV output generated'}), 500
 
-        # Create a timestamped filename
-        csv_filename = f"processed_{datetime.now().strftime('%Y%m%d%H%M%S')}.csv"
-
-        # Upload CSV bytes directly to Supabase
-        csv_bytes = combined_csv.encode('utf-8')
-        supabase.storage.from_('food-documents').upload(f'csvs/{csv_filename}', csv_bytes)
-
-        # Get the public URL of the uploaded CSV
-        csv_url = supabase.storage.from_('food-documents').get_public_url(f'csvs/{csv_filename}')
+        csv_filename, csv_url = upload_processed_csv(combined_csv)
 
         # Return response with CSV content + file info
         return jsonify({
@@ -45,6 +50,51 @@ def process_pdf():
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@claude_prompting_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown job id'}), 404
+    return jsonify({'status': 'success', 'job': job.to_dict()})
+
+@claude_prompting_bp.route('/jobs/<job_id>/csv', methods=['GET'])
+def get_job_csv(job_id):
+    """Final CSV once the job succeeded, otherwise the 8-column rows extracted so far"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown job id'}), 404
+    if job.status == 'succeeded':
+        csv_content = job.result['csv_content']
+    else:
+        csv_content = job.partial_csv()
+    return Response(csv_content, mimetype='text/csv', headers={'X-Job-Status': job.status})
+
+@claude_prompting_bp.route('/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """Server-sent events for a job; reconnecting clients resume from Last-Event-ID"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown job id'}), 404
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', request.args.get('after', -1)))
+    except (TypeError, ValueError):
+        last_event_id = -1
+
+    def generate():
+        after = last_event_id
+        while True:
+            events = job.wait_for_events(after, SSE_HEARTBEAT_SECONDS)
+            for event in events:
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+                after = event['id']
+            if job.finished and after >= job.last_event_id:
+                return
+            if not events:
+                yield ": keep-alive\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 # ================== Old Code ==================
 # @claude_prompting_bp.route('/process-pdf', methods=['POST'])
 # def process_pdf():
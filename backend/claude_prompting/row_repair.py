@@ -0,0 +1,111 @@
+import csv
+import re
+
+from claude_prompting.chunker import detect_table_header, is_item_row
+from claude_prompting.records import MODEL_COLUMNS
+# Source lines searched ahead of the last aligned line when matching an output row
+ALIGN_LOOKAHEAD = 40
+# Share of a row's description words that must appear near its source line
+MIN_WORD_OVERLAP = 0.5
+# Non-item lines above an item row sent with it as its wrapped description
+WRAPPED_LINES = 3
+PLACEHOLDER_MARKERS = ('lorem ipsum', 'example')
+
+
+def words(text):
+    return set(re.findall(r'[a-z]{2,}|\d+', text.lower()))
+
+
+def parse_rows(csv_output, truncated=False):
+    """Split raw model CSV into (good_rows, bad_count): good rows are lines with one value per model column.
+
+    The header row is skipped. When truncated, the last line may be cut mid-row and is dropped.
+    """
+    lines = [line for line in csv_output.strip().split('\n') if line.strip()]
+    if lines and lines[0].lower().startswith('description'):
+        lines = lines[1:]
+    if truncated and lines:
+        lines = lines[:-1]
+    good_rows = []
+    bad_count = 0
+    for line in lines:
+        try:
+            values = next(csv.reader([line]))
+        except (csv.Error, StopIteration):
+            values = []
+        if len(values) == len(MODEL_COLUMNS) and not any(marker in line.lower() for marker in PLACEHOLDER_MARKERS):
+            good_rows.append((line, values))
+        else:
+            bad_count += 1
+    return good_rows, bad_count
+
+
+class SourceIndex:
+    """Item rows of one chunk's source text, with the words each output row can be matched against."""
+
+    def __init__(self, text):
+        self.lines = text.split('\n')
+        self.header_index = detect_table_header(self.lines)
+        self.item_lines = [i for i, line in enumerate(self.lines) if i != self.header_index and is_item_row(line)]
+        # Context for an item row: the non-item lines between it and its neighbours (wrapped descriptions)
+        self.context = {}
+        for n, i in enumerate(self.item_lines):
+            start = self.item_lines[n - 1] + 1 if n > 0 else 0
+            end = self.item_lines[n + 1] if n + 1 < len(self.item_lines) else len(self.lines)
+            self.context[i] = words(' '.join(self.lines[start:end]))
+
+    def align(self, rows, item_lines=None):
+        """Source line index (or None) for each row, matching in order against item_lines (default: all)."""
+        item_lines = self.item_lines if item_lines is None else item_lines
+        aligned = []
+        position = 0
+        for _line, values in rows:
+            description = words(values[0])
+            match = None
+            if description:
+                best_score = 0.0
+                for n in range(position, min(position + ALIGN_LOOKAHEAD, len(item_lines))):
+                    i = item_lines[n]
+                    line_overlap = len(description & words(self.lines[i])) / len(description)
+                    context_overlap = len(description & self.context[i]) / len(description)
+                    if context_overlap >= MIN_WORD_OVERLAP and 2 * line_overlap + context_overlap > best_score:
+                        best_score = 2 * line_overlap + context_overlap
+                        match = n
+            if match is None:
+                aligned.append(None)
+            else:
+                aligned.append(item_lines[match])
+                position = match + 1
+        return aligned
+
+    def missing(self, covered):
+        """Item rows not in covered, as a list of source line indices."""
+        return [i for i in self.item_lines if i not in covered]
+
+    def excerpt(self, line_indices):
+        """Source text for a repair request: the table header plus the given lines and their wrapped text."""
+        position = {i: n for n, i in enumerate(self.item_lines)}
+        selected = set()
+        for i in line_indices:
+            n = position[i]
+            start = max(self.item_lines[n - 1] + 1 if n > 0 else 0, i - WRAPPED_LINES)
+            selected.update(j for j in range(start, i + 1) if j != self.header_index)
+        lines = [self.lines[j] for j in sorted(selected) if self.lines[j].strip()]
+        if self.header_index is not None:
+            lines.insert(0, self.lines[self.header_index])
+        return '\n'.join(lines)
+
+
+def order_rows(rows, aligned):
+    """Stable sort by source line; unaligned rows keep their place after the previous row."""
+    keyed = []
+    last = -1
+    for n, ((line, _values), source_line) in enumerate(zip(rows, aligned)):
+        if source_line is not None:
+            last = source_line
+        keyed.append((last, n, line))
+    return [line for _key, _n, line in sorted(keyed)]
+
+
+def row_key(values):
+    return (' '.join(sorted(words(values[0]))), values[1].strip())
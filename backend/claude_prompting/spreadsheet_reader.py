@@ -0,0 +1,141 @@
+import datetime
+import os
+import re
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# 'auto' prefers python-calamine (Rust reader, also handles .xls) and falls back to openpyxl read-only streaming
+SPREADSHEET_ENGINE = os.getenv('SPREADSHEET_ENGINE', 'auto').lower()
+SPREADSHEET_DELIMITER = os.getenv('SPREADSHEET_DELIMITER', '|')
+
+WHITESPACE_RUN = re.compile(r'\s+')
+
+
+def iter_sheets_calamine(path):
+    """Yield (sheet_name, rows) using python-calamine."""
+    from python_calamine import CalamineWorkbook
+    workbook = CalamineWorkbook.from_path(path)
+    for sheet_name in workbook.sheet_names:
+        try:
+            rows = workbook.get_sheet_by_name(sheet_name).to_python(skip_empty_area=True)
+        except Exception as sheet_error:
+            print(f"[SHEET ERROR] Failed to process sheet '{sheet_name}': {sheet_error}")
+            continue
+        yield sheet_name, rows
+
+
+def iter_sheets_openpyxl(path):
+    """Yield (sheet_name, rows) using openpyxl in read-only streaming mode."""
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet_name in wb.sheetnames:
+            try:
+                yield sheet_name, wb[sheet_name].iter_rows(values_only=True)
+            except Exception as sheet_error:
+                print(f"[SHEET ERROR] Failed to process sheet '{sheet_name}': {sheet_error}")
+                continue
+    finally:
+        wb.close()
+
+
+SPREADSHEET_ENGINES = {
+    'calamine': iter_sheets_calamine,
+    'openpyxl': iter_sheets_openpyxl,
+}
+
+
+def resolve_engine(name=SPREADSHEET_ENGINE):
+    if name != 'auto':
+        return name, SPREADSHEET_ENGINES[name]
+    try:
+        import python_calamine  # noqa: F401
+        return 'calamine', iter_sheets_calamine
+    except ImportError:
+        return 'openpyxl', iter_sheets_openpyxl
+
+
+def format_cell(value, delimiter=SPREADSHEET_DELIMITER):
+    """Render one cell as short text: integral floats lose '.0', dates lose midnight times, whitespace collapses."""
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return ''
+        if value.is_integer():
+            return str(int(value))
+        return repr(round(value, 6))
+    if isinstance(value, datetime.datetime):
+        if value.time() == datetime.time(0, 0):
+            return value.date().isoformat()
+        return value.isoformat(sep=' ', timespec='minutes')
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    text = WHITESPACE_RUN.sub(' ', str(value)).strip()
+    return text.replace(delimiter, '/')
+
+
+def compact_sheet_cells(rows, delimiter=SPREADSHEET_DELIMITER):
+    """Format rows as lists of cell text, dropping empty rows, all-empty columns and trailing empty cells."""
+    formatted = []
+    used_columns = set()
+    for row in rows:
+        cells = [format_cell(value, delimiter) for value in row]
+        non_empty = [i for i, cell in enumerate(cells) if cell]
+        if not non_empty:
+            continue
+        used_columns.update(non_empty)
+        formatted.append(cells)
+
+    keep = sorted(used_columns)
+    compacted = []
+    for cells in formatted:
+        kept = [cells[i] if i < len(cells) else '' for i in keep]
+        while kept and not kept[-1]:
+            kept.pop()
+        compacted.append(kept)
+    return compacted
+
+
+def compact_sheet_rows(rows, delimiter=SPREADSHEET_DELIMITER):
+    """Compacted rows joined into delimiter-separated lines."""
+    return [delimiter.join(cells) for cells in compact_sheet_cells(rows, delimiter)]
+
+
+def read_spreadsheet_cells(path, engine=SPREADSHEET_ENGINE, delimiter=SPREADSHEET_DELIMITER):
+    """Return [(sheet_name, compacted cell rows)] for every non-empty sheet, from a single read."""
+    _, iter_sheets = resolve_engine(engine)
+    sheets = []
+    for sheet_name, rows in iter_sheets(path):
+        cells = compact_sheet_cells(rows, delimiter)
+        if cells:
+            sheets.append((sheet_name, cells))
+    return sheets
+
+
+def extract_text_from_spreadsheet(path, engine=SPREADSHEET_ENGINE, delimiter=SPREADSHEET_DELIMITER):
+    """Single streaming read of every sheet into a compact delimiter-separated text form."""
+    engine_name, iter_sheets = resolve_engine(engine)
+    full_text = []
+    total_rows = 0
+    try:
+        for sheet_name, rows in iter_sheets(path):
+            lines = compact_sheet_rows(rows, delimiter)
+            if not lines:
+                continue
+            full_text.append(f"Sheet: {sheet_name}\n" + '\n'.join(lines))
+            total_rows += len(lines)
+    except Exception as e:
+        print(f"[EXCEL ERROR] Failed to extract from {path} with {engine_name}: {e}")
+        return ""
+
+    if not full_text:
+        print("[WARNING] No data extracted from any sheets")
+        return ""
+
+    result = "\n\n".join(full_text)
+    print(f"[EXCEL] {engine_name}: {len(full_text)} sheets, {total_rows} rows, {len(result)} characters")
+    return result
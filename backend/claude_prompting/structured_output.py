@@ -0,0 +1,108 @@
+import csv
+import io
+import os
+
+from dotenv import load_dotenv
+
+from claude_prompting.pack_size import number_text
+from claude_prompting.records import MODEL_COLUMNS, MODEL_HEADER
+
+# Load environment variables
+load_dotenv()
+
+# 'csv': the model writes CSV text; 'tool': it calls RECORD_ROWS_TOOL and returns typed rows
+EXTRACTION_MODE = os.getenv('EXTRACTION_MODE', 'csv').lower()
+EXTRACTION_MODES = ('csv', 'tool')
+if EXTRACTION_MODE not in EXTRACTION_MODES:
+    print(f"[EXTRACTION MODE] Unknown EXTRACTION_MODE '{EXTRACTION_MODE}', using csv")
+    EXTRACTION_MODE = 'csv'
+
+RECORD_ROWS_TOOL_NAME = 'record_rows'
+# Tool input field for each model column, in MODEL_COLUMNS order
+ROW_FIELDS = ['description', 'price', 'quantity', 'pack_size', 'foodcode']
+RECORD_ROWS_TOOL = {
+    "name": RECORD_ROWS_TOOL_NAME,
+    "description": "Record every item row extracted from the input text, in input order.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "rows": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "description": {"type": "string", "description": "Food item name"},
+                        "price": {"type": ["number", "null"], "description": "Price per unit of quantity purchased"},
+                        "quantity": {"type": ["integer", "null"], "description": "Number of units purchased"},
+                        "pack_size": {"type": ["string", "null"], "description": "Pack size text as written, e.g. 12/16OZ"},
+                        "foodcode": {"type": "string", "description": "6-digit code from the food index, 999999 if none"},
+                    },
+                    "required": ROW_FIELDS,
+                },
+            },
+        },
+        "required": ["rows"],
+    },
+}
+RECORD_ROWS_TOOL_CHOICE = {"type": "tool", "name": RECORD_ROWS_TOOL_NAME}
+
+
+def cell_text(value):
+    """CSV cell for one typed tool value"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, (int, float)):
+        return number_text(float(value))
+    return str(value).strip()
+
+
+def rows_to_model_csv(rows):
+    """Model CSV (MODEL_HEADER plus one line per row) from the tool's row objects.
+
+    Cells are placed by field name and quoted by the csv writer, so a row can be
+    incomplete but never shifted. Entries that are not objects are dropped.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    buffer.write(MODEL_HEADER + '\n')
+    for row in rows or []:
+        if isinstance(row, dict):
+            writer.writerow([cell_text(row.get(field)) for field in ROW_FIELDS])
+    return buffer.getvalue().strip()
+
+
+def model_csv_to_rows(model_csv):
+    """Tool row objects from model CSV text (the inverse of rows_to_model_csv, for stubs and tests)"""
+    rows = []
+    for values in csv.reader(io.StringIO(model_csv.strip())):
+        if len(values) != len(MODEL_COLUMNS) or values[0].lower() == 'description':
+            continue
+        row = dict(zip(ROW_FIELDS, (value.strip() for value in values)))
+        for field, kind in (('price', float), ('quantity', int)):
+            try:
+                row[field] = kind(float(row[field])) if row[field] else None
+            except ValueError:
+                row[field] = None
+        row['pack_size'] = row['pack_size'] or None
+        rows.append(row)
+    return rows
+
+
+def tool_rows(response):
+    """Rows from the response's record_rows call, or None when the response has no such call"""
+    for block in getattr(response, 'content', None) or []:
+        if getattr(block, 'type', None) == 'tool_use' and getattr(block, 'name', None) == RECORD_ROWS_TOOL_NAME:
+            tool_input = getattr(block, 'input', None) or {}
+            rows = tool_input.get('rows') if isinstance(tool_input, dict) else None
+            return rows if isinstance(rows, list) else []
+    return None
+
+
+def response_model_csv(response):
+    """Model CSV text from a Messages API response in either extraction mode"""
+    rows = tool_rows(response)
+    if rows is not None:
+        return rows_to_model_csv(rows)
+    return ''.join(getattr(block, 'text', '') for block in getattr(response, 'content', None) or []).strip()
@@ -0,0 +1,278 @@
+import hashlib
+import json
+import threading
+from types import SimpleNamespace
+
+EXPECTED_HEADER = 'Description,Price,Quantity,Pack Size,Foodcode'
+# Shortest prefix the provider caches; Haiku models need twice as many tokens
+MIN_CACHEABLE_TOKENS = 1024
+HAIKU_MIN_CACHEABLE_TOKENS = 2048
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def cacheable_prefix(request):
+    """Serialize the request up to and including the last cache_control breakpoint.
+
+    Mirrors the provider's prefix order: tools, then system blocks, then messages.
+    Returns '' when the request has no breakpoint.
+    """
+    parts = []
+    prefix_end = 0
+    for tool in request.get('tools') or []:
+        parts.append(json.dumps(tool, sort_keys=True))
+        if tool.get('cache_control'):
+            prefix_end = len(parts)
+    system = request.get('system') or []
+    if isinstance(system, str):
+        system = [{'type': 'text', 'text': system}]
+    for block in system:
+        parts.append(json.dumps(block, sort_keys=True))
+        if block.get('cache_control'):
+            prefix_end = len(parts)
+    return '\n'.join(parts[:prefix_end])
+
+
+def min_cacheable_tokens(model):
+    return HAIKU_MIN_CACHEABLE_TOKENS if 'haiku' in (model or '') else MIN_CACHEABLE_TOKENS
+
+
+def tool_use_response(request, text):
+    """(content, output_text, stop_reason) for a request that forces a tool: the responder's CSV becomes the tool's rows.
+
+    Rows that do not fit in max_tokens are left out, as a real call stops inside the tool input.
+    """
+    from claude_prompting.structured_output import model_csv_to_rows
+    rows = model_csv_to_rows(text)
+    stop_reason = 'tool_use'
+    while rows and estimate_tokens(json.dumps({'rows': rows})) > request.get('max_tokens', float('inf')):
+        rows.pop()
+        stop_reason = 'max_tokens'
+    block = SimpleNamespace(type='tool_use', id='toolu_stub', name=request['tool_choice']['name'], input={'rows': rows})
+    return [block], json.dumps(block.input), stop_reason
+
+
+def default_responder(request):
+    """Echo one valid model-output row per non-empty line of the chunk text."""
+    content = request['messages'][-1]['content']
+    if isinstance(content, list):
+        content = '\n'.join(block.get('text', '') for block in content)
+    chunk = content.split('INPUT TEXT TO PROCESS:', 1)[-1]
+    rows = [EXPECTED_HEADER]
+    for line in chunk.strip().split('\n'):
+        description = line.strip().replace('"', '').replace(',', ' ')
+        if description:
+            rows.append(f"{description},1.0,1,1/1EA,999999")
+    return '\n'.join(rows)
+
+
+class StubStream:
+    """Context manager mirroring MessageStream; text_stream yields the response in small deltas.
+
+    current_message_snapshot.usage counts only the output streamed so far, like the real
+    snapshot of an aborted stream.
+    """
+
+    def __init__(self, message, delta_chars=16):
+        self._message = message
+        self.delta_chars = delta_chars
+        self.current_message_snapshot = SimpleNamespace(usage=SimpleNamespace(**{**vars(message.usage), 'output_tokens': 0}))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    @property
+    def text_stream(self):
+        text = ''.join(getattr(block, 'text', '') for block in self._message.content)
+        for i in range(0, len(text), self.delta_chars):
+            self.current_message_snapshot.usage.output_tokens = estimate_tokens(text[:i + self.delta_chars])
+            yield text[i:i + self.delta_chars]
+
+    def get_final_message(self):
+        return self._message
+
+
+class StubMessages:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, **request):
+        return self._owner.complete(request)
+
+    def stream(self, **request):
+        return StubStream(self._owner.complete(request))
+
+
+class StubAnthropicClient:
+    """Local stand-in for anthropic.Anthropic that records requests and simulates prompt caching.
+
+    The first request with a given cacheable prefix reports it as cache-write tokens;
+    later requests with a byte-identical prefix report it as cache-read tokens. A prefix
+    shorter than the model's minimum cacheable length is billed as plain input. Responses
+    longer than max_tokens are cut off with stop_reason 'max_tokens'. When the request forces
+    a tool (tool_choice type 'tool'), the responder's CSV is returned as that tool's rows.
+    """
+
+    def __init__(self, responder=default_responder):
+        self.responder = responder
+        self.requests = []
+        self.prefix_hashes = []
+        self.usages = []
+        self._seen_prefixes = set()
+        self._lock = threading.Lock()
+        self.messages = StubMessages(self)
+
+    def complete(self, request):
+        prefix = cacheable_prefix(request)
+        prefix_hash = hashlib.sha256(prefix.encode('utf-8')).hexdigest() if prefix else None
+        full_text = json.dumps(request, sort_keys=True, default=str)
+        prefix_tokens = estimate_tokens(prefix) if prefix else 0
+        if prefix_tokens < min_cacheable_tokens(request.get('model')):
+            # The provider ignores breakpoints on short prefixes
+            prefix_hash, prefix_tokens = None, 0
+        with self._lock:
+            self.requests.append(request)
+            self.prefix_hashes.append(prefix_hash)
+            cache_hit = prefix_hash is not None and prefix_hash in self._seen_prefixes
+            if prefix_hash is not None:
+                self._seen_prefixes.add(prefix_hash)
+
+        text = self.responder(request)
+        stop_reason = 'end_turn'
+        if (request.get('tool_choice') or {}).get('type') == 'tool':
+            content, text, stop_reason = tool_use_response(request, text)
+        else:
+            if estimate_tokens(text) > request.get('max_tokens', float('inf')):
+                text = text[:request['max_tokens'] * 4]
+                stop_reason = 'max_tokens'
+            content = [SimpleNamespace(type='text', text=text)]
+        usage = SimpleNamespace(
+            input_tokens=max(0, estimate_tokens(full_text) - prefix_tokens),
+            output_tokens=estimate_tokens(text),
+            cache_creation_input_tokens=0 if cache_hit else prefix_tokens,
+            cache_read_input_tokens=prefix_tokens if cache_hit else 0,
+        )
+        with self._lock:
+            self.usages.append(usage)
+        return SimpleNamespace(
+            content=content,
+            usage=usage,
+            stop_reason=stop_reason,
+            model=request.get('model'),
+        )
+
+
+class FakeBatches:
+    """In-memory stand-in for the Message Batches API (create / retrieve / results).
+
+    A batch reports 'in_progress' for polls_until_done retrieves, then runs every
+    request through the owning stub client and reports 'ended'. custom_ids in
+    fail_ids come back as 'errored' results.
+    """
+
+    def __init__(self, owner, polls_until_done=2, fail_ids=()):
+        self._owner = owner
+        self.polls_until_done = polls_until_done
+        self.fail_ids = set(fail_ids)
+        self._batches = {}
+        self._lock = threading.Lock()
+
+    def create(self, requests):
+        with self._lock:
+            batch_id = f"msgbatch_fake_{len(self._batches) + 1}"
+            self._batches[batch_id] = {'requests': list(requests), 'polls': 0, 'results': None}
+        return self._status(batch_id)
+
+    def retrieve(self, batch_id):
+        batch = self._batches[batch_id]
+        batch['polls'] += 1
+        if batch['results'] is None and batch['polls'] >= self.polls_until_done:
+            batch['results'] = [self._run(request) for request in batch['requests']]
+        return self._status(batch_id)
+
+    def results(self, batch_id):
+        batch = self._batches[batch_id]
+        if batch['results'] is None:
+            raise RuntimeError(f"Batch {batch_id} has not ended")
+        return iter(batch['results'])
+
+    def _run(self, request):
+        custom_id = request['custom_id']
+        if custom_id in self.fail_ids:
+            result = SimpleNamespace(type='errored', error=SimpleNamespace(type='api_error', message='injected failure'))
+        else:
+            result = SimpleNamespace(type='succeeded', message=self._owner.complete(request['params']))
+        return SimpleNamespace(custom_id=custom_id, result=result)
+
+    def _status(self, batch_id):
+        batch = self._batches[batch_id]
+        ended = batch['results'] is not None
+        total = len(batch['requests'])
+        return SimpleNamespace(
+            id=batch_id,
+            processing_status='ended' if ended else 'in_progress',
+            request_counts=SimpleNamespace(processing=0 if ended else total, succeeded=total if ended else 0),
+        )
+
+
+class FakeBatchClient(StubAnthropicClient):
+    """StubAnthropicClient that also serves messages.batches locally."""
+
+    def __init__(self, responder=default_responder, polls_until_done=2, fail_ids=()):
+        super().__init__(responder)
+        self.messages.batches = FakeBatches(self, polls_until_done, fail_ids)
+
+
+def verify_prefix_stability(chunks, food_index, header_context="", candidates_only=False):
+    """Run chunks through call_claude_batch_process against the stub and check the cached prefix.
+
+    Returns a report with whether every request shared one byte-identical prefix, whether
+    calls after the first read it from the cache (it must reach the minimum cacheable
+    length) and the simulated cache usage per call.
+    """
+    from claude_prompting import batch_processor
+
+    stub = StubAnthropicClient()
+    engine = batch_processor.get_llm_engine()
+    original_client = engine.client
+    original_mode = batch_processor.FOOD_INDEX_MODE
+    engine.client = stub
+    batch_processor.FOOD_INDEX_MODE = 'candidates' if candidates_only else 'full'
+    try:
+        for i, chunk in enumerate(chunks):
+            batch_processor.call_claude_batch_process(chunk, food_index, header_context, i > 0, use_cache=False)
+    finally:
+        engine.client = original_client
+        batch_processor.FOOD_INDEX_MODE = original_mode
+
+    prefixes = [cacheable_prefix(request) for request in stub.requests]
+    return {
+        'calls': len(stub.requests),
+        'byte_identical_prefix': len(set(prefixes)) == 1 and '' not in prefixes,
+        'distinct_prefixes': len(set(prefixes)),
+        'later_calls_read_cache': len(stub.usages) > 1 and all(usage.cache_read_input_tokens for usage in stub.usages[1:]),
+        'prefix_chars': len(prefixes[0]) if prefixes else 0,
+        'cache_write_tokens': [usage.cache_creation_input_tokens for usage in stub.usages],
+        'cache_read_tokens': [usage.cache_read_input_tokens for usage in stub.usages],
+    }
+
+
+if __name__ == '__main__':
+    import os
+    food_index_path = os.path.join(os.path.dirname(__file__), '../foodCodes/food_index.txt')
+    with open(food_index_path, 'r') as f:
+        food_index = f.read()
+    sample_chunks = [
+        "Item Description|Pack Size|Unit Price\nChicken Breast Fillet|4/10LB|45.50",
+        "Milk 1% Lowfat|1/2GAL|3.25\nApples Fresh 88ct|1/88CT|30.00",
+        "Whole Wheat Bread|12/2OZ|2.10",
+    ]
+    for candidates_only in (False, True):
+        report = verify_prefix_stability(sample_chunks, food_index, sample_chunks[0].split('\n')[0], candidates_only)
+        mode = 'candidates' if candidates_only else 'full index'
+        print(f"[PREFIX CHECK] {mode}: {report}")
@@ -0,0 +1,578 @@
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+DEFAULT_DB_PATH = os.getenv(
+    'TASK_QUEUE_PATH',
+    os.path.join(os.path.dirname(__file__), '../.cache/task_queue.sqlite3')
+)
+FOOD_INDEX_PATH = os.path.join(os.path.dirname(__file__), '../foodCodes/food_index.txt')
+# Workers heartbeat their lease while a task runs; a lease not renewed for this long goes to another worker
+TASK_LEASE_SECONDS = float(os.getenv('TASK_LEASE_SECONDS', '120'))
+TASK_HEARTBEAT_SECONDS = float(os.getenv('TASK_HEARTBEAT_SECONDS', '30'))
+# Identifies the machine in per-node throughput stats
+WORKER_NODE_ID = os.getenv('WORKER_NODE_ID', socket.gethostname())
+TASK_MAX_ATTEMPTS = int(os.getenv('TASK_MAX_ATTEMPTS', '3'))
+WORKER_POLL_SECONDS = float(os.getenv('WORKER_POLL_SECONDS', '2'))
+
+# Lower runs first: plan work before chunks so every document's chunks get queued early
+KIND_PRIORITY = {'plan': 0, 'chunk': 1, 'finalize': 2}
+
+
+class TaskQueue:
+    """SQLite-backed job and task queue shared by any number of local worker processes.
+
+    A job has one 'plan' task per document (download, extract, chunk), which inserts one
+    'chunk' task per LLM call, and a 'finalize' task once every chunk has settled. Each
+    validated chunk is checkpointed in its task row, so a restarted job only redoes
+    unfinished chunks. Tasks are leased; an expired lease makes the task available again,
+    and a task that fails max_attempts times is marked dead.
+
+    Every lease increments the task's lease_token, a fencing token: heartbeats, completions
+    and failures only apply while the token still matches, so a worker that stalled past its
+    lease cannot overwrite the result of the worker that took the task over. The schema only
+    needs row-level compare-and-set, so the same tables work on a shared server database
+    when workers span machines; SQLite is the local stand-in.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, lease_seconds=TASK_LEASE_SECONDS, max_attempts=TASK_MAX_ATTEMPTS):
+        self.db_path = os.path.abspath(db_path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._transaction() as conn:
+            self._create_schema(conn)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front so two workers cannot lease the same task
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            yield conn
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def _create_schema(self, conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                idempotency_key TEXT UNIQUE,
+                status TEXT NOT NULL,
+                file_urls TEXT NOT NULL,
+                food_index_path TEXT NOT NULL,
+                error TEXT,
+                result_csv TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                doc_index INTEGER NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                priority INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_token INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                UNIQUE (job_id, kind, doc_index, chunk_index)
+            )
+        """)
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(tasks)')}
+        if 'lease_token' not in columns:
+            conn.execute('ALTER TABLE tasks ADD COLUMN lease_token INTEGER NOT NULL DEFAULT 0')
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS workers (
+                id TEXT PRIMARY KEY,
+                node TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                last_heartbeat REAL NOT NULL,
+                tasks_done INTEGER NOT NULL DEFAULT 0,
+                chunks_done INTEGER NOT NULL DEFAULT 0,
+                tasks_failed INTEGER NOT NULL DEFAULT 0,
+                busy_seconds REAL NOT NULL DEFAULT 0
+            )
+        """)
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_ready ON tasks(status, priority, id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_job ON tasks(job_id, kind)')
+
+    # ----- jobs -----
+    def submit_job(self, file_urls, food_index_path=FOOD_INDEX_PATH, idempotency_key=None, local_files=False):
+        """Queue a job with one plan task per document. Resubmitting an idempotency_key returns the existing job.
+
+        With local_files the sources are paths on the workers' filesystem and are opened, not downloaded;
+        only trusted callers (the CLI, benchmarks) should set it.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            if idempotency_key:
+                row = conn.execute('SELECT id FROM jobs WHERE idempotency_key = ?', (idempotency_key,)).fetchone()
+                if row is not None:
+                    return row['id']
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                'INSERT INTO jobs (id, idempotency_key, status, file_urls, food_index_path, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (job_id, idempotency_key, 'pending', json.dumps(list(file_urls)), os.path.abspath(food_index_path), now, now)
+            )
+            for doc_index, url in enumerate(file_urls):
+                self._insert_task(conn, job_id, 'plan', doc_index, 0, {'url': url, 'local': local_files}, now)
+        return job_id
+
+    def get_job(self, job_id):
+        conn = self._connect()
+        try:
+            job = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if job is None:
+                return None
+            counts = {
+                (row['kind'], row['status']): row['n'] for row in conn.execute(
+                    'SELECT kind, status, COUNT(*) AS n FROM tasks WHERE job_id = ? GROUP BY kind, status', (job_id,)
+                )
+            }
+        finally:
+            conn.close()
+        summary = dict(job)
+        summary['file_urls'] = json.loads(summary['file_urls'])
+        summary['tasks'] = {f"{kind}:{status}": n for (kind, status), n in sorted(counts.items())}
+        return summary
+
+    def chunk_results(self, job_id):
+        """{doc_index: [chunk csv or None, ...]} in chunk order; None marks a dead chunk."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT doc_index, chunk_index, status, result FROM tasks WHERE job_id = ? AND kind = 'chunk' "
+                "ORDER BY doc_index, chunk_index", (job_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+        documents = {}
+        for row in rows:
+            documents.setdefault(row['doc_index'], []).append(row['result'] if row['status'] == 'done' else None)
+        return documents
+
+    def retry_dead(self, job_id):
+        """Give dead tasks of a job a fresh set of attempts and reopen the job."""
+        now = time.time()
+        with self._transaction() as conn:
+            revived = conn.execute(
+                "UPDATE tasks SET status = 'pending', attempts = 0, error = NULL, updated_at = ? "
+                "WHERE job_id = ? AND status = 'dead'", (now, job_id)
+            ).rowcount
+            if revived:
+                conn.execute("DELETE FROM tasks WHERE job_id = ? AND kind = 'finalize'", (job_id,))
+                conn.execute("UPDATE jobs SET status = 'running', error = NULL, updated_at = ? WHERE id = ?", (now, job_id))
+        return revived
+
+    # ----- tasks -----
+    def _insert_task(self, conn, job_id, kind, doc_index, chunk_index, payload, now, status='pending', result=None):
+        conn.execute(
+            'INSERT OR IGNORE INTO tasks (job_id, kind, doc_index, chunk_index, priority, payload, status, result, '
+            'created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (job_id, kind, doc_index, chunk_index, KIND_PRIORITY[kind], json.dumps(payload), status, result, now, now)
+        )
+
+    def lease(self, worker_id):
+        """Claim the next runnable task (pending, or leased with an expired lease). Returns a dict or None."""
+        now = time.time()
+        with self._transaction() as conn:
+            # Expired leases on tasks that are out of attempts die instead of running again
+            expired_jobs = [row['job_id'] for row in conn.execute(
+                "SELECT DISTINCT job_id FROM tasks WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts)
+            )]
+            if expired_jobs:
+                conn.execute(
+                    "UPDATE tasks SET status = 'dead', error = COALESCE(error, 'lease expired'), updated_at = ? "
+                    "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    (now, now, self.max_attempts)
+                )
+                for job_id in expired_jobs:
+                    self._maybe_schedule_finalize(conn, job_id, now)
+            row = conn.execute(
+                "SELECT * FROM tasks WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY priority, id LIMIT 1", (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                "lease_token = lease_token + 1, updated_at = ? WHERE id = ?",
+                (worker_id, now + self.lease_seconds, now, row['id'])
+            )
+            conn.execute("UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ? AND status = 'pending'",
+                         (now, row['job_id']))
+        task = dict(row)
+        task['payload'] = json.loads(task['payload'])
+        task['attempts'] += 1
+        task['lease_token'] += 1
+        return task
+
+    def heartbeat(self, task):
+        """Extend a held lease. Returns False once the lease has passed to another worker."""
+        now = time.time()
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE id = ? AND status = 'leased' AND lease_token = ?",
+                (now + self.lease_seconds, task['id'], task['lease_token'])
+            ).rowcount == 1
+
+    def complete(self, task, worker_id, result='', new_chunks=None, job_result=None):
+        """Checkpoint a finished task. Returns False if the task's lease token has moved on.
+
+        new_chunks (plan tasks) is a list of (payload, status, result) inserted as chunk tasks.
+        Inserts are idempotent, so a re-run plan task does not duplicate chunks. job_result
+        (finalize tasks) is (result_csv, error) and is written in the same fenced transaction.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE tasks SET status = 'done', result = ?, error = NULL, lease_owner = NULL, lease_expires = NULL, "
+                "updated_at = ? WHERE id = ? AND status = 'leased' AND lease_token = ?",
+                (result, now, task['id'], task['lease_token'])
+            ).rowcount
+            if not updated:
+                print(f"[QUEUE] Task {task['id']} lease token {task['lease_token']} is stale; discarding result from {worker_id}")
+                return False
+            if job_result is not None:
+                result_csv, error = job_result
+                conn.execute('UPDATE jobs SET status = ?, result_csv = ?, error = ?, updated_at = ? WHERE id = ?',
+                             ('failed' if error else 'succeeded', result_csv, error, now, task['job_id']))
+            for chunk_index, (payload, status, chunk_result) in enumerate(new_chunks or []):
+                self._insert_task(conn, task['job_id'], 'chunk', task['doc_index'], chunk_index, payload, now,
+                                  status=status, result=chunk_result)
+            self._maybe_schedule_finalize(conn, task['job_id'], now)
+        return True
+
+    def fail(self, task, worker_id, error):
+        """Record a failed attempt; the task is retried until it runs out of attempts, then dies."""
+        now = time.time()
+        status = 'dead' if task['attempts'] >= self.max_attempts else 'pending'
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE tasks SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_token = ?",
+                (status, str(error)[:2000], now, task['id'], task['lease_token'])
+            ).rowcount
+            if not updated:
+                return 'stale'
+            if updated and status == 'dead':
+                print(f"[QUEUE] Task {task['id']} ({task['kind']}) is dead after {task['attempts']} attempts: {error}")
+                self._maybe_schedule_finalize(conn, task['job_id'], now)
+        return status
+
+    def _maybe_schedule_finalize(self, conn, job_id, now):
+        """Queue the finalize task once every other task is done or dead; fail the job if finalize itself died."""
+        dead_finalize = conn.execute(
+            "SELECT error FROM tasks WHERE job_id = ? AND kind = 'finalize' AND status = 'dead'", (job_id,)
+        ).fetchone()
+        if dead_finalize is not None:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ? AND status IN ('pending', 'running')",
+                (f"Finalize failed: {dead_finalize['error']}", now, job_id)
+            )
+            return
+        open_tasks = conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE job_id = ? AND kind != 'finalize' AND status NOT IN ('done', 'dead')",
+            (job_id,)
+        ).fetchone()[0]
+        if open_tasks == 0:
+            self._insert_task(conn, job_id, 'finalize', -1, 0, {}, now)
+
+    # ----- workers -----
+    def register_worker(self, worker_id, node=WORKER_NODE_ID):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO workers (id, node, started_at, last_heartbeat) VALUES (?, ?, ?, ?)',
+                (worker_id, node, now, now)
+            )
+
+    def worker_heartbeat(self, worker_id):
+        with self._transaction() as conn:
+            conn.execute('UPDATE workers SET last_heartbeat = ? WHERE id = ?', (time.time(), worker_id))
+
+    def record_task(self, worker_id, kind, seconds, ok):
+        with self._transaction() as conn:
+            conn.execute(
+                'UPDATE workers SET last_heartbeat = ?, tasks_done = tasks_done + ?, chunks_done = chunks_done + ?, '
+                'tasks_failed = tasks_failed + ?, busy_seconds = busy_seconds + ? WHERE id = ?',
+                (time.time(), int(ok), int(ok and kind == 'chunk'), int(not ok), seconds, worker_id)
+            )
+
+    def node_stats(self, alive_within=3 * TASK_HEARTBEAT_SECONDS):
+        """Per-node throughput: live workers, chunks done and chunks per minute since the node's first worker started."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                'SELECT node, COUNT(*) AS workers, SUM(last_heartbeat > ?) AS alive, SUM(tasks_done) AS tasks_done, '
+                'SUM(chunks_done) AS chunks_done, SUM(tasks_failed) AS tasks_failed, SUM(busy_seconds) AS busy_seconds, '
+                'MIN(started_at) AS started_at, MAX(last_heartbeat) AS last_seen FROM workers GROUP BY node ORDER BY node',
+                (now - alive_within,)
+            ).fetchall()
+        finally:
+            conn.close()
+        stats = []
+        for row in rows:
+            elapsed = max(row['last_seen'] - row['started_at'], 1e-9)
+            stats.append({
+                'node': row['node'],
+                'workers': row['workers'],
+                'alive': row['alive'],
+                'tasks_done': row['tasks_done'],
+                'chunks_done': row['chunks_done'],
+                'tasks_failed': row['tasks_failed'],
+                'chunks_per_minute': round(row['chunks_done'] * 60 / elapsed, 2),
+                'utilization': round(row['busy_seconds'] / (elapsed * row['workers']), 2),
+            })
+        return stats
+
+    def pending_count(self):
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM tasks WHERE status IN ('pending', 'leased')").fetchone()[0]
+        finally:
+            conn.close()
+
+
+# ======================= Worker =======================
+def run_plan_task(task, job):
+    """Download (or open) one document and turn it into chunk task payloads."""
+    from claude_prompting.batch_processor import extract_text, plan_document_chunks
+    from claude_prompting.bid_tabulation import try_bid_tabulation_fast_path
+    from claude_prompting.downloader import cleanup_temp_files, download_to_temp_file
+
+    url = task['payload']['url']
+    is_local = task['payload'].get('local', False)
+    path = url if is_local else download_to_temp_file(url)
+    try:
+        fast_path_csv = try_bid_tabulation_fast_path(path)
+        if fast_path_csv:
+            return [({'fast_path': True}, 'done', fast_path_csv)]
+        text = extract_text(path)
+        if not text.strip():
+            print(f"[QUEUE] No text extracted from {url}")
+            return []
+        return [
+            ({'chunk': chunk, 'header_context': header_context, 'is_continuation': is_continuation}, 'pending', None)
+            for chunk, header_context, is_continuation in plan_document_chunks(text)
+        ]
+    finally:
+        if not is_local:
+            cleanup_temp_files([path])
+
+
+def run_chunk_task(task, food_index, cancelled=None):
+    from claude_prompting.batch_processor import call_claude_batch_process
+
+    payload = task['payload']
+    csv_output = call_claude_batch_process(payload['chunk'], food_index, payload['header_context'], payload['is_continuation'],
+                                           cancelled=cancelled)
+    if not csv_output.strip():
+        raise RuntimeError('Chunk returned no rows')
+    return csv_output
+
+
+def run_finalize_task(queue, task, job):
+    """Merge the job's checkpointed chunks. Returns (result_csv, error)."""
+    from claude_prompting.batch_processor import finalize_csv_chunks, merge_chunk_outputs
+
+    documents = queue.chunk_results(task['job_id'])
+    document_csvs = []
+    missing = 0
+    for doc_index in sorted(documents):
+        chunks = documents[doc_index]
+        missing += sum(1 for chunk in chunks if chunk is None)
+        document_csv = merge_chunk_outputs([chunk for chunk in chunks if chunk])
+        if document_csv.strip():
+            document_csvs.append(document_csv)
+    result_csv = finalize_csv_chunks(document_csvs, job['file_urls']) if document_csvs else ''
+    summary = queue.get_job(task['job_id'])
+    dead = sum(n for key, n in summary['tasks'].items() if key.endswith(':dead'))
+    error = f"{dead} task(s) dead, {missing} chunk(s) missing" if dead else None
+    if not result_csv.strip() and error is None:
+        error = 'No CSV output generated'
+    return result_csv, error
+
+
+class LeaseHeartbeat:
+    """Background thread that renews the current task's lease and the worker's liveness."""
+
+    def __init__(self, queue, worker_id, interval=TASK_HEARTBEAT_SECONDS):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.interval = interval
+        self.task = None
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='lease-heartbeat', daemon=True)
+        self._thread.start()
+
+    def hold(self, task):
+        self.task = task
+        self.lost = False
+
+    def release(self):
+        self.task = None
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                task = self.task
+                if task is not None and not self.queue.heartbeat(task):
+                    self.lost = True
+                    print(f"[WORKER {self.worker_id}] Lost lease on task {task['id']}")
+                self.queue.worker_heartbeat(self.worker_id)
+            except Exception as e:
+                print(f"[WORKER {self.worker_id}] Heartbeat failed: {e}")
+
+
+def run_task(queue, task, job, worker_id, food_indexes, heartbeat=None):
+    """Execute one leased task and checkpoint it. Returns (outcome, committed).
+
+    A chunk stops between LLM calls (and mid-stream) once the heartbeat reports the lease lost.
+    """
+    cancelled = (lambda: heartbeat.lost) if heartbeat is not None else None
+    if task['kind'] == 'plan':
+        new_chunks = run_plan_task(task, job)
+        return f"planned {len(new_chunks)} chunks", queue.complete(task, worker_id, new_chunks=new_chunks)
+    if task['kind'] == 'chunk':
+        food_index_path = job['food_index_path']
+        if food_index_path not in food_indexes:
+            with open(food_index_path, 'r') as f:
+                food_indexes[food_index_path] = f.read()
+        return "checkpointed", queue.complete(task, worker_id, run_chunk_task(task, food_indexes[food_index_path], cancelled))
+    result_csv, error = run_finalize_task(queue, task, job)
+    committed = queue.complete(task, worker_id, job_result=(result_csv, error))
+    return f"job {'failed: ' + error if error else 'succeeded'}", committed
+
+
+def run_worker(db_path=DEFAULT_DB_PATH, worker_id=None, poll_seconds=WORKER_POLL_SECONDS, exit_when_idle=False,
+               node=WORKER_NODE_ID):
+    """Pull and run tasks until stopped (or, with exit_when_idle, until the queue is empty)."""
+    queue = TaskQueue(db_path)
+    worker_id = worker_id or f"{node}:{os.getpid()}"
+    queue.register_worker(worker_id, node)
+    heartbeat = LeaseHeartbeat(queue, worker_id)
+    food_indexes = {}
+    print(f"[WORKER {worker_id}] Started on {queue.db_path}")
+    try:
+        while True:
+            task = queue.lease(worker_id)
+            if task is None:
+                if exit_when_idle and queue.pending_count() == 0:
+                    print(f"[WORKER {worker_id}] Queue empty, exiting")
+                    return
+                time.sleep(poll_seconds)
+                continue
+
+            heartbeat.hold(task)
+            job = queue.get_job(task['job_id'])
+            label = f"job {task['job_id'][:8]} {task['kind']} doc {task['doc_index']} chunk {task['chunk_index']}"
+            started = time.monotonic()
+            try:
+                outcome, committed = run_task(queue, task, job, worker_id, food_indexes, heartbeat)
+                queue.record_task(worker_id, task['kind'], time.monotonic() - started, ok=committed)
+                print(f"[WORKER {worker_id}] {label}: {outcome if committed else 'discarded, lease was taken over'}")
+            except Exception as e:
+                queue.record_task(worker_id, task['kind'], time.monotonic() - started, ok=False)
+                if heartbeat.lost:
+                    print(f"[WORKER {worker_id}] {label}: stopped, lease was taken over")
+                    continue
+                status = queue.fail(task, worker_id, e)
+                print(f"[WORKER {worker_id}] {label} failed (attempt {task['attempts']}, now {status}): {e}")
+            finally:
+                heartbeat.release()
+    finally:
+        heartbeat.stop()
+
+
+def start_workers(count, db_path=DEFAULT_DB_PATH, exit_when_idle=False, node=WORKER_NODE_ID):
+    """Run count worker processes on this node and wait for them."""
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=run_worker, kwargs={'db_path': db_path, 'exit_when_idle': exit_when_idle, 'node': node})
+        for _ in range(count)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Durable document-processing queue')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH)
+    commands = parser.add_subparsers(dest='command', required=True)
+    submit = commands.add_parser('submit', help='Queue a job for URLs or local files')
+    submit.add_argument('sources', nargs='+')
+    submit.add_argument('--key', help='Idempotency key; resubmitting it returns the same job')
+    submit.add_argument('--local', action='store_true', help='Sources are file paths on the worker machines')
+    worker = commands.add_parser('worker', help='Run worker processes')
+    worker.add_argument('--processes', type=int, default=1)
+    worker.add_argument('--exit-when-idle', action='store_true')
+    status = commands.add_parser('status')
+    status.add_argument('job_id')
+    export = commands.add_parser('export', help='Write a finished job\'s CSV')
+    export.add_argument('job_id')
+    export.add_argument('--out', default='job.csv')
+    retry = commands.add_parser('retry', help='Revive dead tasks of a job')
+    retry.add_argument('job_id')
+    commands.add_parser('nodes', help='Per-node worker throughput')
+    args = parser.parse_args()
+
+    if args.command == 'worker':
+        start_workers(args.processes, args.db, args.exit_when_idle)
+    else:
+        queue = TaskQueue(args.db)
+        if args.command == 'submit':
+            print(queue.submit_job(args.sources, idempotency_key=args.key, local_files=args.local))
+        elif args.command == 'status':
+            print(json.dumps({k: v for k, v in (queue.get_job(args.job_id) or {}).items() if k != 'result_csv'}, indent=2))
+        elif args.command == 'export':
+            job = queue.get_job(args.job_id)
+            with open(args.out, 'w') as f:
+                f.write((job or {}).get('result_csv') or '')
+            print(f"[QUEUE] Wrote {args.out} ({(job or {}).get('status')})")
+        elif args.command == 'retry':
+            print(f"[QUEUE] Revived {queue.retry_dead(args.job_id)} tasks")
+        elif args.command == 'nodes':
+            for node in queue.node_stats():
+                print(json.dumps(node))
@@ -0,0 +1,216 @@
+import argparse
+import csv
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from claude_prompting.food_code_index import FOOD_INDEX_PATH
+
+# Load environment variables
+load_dotenv()
+
+UNIT_CONVERSIONS_PATH = os.getenv(
+    'UNIT_CONVERSIONS_PATH', os.path.join(os.path.dirname(__file__), '../foodCodes/unit_conversions.csv')
+)
+TABLES = ('weight', 'volume', 'density', 'count', 'can', 'piece')
+# Density row used for food groups without their own entry
+DEFAULT_DENSITY_KEY = '*'
+# UOM spellings meaning "cans, numbered by Size" (6/#10 written as Pack 6, Size 10, UOM CAN)
+CAN_UNITS = ('CAN', 'CANS', 'CN')
+FETCH_PAGE_SIZE = 1000
+# Decimals Price_per_lb is stored with, by the pipeline and by recompute_food_data alike
+PRICE_PER_POUND_DECIMALS = 1
+UPDATE_BATCH_SIZE = 200
+
+# Why a row has no price per pound, in the order they are checked
+NO_PRICE = 'no price'
+UNKNOWN_UNIT = 'unknown unit'
+NO_SIZE = 'no size'
+UNKNOWN_CAN = 'unknown can size'
+NO_PIECE_WEIGHT = 'no piece weight'
+NO_DENSITY = 'no density'
+
+
+def unit_key(uom):
+    return str(uom).upper().replace(' ', '').replace('.', '')
+
+
+class ConversionTables:
+    """Unit conversion tables (foodCodes/unit_conversions.csv) plus the food group of each food code.
+
+    weight: pounds per unit; volume: gallons per unit, times the food group's density (lb/gal);
+    count: pieces per unit, times the food code's piece weight; can: net pounds per numbered can.
+    """
+
+    def __init__(self, tables, food_groups):
+        self.tables = tables
+        self.food_groups = food_groups
+        self.can_numbers = {float(key.lstrip('#')): pounds for key, pounds in tables['can'].items()}
+        self.pieces = {int(code): pounds for code, pounds in tables['piece'].items()}
+
+    @classmethod
+    def from_files(cls, path=UNIT_CONVERSIONS_PATH, food_index_path=FOOD_INDEX_PATH):
+        tables = {name: {} for name in TABLES}
+        with open(path, 'r', newline='') as f:
+            for row in csv.DictReader(f):
+                table = row['table'].strip()
+                if table not in tables:
+                    raise ValueError(f"Unknown conversion table '{table}' in {path}")
+                key = row['key'].strip()
+                tables[table][key if table == 'density' else unit_key(key)] = float(row['value'])
+        with open(food_index_path, 'r', newline='') as f:
+            food_groups = {
+                int(row['foodcode']): (row.get('foodgroups') or '').strip()
+                for row in csv.DictReader(f) if (row.get('foodcode') or '').strip().isdigit()
+            }
+        return cls(tables, food_groups)
+
+    def classify_unit(self, uom):
+        """(kind, factor) for one UOM spelling; kind is None when the unit is not in any table."""
+        key = unit_key(uom)
+        for kind in ('weight', 'volume', 'count'):
+            if key in self.tables[kind]:
+                return kind, self.tables[kind][key]
+        if key in CAN_UNITS:
+            return 'can', np.nan
+        if key.startswith('#'):
+            return 'can', self.tables['can'].get(key, np.nan)
+        return None, np.nan
+
+    def pounds_per_case(self, pack, size, uom, foodcode, food_group=None):
+        """Pounds in one case for aligned Series, as (pounds, issue); issue is '' where converted.
+
+        Pack defaults to 1 ("40LB"); 0 counts as missing, which is how PriceEdits stores a blank Pack. Every lookup is done once per distinct UOM, food code or
+        can number and broadcast, so the cost is a few array operations per batch.
+        """
+        index = pack.index
+        pack = pd.to_numeric(pack, errors='coerce').astype('float64')
+        pack = pack.where(pack > 0).fillna(1.0).to_numpy()
+        size = pd.to_numeric(size, errors='coerce').astype('float64')
+        code = pd.to_numeric(foodcode, errors='coerce')
+
+        codes, uniques = pd.factorize(uom)
+        classified = [self.classify_unit(value) for value in uniques] + [(None, np.nan)]
+        kind = np.array([k for k, _ in classified], dtype=object).take(codes)
+        factor = np.array([f for _, f in classified], dtype='float64').take(codes)
+
+        group = code.map(self.food_groups)
+        if food_group is not None:
+            group = food_group.replace('', np.nan).fillna(group)
+        density = group.map(self.tables['density'])
+        if DEFAULT_DENSITY_KEY in self.tables['density']:
+            density = density.fillna(self.tables['density'][DEFAULT_DENSITY_KEY])
+        density = density.astype('float64').to_numpy()
+        piece = code.map(self.pieces).astype('float64').to_numpy()
+        can_by_size = size.map(self.can_numbers).astype('float64').to_numpy()
+        size = size.to_numpy()
+
+        is_can = kind == 'can'
+        unit_pounds = np.select(
+            [kind == 'weight', kind == 'volume', kind == 'count', is_can & np.isnan(factor), is_can],
+            [factor, factor * density, factor * piece, can_by_size, factor],
+            np.nan,
+        )
+        with np.errstate(invalid='ignore'):
+            pounds = np.where(is_can, pack, pack * size) * unit_pounds
+            converted = pounds > 0
+        issue = np.select(
+            [pd.isna(kind), is_can & np.isnan(unit_pounds), ~is_can & np.isnan(size),
+             (kind == 'count') & np.isnan(piece), (kind == 'volume') & np.isnan(density), ~converted],
+            [UNKNOWN_UNIT, UNKNOWN_CAN, NO_SIZE, NO_PIECE_WEIGHT, NO_DENSITY, NO_SIZE],
+            '',
+        )
+        return pd.Series(np.where(converted, pounds, np.nan), index=index), pd.Series(issue, index=index)
+
+    def price_per_pound(self, price, pack, size, uom, foodcode, food_group=None):
+        """Case price divided by pounds per case; (Series, issue Series). Unconvertible rows are NaN."""
+        pounds, issue = self.pounds_per_case(pack, size, uom, foodcode, food_group)
+        price = pd.to_numeric(price, errors='coerce').astype('float64')
+        priced = price > 0
+        issue = issue.where(priced, NO_PRICE)
+        return (price / pounds).where(priced), issue
+
+
+_tables = None
+_tables_lock = threading.Lock()
+
+
+def get_conversion_tables(reload=False):
+    """Process-wide conversion tables, loaded on first use (or again with reload=True)."""
+    global _tables
+    with _tables_lock:
+        if _tables is None or reload:
+            _tables = ConversionTables.from_files()
+            print(f"[UNITS] Loaded conversion tables: "
+                  + ', '.join(f"{len(_tables.tables[name])} {name}" for name in TABLES))
+        return _tables
+
+
+def price_per_pound(price, pack, size, uom, foodcode, food_group=None):
+    return get_conversion_tables().price_per_pound(price, pack, size, uom, foodcode, food_group)
+
+
+def issue_summary(issue):
+    """'N/M rows' plus counts per reason, for log lines."""
+    failed = issue[issue != '']
+    counts = ', '.join(f"{reason}: {count}" for reason, count in failed.value_counts().items())
+    return f"{len(failed)}/{len(issue)} rows" + (f" ({counts})" if counts else '')
+
+
+# ======================= food_data recompute =======================
+def fetch_food_data(columns):
+    """All food_data rows, a page at a time."""
+    from data_fetching.supabase import supabase
+    rows = []
+    while True:
+        page = (supabase.table('food_data').select(columns)
+                .range(len(rows), len(rows) + FETCH_PAGE_SIZE - 1).execute().data or [])
+        rows.extend(page)
+        if len(page) < FETCH_PAGE_SIZE:
+            return rows
+
+
+def recompute_food_data(dry_run=False):
+    """Recompute Price_per_lb for every food_data row from the current tables; writes only changed rows."""
+    columns = ['id', 'Price', 'Pack', 'Size', 'UOM', 'Food_Code', 'food_group', 'Price_per_lb']
+    frame = pd.DataFrame(fetch_food_data(','.join(columns)), columns=columns)
+    tables = get_conversion_tables(reload=True)
+
+    started = time.perf_counter()
+    per_pound, issue = tables.price_per_pound(frame['Price'], frame['Pack'], frame['Size'], frame['UOM'],
+                                              frame['Food_Code'], frame['food_group'])
+    per_pound = per_pound.round(PRICE_PER_POUND_DECIMALS)
+    elapsed = time.perf_counter() - started
+
+    old = pd.to_numeric(frame['Price_per_lb'], errors='coerce')
+    changed = ~((per_pound == old) | (per_pound.isna() & old.isna()))
+    print(f"[UNITS] {len(frame)} rows converted in {elapsed:.3f}s; unconvertible {issue_summary(issue)}; "
+          f"{int(changed.sum())} rows changed")
+    if dry_run or not changed.any():
+        return int(changed.sum())
+
+    from data_fetching.supabase import supabase
+    updates = frame.loc[changed, ['id']].assign(value=per_pound[changed])
+    for value, group in updates.groupby('value', dropna=False):
+        ids = group['id'].tolist()
+        for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+            supabase.table('food_data').update({'Price_per_lb': None if pd.isna(value) else float(value)}) \
+                .in_('id', ids[start:start + UPDATE_BATCH_SIZE]).execute()
+    print(f"[UNITS] Updated Price_per_lb on {len(updates)} rows")
+    return len(updates)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Unit conversion tables and price per pound')
+    parser.add_argument('--recompute', action='store_true', help='Recompute Price_per_lb over the food_data table')
+    parser.add_argument('--dry-run', action='store_true', help='With --recompute, report changes without writing')
+    args = parser.parse_args()
+
+    if args.recompute:
+        recompute_food_data(dry_run=args.dry_run)
+    else:
+        get_conversion_tables()
@@ -3,6 +3,15 @@ from data_fetching.supabase import supabase
 
 query_filtering_bp = Blueprint('query_filtering', __name__)
 
+
+def weighted_price_per_lb(items):
+    """Quantity-weighted Price_per_lb over the rows that have one (null where the unit was not convertible)"""
+    priced = [item for item in items if item.get('Price_per_lb') is not None]
+    quantity = sum(item.get('Quantity') or 0 for item in priced)
+    if not quantity:
+        return None
+    return sum(item['Price_per_lb'] * (item.get('Quantity') or 0) for item in priced) / quantity
+
 @query_filtering_bp.route('/api/filter-query', methods=['POST'])
 def filter_query():
     filter_params = request.json
@@ -30,9 +39,7 @@ def filter_query():
     # Calculate metrics for the selected school/category
     purchasing_volume = sum(item.get('Price', 0) * item.get('Quantity', 0) or 0 for item in items)
     total_quantity = sum(item.get('Quantity', 0) or 0 for item in items)
-    price_weights = [item.get('Price_per_lb', 0) * item.get('Quantity', 0) or 0 for item in items]
-    price_per_lb_values = [item.get('Price_per_lb') for item in items if item.get('Price_per_lb') is not None]
-    avg_purchase_price = sum(price_weights) / total_quantity if price_per_lb_values else 0
+    avg_purchase_price = weighted_price_per_lb(items) or 0
 
     # Query for other SFAs in the same category and year range (once, for both metrics and printing)
     other_sfa_query = supabase.table('food_data').select('*')
@@ -44,11 +51,9 @@ def filter_query():
     other_sfa_response = other_sfa_query.execute()
     other_sfa_items = other_sfa_response.data if hasattr(other_sfa_response, 'data') else other_sfa_response.get('data', [])
     other_sfa_prices = [item.get('Price_per_lb') for item in other_sfa_items if item.get('Price_per_lb') is not None]
-    purchasing_volume_other_sfa = sum(item.get('Price', 0) * item.get('Quantity', 0) or 0 for item in other_sfa_items)
-    total_other_sfa_quantity = sum(item.get('Quantity', 0) or 0 for item in other_sfa_items)
     other_sfa_min = min(other_sfa_prices) if other_sfa_prices else None
     other_sfa_max = max(other_sfa_prices) if other_sfa_prices else None
-    other_sfa_avg = purchasing_volume_other_sfa / total_other_sfa_quantity if other_sfa_prices else None
+    other_sfa_avg = weighted_price_per_lb(other_sfa_items)
 
     # Calculate potential savings
     potential_savings_avg = None
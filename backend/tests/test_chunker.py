@@ -0,0 +1,91 @@
+import pytest
+
+from claude_prompting.chunker import (
+    chunk_document, detect_table_header, estimate_tokens, is_item_row, split_long_lines,
+)
+
+HEADER = 'Item Description|Pack Size|Qty|Unit Price'
+
+
+def invoice(rows, wrapped_every=0):
+    lines = ['Acme Foods Invoice 1042', HEADER]
+    for r in range(rows):
+        if wrapped_every and r % wrapped_every == 0:
+            lines.append(f'Cheese Cheddar lot {r}')
+            lines.append(f'  Shredded Yellow|4/5 LB|3|$52.{r % 100:02d}')
+        else:
+            lines.append(f'Beans Green Cut lot {r}|6/#10|2|${r % 90 + 5}.50')
+    return '\n'.join(lines)
+
+
+def body_lines(plan):
+    """Every chunk's lines without the header repeated at the top of later chunks"""
+    lines = []
+    for n, chunk in enumerate(plan.chunks):
+        chunk_lines = chunk.split('\n')
+        lines.extend(chunk_lines[1:] if n > 0 and chunk_lines[0] == plan.header else chunk_lines)
+    return lines
+
+
+def test_estimate_tokens():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('Beans 6/#10 $31.50') == 9
+    assert estimate_tokens('Strawberries') == 2
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('Beans Green Cut|6/#10|2|$31.50', True),
+    ('Chicken 4/10LB', True),
+    ('Milk 1% Lowfat 1 GAL', True),
+    (HEADER, False),
+    ('Acme Foods Invoice 1042', False),
+    ('31.50', False),
+])
+def test_is_item_row(line, expected):
+    assert is_item_row(line) is expected
+
+
+def test_detect_table_header():
+    assert detect_table_header(invoice(3).split('\n')) == 1
+    assert detect_table_header(['Beans|6/#10|$31.50', 'Apples|88CT|$30.00']) is None
+
+
+def test_small_document_is_one_chunk():
+    text = invoice(20)
+    plan = chunk_document(text)
+    assert plan.chunks == [text]
+    assert plan.stats()['item_rows'] == 20
+
+
+def test_chunks_fit_the_budgets_and_keep_every_line():
+    text = invoice(600, wrapped_every=7)
+    plan = chunk_document(text, output_budget=1500, input_budget=1200)
+    assert len(plan.chunks) > 1
+    assert max(plan.output_tokens) <= 1500 and max(plan.input_tokens) <= 1200
+    assert body_lines(plan) == text.split('\n')
+    assert sum(plan.item_rows) == 600
+
+
+def test_later_chunks_repeat_the_header_and_keep_wrapped_descriptions():
+    plan = chunk_document(invoice(300, wrapped_every=5), output_budget=800, input_budget=800)
+    for chunk in plan.chunks[1:]:
+        lines = chunk.split('\n')
+        assert lines[0] == HEADER
+        # A chunk never ends on the first half of a wrapped description
+        assert not lines[-1].startswith('Cheese Cheddar')
+
+
+def test_text_without_item_rows_is_split_by_budget():
+    text = '\n'.join(f'Note {n}: deliveries arrive on weekday mornings at the loading dock' for n in range(2000))
+    plan = chunk_document(text, input_budget=1000)
+    assert len(plan.chunks) > 1
+    assert max(plan.input_tokens) <= 1000
+    assert body_lines(plan) == text.split('\n')
+
+
+def test_split_long_lines():
+    line = ' '.join(f'word{n}' for n in range(400))
+    pieces = split_long_lines([line, 'short'], input_budget=200)
+    assert len(pieces) > 2 and pieces[-1] == 'short'
+    assert all(estimate_tokens(piece) <= 100 for piece in pieces)
+    assert ' '.join(pieces[:-1]) == line
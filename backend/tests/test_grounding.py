@@ -0,0 +1,58 @@
+import pytest
+
+from claude_prompting.grounding import NUMBER, SourceGrounding, cents
+
+SOURCE = """Item Description|Pack Size|Qty|Unit Price|Extended
+Beans, Green, Cut|6/#10|2|$31.50|$63.00
+Chicken Breast Fillet|4/10LB|3|$45.55|$136.65
+Cheese Cheddar Shredded|4/5 LB|1|$1,250.00|$1,250.00"""
+
+
+@pytest.mark.parametrize('text, numbers', [
+    ('12,5.25,40', ['12', '5.25', '40']),
+    ('1,250.50', ['1,250.50']),
+    ('$1,000 and 12,345,6', ['1,000', '12,345', '6']),
+    ('12,3456', ['12', '3456']),
+    ('4/10LB .5OZ', ['4', '10', '.5']),
+])
+def test_number_tokens(text, numbers):
+    assert NUMBER.findall(text) == numbers
+
+
+@pytest.mark.parametrize('text, value', [('31.50', 3150), ('$1,250.5', 125050), ('.5', 50), ('abc', None)])
+def test_cents(text, value):
+    assert cents(text) == value
+
+
+@pytest.mark.parametrize('values', [
+    ['Beans Green Cut', '31.5', '2', '6/#10', '300021'],
+    ['Chicken Breast Fillet', '45.6', '3', '4/10LB', '152157'],
+    ['Chicken Breast Fillet', '45.5', '3', '4/10LB', '152157'],
+    ['Cheese Cheddar Shredded', '1250.0', '1', '4/5 LB', '180026'],
+    ['Beans Green Cut', '', '', '', '300021'],
+])
+def test_faithful_rows_are_grounded(values):
+    assert SourceGrounding(SOURCE).check_row(values) == []
+
+
+def test_unit_price_derived_from_a_line_total():
+    source = SourceGrounding("Apples Fresh 88ct|88CT|4|$120.00")
+    assert source.check_row(['Apples Fresh 88ct', '30.0', '4', '88CT', '200015']) == []
+    assert source.check_row(['Apples Fresh 88ct', '30.0', '3', '88CT', '200015']) == ['price']
+
+
+@pytest.mark.parametrize('values, reasons', [
+    (['Turkey Ham Deli Sliced', '31.5', '2', '6/#10', '300021'], ['description']),
+    (['Beans Green Cut', '987.6', '2', '6/#10', '300021'], ['price']),
+    (['Beans Green Cut', '31.5', '2', '36/7 OZ', '300021'], ['pack size']),
+    (['Turkey Ham Deli', '987.6', '2', '36/7 OZ', '300021'], ['description', 'price', 'pack size']),
+])
+def test_invented_values_are_flagged(values, reasons):
+    assert SourceGrounding(SOURCE).check_row(values) == reasons
+
+
+def test_ungrounded_lists_failing_rows_only():
+    rows = [('a', ['Beans Green Cut', '31.5', '2', '6/#10', '300021']),
+            ('b', ['Beans Green Cut', '987.6', '2', '6/#10', '300021'])]
+    assert SourceGrounding(SOURCE).ungrounded(rows) == [('b', ['price'])]
+    assert SourceGrounding('').ungrounded(rows) == []
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from claude_prompting.pack_size import (
+    PACK_SIZE_MIN_CONFIDENCE, UNPARSED, evaluate_corpus, load_corpus, number_text, parse_pack_size, parse_pack_sizes,
+)
+
+CORPUS = load_corpus()
+
+
+@pytest.mark.parametrize('row', CORPUS, ids=[row['pack_size'] for row in CORPUS])
+def test_corpus_row(row):
+    pack, size, uom, _confidence = parse_pack_size(row['pack_size'])
+    assert (number_text(pack), number_text(size), uom) == (row['pack'], row['size'], row['uom'].upper())
+
+
+def test_corpus_is_confident_where_correct():
+    report = evaluate_corpus(CORPUS)
+    assert report['accuracy'] == 1.0
+    assert report['confident_accuracy'] == 1.0
+    assert report['coverage'] >= 0.95
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('12/16OZ', (12.0, 16.0, 'OZ', 1.0)),
+    ('12 X 16 OZ', (12.0, 16.0, 'OZ', 1.0)),
+    ('6/#10', (6.0, 10.0, 'CAN', 1.0)),
+    ('#10', (1.0, 10.0, 'CAN', 0.95)),
+    ('6/1/2GAL', (6.0, 0.5, 'GAL', 0.9)),
+    ('40#', (1.0, 40.0, 'LB', 0.95)),
+    ('4/5 LB AVG', (4.0, 5.0, 'LB', 0.9)),
+    ('1/CS', (1.0, None, 'CS', 0.8)),
+    ('CASE', (1.0, None, 'CS', 0.8)),
+    ('500/CS', (500.0, None, 'CS', 0.8)),
+    ('GALLON', (1.0, 1.0, 'GAL', 0.8)),
+    ('12-2.5LB', (12.0, 2.5, 'LB', 0.85)),
+    ('1M', (1.0, 1000.0, 'CT', 0.95)),
+    ('25LB/100CT', (1.0, 25.0, 'LB', 0.85)),
+    ('6/5#-160CT', (6.0, 5.0, 'LB', 0.9)),
+])
+def test_parse(text, expected):
+    assert parse_pack_size(text) == expected
+
+
+@pytest.mark.parametrize('text', ['36-40LB', '12-15 CT', '1000/.035', '15/24SL', '96'])
+def test_ranges_and_unknown_units_are_not_confident(text):
+    assert 0 < parse_pack_size(text)[3] < PACK_SIZE_MIN_CONFIDENCE
+
+
+@pytest.mark.parametrize('text', [None, np.nan, '', 'Y', 'unused', '#N/A', '2CT/6PK'])
+def test_unparsed(text):
+    assert parse_pack_size(text) == UNPARSED
+
+
+def test_parse_pack_sizes_keeps_index_and_types():
+    values = pd.Series(['12/16OZ', None, 'CASE', '12/16OZ', 'Y'], index=[10, 11, 12, 13, 14], dtype=object)
+    parsed = parse_pack_sizes(values)
+    assert list(parsed.index) == [10, 11, 12, 13, 14]
+    assert parsed['Pack'].dtype == 'float64' and parsed['Size'].dtype == 'float64'
+    np.testing.assert_array_equal(parsed['Pack'], [12.0, np.nan, 1.0, 12.0, np.nan])
+    np.testing.assert_array_equal(parsed['Size'], [16.0, np.nan, np.nan, 16.0, np.nan])
+    assert parsed['UOM'].isna().tolist() == [False, True, False, False, True]
+
+
+@pytest.mark.parametrize('value, text', [(12.0, '12'), (0.5, '0.5'), (2.25, '2.25'), (None, ''), (np.nan, '')])
+def test_number_text(value, text):
+    assert number_text(value) == text
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from claude_prompting.records import (
+    MODEL_HEADER, RECORD_COLUMNS, clean_records, data_lines, normalize_row, record_row, records_from_csv,
+    records_from_model_csv, records_to_chunk_csv,
+)
+
+RECORD_HEADER = ','.join(RECORD_COLUMNS)
+
+
+@pytest.mark.parametrize('values, expected', [
+    (['Beans', '1.0', '2'], ['Beans', '1.0', '2', '', '', '', '', '']),
+    (['Beans', ' Green', '1.0', '2', '6/#10', '6', '10', 'CAN', '300021'],
+     ['Beans, Green', '1.0', '2', '6/#10', '6', '10', 'CAN', '300021']),
+])
+def test_normalize_row(values, expected):
+    assert normalize_row(values) == expected
+
+
+def test_data_lines_drops_the_header():
+    assert data_lines(f"{RECORD_HEADER}\nBeans,1.0\n") == 'Beans,1.0'
+    assert data_lines(RECORD_HEADER) == ''
+    assert data_lines('Beans,1.0') == 'Beans,1.0'
+
+
+def test_records_from_csv_types_columns():
+    records = records_from_csv([
+        f"{RECORD_HEADER}\nBeans,12,2,6/#10,6,10,CAN,300021",
+        f"{RECORD_HEADER}\nApples,$30.50,1,88CT,1,88,CT,200015",
+    ])
+    assert records['Description'].tolist() == ['Beans', 'Apples']
+    assert records['Price'].dtype == 'float64' and records['Price'].tolist() == [12.0, 30.5]
+    assert records['Quantity'].dtype == 'int64' and records['Foodcode'].dtype == 'int64'
+    assert records['Pack Size'].tolist() == ['6/#10', '88CT']
+
+
+def test_unquoted_description_commas_are_merged():
+    records = records_from_csv(['Beans, Green,12.5,2,6/#10,6,10,CAN,300021\n"Cheese, Cheddar",52.1,3,4/5 LB,4,5,LB,180026'])
+    assert records['Description'].tolist() == ['Beans, Green', 'Cheese, Cheddar']
+    assert records['Price'].tolist() == [12.5, 52.1]
+
+
+def test_empty_input_has_every_column():
+    records = records_from_csv(['', RECORD_HEADER])
+    assert list(records.columns) == RECORD_COLUMNS and records.empty
+
+
+def test_model_output_gets_pack_size_columns():
+    records, confidence = records_from_model_csv([f"{MODEL_HEADER}\nBeans,31.5,2,6/#10,300021\nMilk,3.2,4,6/1/2GAL,500455"])
+    assert list(records.columns) == RECORD_COLUMNS
+    assert records[['Pack', 'Size', 'UOM']].values.tolist() == [[6.0, 10.0, 'CAN'], [6.0, 0.5, 'GAL']]
+    assert confidence.tolist() == [1.0, 0.9]
+
+
+def test_record_row():
+    assert record_row(['Beans', '31.5', '2', '6/#10', '300021']) == ['Beans', '31.5', '2', '6/#10', '6', '10', 'CAN', '300021']
+    assert record_row(['Beans', '31.5', '2', '', '300021']) == ['Beans', '31.5', '2', '', '', '', '', '300021']
+
+
+def test_clean_records():
+    records = clean_records(records_from_csv(['"$Beans\'",12.9,2.7,$6/#10,6.5,10,lbs,300021\nApples,1.0,1,88CT,1,88,,200015']))
+    assert records['Description'].tolist() == ['Beans', 'Apples']
+    assert records['Pack Size'].tolist() == ['6/#10', '88CT']
+    assert records['UOM'].iloc[0] == 'LB' and np.isnan(records['UOM'].iloc[1])
+    assert records['Quantity'].tolist() == [2.0, 1.0] and records['Pack'].tolist() == [6.0, 1.0]
+
+
+def test_chunk_csv_round_trip():
+    text = f"{RECORD_HEADER}\nBeans,12.0,2,6/#10,6,10,CAN,300021\nMilk,3.2,4,6/1/2GAL,6,0.5,GAL,500455"
+    assert records_to_chunk_csv(records_from_csv([text])) == text
@@ -0,0 +1,65 @@
+from claude_prompting.row_repair import SourceIndex, order_rows, parse_rows, row_key
+
+SOURCE = """Acme Foods Invoice 1042
+Item Description|Pack Size|Qty|Unit Price
+Beans Green Cut|6/#10|2|$31.50
+Chicken Breast Fillet|4/10LB|1|$45.50
+Cheese Cheddar
+  Shredded Yellow|4/5 LB|3|$52.10
+Apples Fresh 88ct|88CT|1|$30.00"""
+
+
+def model_rows(*lines):
+    return parse_rows('Description,Price,Quantity,Pack Size,Foodcode\n' + '\n'.join(lines))[0]
+
+
+def test_parse_rows_keeps_whole_rows():
+    output = """Description,Price,Quantity,Pack Size,Foodcode
+Beans Green Cut,31.5,2,6/#10,300021
+"Cheese, Cheddar",52.1,3,4/5 LB,180026
+Chicken Breast,45.5,1
+Example item,1.0,1,1/1EA,999999
+Apples Fresh,30.0,1,88CT,200015"""
+    rows, bad_count = parse_rows(output)
+    assert [values[0] for _line, values in rows] == ['Beans Green Cut', 'Cheese, Cheddar', 'Apples Fresh']
+    assert bad_count == 2
+
+
+def test_parse_rows_drops_the_last_row_when_truncated():
+    output = "Description,Price,Quantity,Pack Size,Foodcode\nBeans,31.5,2,6/#10,300021\nApples,30.0,1,88CT,200015"
+    assert len(parse_rows(output)[0]) == 2
+    rows, bad_count = parse_rows(output, truncated=True)
+    assert [values[0] for _line, values in rows] == ['Beans']
+    assert bad_count == 0
+
+
+def test_source_index_finds_item_lines():
+    source = SourceIndex(SOURCE)
+    assert source.header_index == 1
+    assert source.item_lines == [2, 3, 5, 6]
+
+
+def test_align_matches_rows_in_order_and_uses_wrapped_text():
+    source = SourceIndex(SOURCE)
+    rows = model_rows('Beans Green Cut,31.5,2,6/#10,300021', 'Cheddar Cheese Shredded,52.1,3,4/5 LB,180026',
+                      'Turkey Ham Deli,9.9,1,1/1EA,999999', 'Apples Fresh 88ct,30.0,1,88CT,200015')
+    aligned = source.align(rows)
+    assert aligned == [2, 5, None, 6]
+    assert source.missing(set(aligned)) == [3]
+
+
+def test_excerpt_has_the_header_and_wrapped_description():
+    source = SourceIndex(SOURCE)
+    assert source.excerpt([5]).split('\n') == [
+        'Item Description|Pack Size|Qty|Unit Price', 'Cheese Cheddar', '  Shredded Yellow|4/5 LB|3|$52.10',
+    ]
+
+
+def test_order_rows_sorts_by_source_line_and_keeps_unaligned_rows_in_place():
+    rows = model_rows('Apples,30.0,1,88CT,200015', 'Unknown,1.0,1,,999999', 'Beans,31.5,2,6/#10,300021')
+    assert [line.split(',')[0] for line in order_rows(rows, [6, None, 2])] == ['Beans', 'Apples', 'Unknown']
+
+
+def test_row_key_ignores_word_order_and_case():
+    assert row_key(['Green Beans, Cut', '31.5']) == row_key(['cut green BEANS', ' 31.5 '])
+    assert row_key(['Green Beans', '31.5']) != row_key(['Green Beans', '30.0'])
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from claude_prompting.unit_conversion import (
+    NO_DENSITY, NO_PIECE_WEIGHT, NO_PRICE, NO_SIZE, UNKNOWN_CAN, UNKNOWN_UNIT, ConversionTables, issue_summary,
+)
+
+
+@pytest.fixture(scope='module')
+def tables():
+    return ConversionTables.from_files()
+
+
+def convert(tables, rows):
+    """price_per_pound over (price, pack, size, uom, foodcode) tuples, as (values, issues) lists"""
+    frame = pd.DataFrame(rows, columns=['Price', 'Pack', 'Size', 'UOM', 'Foodcode'])
+    per_pound, issue = tables.price_per_pound(frame['Price'], frame['Pack'], frame['Size'], frame['UOM'], frame['Foodcode'])
+    return per_pound.tolist(), issue.tolist()
+
+
+@pytest.mark.parametrize('row, expected', [
+    ((40.0, 4, 5, 'LB', 999999), 2.0),
+    ((40.0, 4, 5, 'lbs', 999999), 2.0),
+    ((24.0, 12, 16, 'OZ', 999999), 2.0),
+    ((80.0, None, 40, '#', 999999), 2.0),
+    ((80.0, 0, 40, 'LB', 999999), 2.0),
+    ((66.0, 6, 10, 'CAN', 300021), 66.0 / (6 * 6.6)),
+    ((66.0, 6, None, '#10', 300021), 66.0 / (6 * 6.6)),
+    ((43.0, 4, 1, 'GAL', 500455), 43.0 / (4 * 8.6)),
+    ((41.7, 4, 1, 'GAL', 1), 41.7 / (4 * 8.34)),
+    ((35.0, 1, 100, 'CT', 200015), 1.0),
+])
+def test_price_per_pound(tables, row, expected):
+    (value,), (issue,) = convert(tables, [row])
+    assert value == pytest.approx(expected)
+    assert issue == ''
+
+
+@pytest.mark.parametrize('row, reason', [
+    ((None, 4, 5, 'LB', 999999), NO_PRICE),
+    ((0.0, 4, 5, 'LB', 999999), NO_PRICE),
+    ((10.0, 4, 5, 'BUNDLE', 999999), UNKNOWN_UNIT),
+    ((10.0, 4, None, 'LB', 999999), NO_SIZE),
+    ((10.0, 6, 7, 'CAN', 999999), UNKNOWN_CAN),
+    ((10.0, 1, 100, 'CT', 999999), NO_PIECE_WEIGHT),
+])
+def test_unconvertible_rows_give_a_reason(tables, row, reason):
+    (value,), (issue,) = convert(tables, [row])
+    assert np.isnan(value)
+    assert issue == reason
+
+
+def test_volume_without_density_is_reported():
+    tables = ConversionTables({'weight': {}, 'volume': {'GAL': 1.0}, 'density': {}, 'count': {}, 'can': {}, 'piece': {}},
+                              {500455: 'Milk & other dairy products'})
+    (value,), (issue,) = convert(tables, [(10.0, 1, 1, 'GAL', 500455)])
+    assert np.isnan(value)
+    assert issue == NO_DENSITY
+
+
+def test_food_group_overrides_the_code(tables):
+    frame = pd.DataFrame({'Price': [41.7, 43.0], 'Pack': [4, 4], 'Size': [1, 1], 'UOM': ['GAL', 'GAL'],
+                          'Foodcode': [1, 1]})
+    food_group = pd.Series(['', 'Milk & other dairy products'])
+    per_pound, _issue = tables.price_per_pound(frame['Price'], frame['Pack'], frame['Size'], frame['UOM'],
+                                               frame['Foodcode'], food_group)
+    assert per_pound.tolist() == pytest.approx([41.7 / (4 * 8.34), 43.0 / (4 * 8.6)])
+
+
+def test_keeps_index(tables):
+    index = [7, 3, 9]
+    frame = pd.DataFrame({'Price': [40.0, None, 40.0], 'Pack': [4, 4, 4], 'Size': [5, 5, 5], 'UOM': ['LB', 'LB', 'XX'],
+                          'Foodcode': [1, 1, 1]}, index=index)
+    per_pound, issue = tables.price_per_pound(frame['Price'], frame['Pack'], frame['Size'], frame['UOM'], frame['Foodcode'])
+    assert list(per_pound.index) == index and list(issue.index) == index
+    assert issue_summary(issue) == f"2/3 rows ({NO_PRICE}: 1, {UNKNOWN_UNIT}: 1)"
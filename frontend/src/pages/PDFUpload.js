@@ -15,6 +15,25 @@ export default function DocumentUpload() {
     }
   };
 
+  const waitForJob = async (jobId) => {
+    while (true) {
+      const response = await fetch(`http://localhost:5005/jobs/${jobId}`);
+      const data = await response.json();
+      if (!response.ok) throw new Error(data.message || 'Could not read job status');
+
+      const job = data.job;
+      if (job.status === 'succeeded' || job.status === 'failed') return job;
+
+      const chunksDone = job.files.reduce((sum, f) => sum + f.chunks_done, 0);
+      const chunksTotal = job.files.reduce((sum, f) => sum + f.chunks_total, 0);
+      const filesDone = job.files.filter((f) => f.status === 'done' || f.status === 'empty').length;
+      setUploadStatus(
+        `Processing (${job.stage})... ${filesDone}/${job.files.length} files, ${chunksDone}/${chunksTotal} chunks`
+      );
+      await new Promise((resolve) => setTimeout(resolve, 2000));
+    }
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
 
@@ -52,13 +71,20 @@ export default function DocumentUpload() {
       const data = await response.json();
       console.log("Backend Response: ", data);
 
-      if (response.ok && data.status === 'success') {
+      if (!response.ok || data.status !== 'accepted') {
+        setUploadStatus('Processing failed: ' + (data.message || 'Unknown error'));
+        return;
+      }
+
+      // Processing runs in the background; poll the job until it finishes
+      const job = await waitForJob(data.job_id);
+      if (job.status === 'succeeded') {
         navigate('/priceEdits', {
-          state: { csvFileName: data.csvFileName, csvUrl: data.csvUrl }
+          state: { csvFileName: job.result.csvFileName, csvUrl: job.result.csvUrl }
         });
         setUploadStatus('Upload and processing successful!');
       } else {
-        setUploadStatus('Processing failed: ' + (data.message || 'Unknown error'));
+        setUploadStatus('Processing failed: ' + (job.error || 'Unknown error'));
       }
 
     } catch (error) {
@@ -130,7 +156,7 @@ export default function DocumentUpload() {
           <div className={`mt-6 p-4 rounded font-medium text-sm
             ${uploadStatus.includes('successful') 
               ? 'bg-green-50 text-green-700' 
-              : uploadStatus.includes('Uploading')
+              : uploadStatus.includes('Uploading') || uploadStatus.startsWith('Processing (')
                 ? 'bg-blue-50 text-blue-700'
                 : 'bg-red-50 text-red-700'}`}
           >
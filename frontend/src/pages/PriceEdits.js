@@ -141,7 +141,8 @@ function PriceEdits() {
                     Price: parseFloat(foodItem.Price) || 0,
                     Price_per_pack: parseFloat(foodItem["Price Per Pack"]) || 0,
                     Per_per_pack_size: parseFloat(foodItem["Price Per Pack Size"]) || 0,
-                    Price_per_lb: parseFloat(foodItem["Price Per Lb"]) || 0,
+                    // Blank when the unit could not be converted to pounds
+                    Price_per_lb: Number.isFinite(parseFloat(foodItem["Price Per Pound"])) ? parseFloat(foodItem["Price Per Pound"]) : null,
                     Quantity: parseInt(foodItem.Quantity) || 0,
                     Size: parseFloat(foodItem.Size) || 0,
                     UOM: foodItem.UOM || '',